@@ -0,0 +1,243 @@
+"""
+Aggregated Activity Statistics for Forensic Tool
+Maintains the daily_rollups table (per user, per day, per category counters)
+on the evidence write paths, and derives the monthly/weekly/daily/trend
+dashboard views from it so reads cost O(days) instead of O(evidence).
+
+Rebuild the rollups from raw evidence at any time with:
+    python analytics.py rebuild-rollups
+"""
+import sys
+import logging
+from datetime import datetime, timedelta
+
+import db
+
+logger = logging.getLogger(__name__)
+
+CATEGORY_KEYS = ('safe', 'defamatory', 'hate_speech')
+THREAT_CATEGORIES = ('Defamatory', 'Hate Speech')
+
+
+def _empty_bucket():
+    return {'scanned': 0, 'secured': 0, 'threats': 0, 'safe': 0, 'defamatory': 0, 'hate_speech': 0}
+
+
+def _day_key(value):
+    # Works for date, datetime and ISO timestamp strings alike
+    return str(value)[:10]
+
+
+def _normalize_category(category):
+    return category if category else 'Pending'
+
+
+def _bump(conn, user_id, day, category, scanned=0, secured=0, threats=0, verified=0):
+    conn.execute('''
+        INSERT INTO daily_rollups (user_id, day, category, scanned, secured, threats, verified)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (user_id, day, category) DO UPDATE SET
+            scanned = scanned + excluded.scanned,
+            secured = secured + excluded.secured,
+            threats = threats + excluded.threats,
+            verified = verified + excluded.verified
+    ''', (int(user_id), _day_key(day), _normalize_category(category), scanned, secured, threats, verified))
+
+
+def record_scan(conn, user_id, timestamp, category, is_defamatory):
+    """Count a new fetched_evidence row. Call inside the same transaction as the INSERT."""
+    _bump(conn, user_id, timestamp, category, scanned=1, threats=1 if is_defamatory else 0)
+
+
+def record_secured(conn, user_id, timestamp, post_id):
+    """Count a new stored_evidence row under the category of the post it anchors."""
+    row = conn.execute(
+        'SELECT category FROM fetched_evidence WHERE post_id = ? ORDER BY id DESC LIMIT 1', (post_id,)
+    ).fetchone()
+    _bump(conn, user_id, timestamp, row[0] if row else None, secured=1)
+
+
+def record_verification(conn, post_id, verified):
+    """
+    Adjust verified counters before fetched_evidence.verified is updated for post_id.
+    Only rows whose verified state actually flips are counted.
+    """
+    now_verified = verified == 1
+    rows = conn.execute(
+        'SELECT user_id, timestamp, category, verified FROM fetched_evidence WHERE post_id = ?', (post_id,)
+    ).fetchall()
+    for user_id, timestamp, category, previous in rows:
+        if user_id is None or not timestamp or (previous == 1) == now_verified:
+            continue
+        _bump(conn, user_id, timestamp, category, verified=1 if now_verified else -1)
+
+
+def rebuild_rollups(conn):
+    """Recompute daily_rollups from raw evidence (backfill / repair)."""
+    for stmt in db.ROLLUPS_DDL + db.ROLLUPS_REBUILD:
+        conn.execute(stmt)
+    conn.commit()
+    return conn.execute('SELECT COUNT(*) FROM daily_rollups').fetchone()[0]
+
+
+def bucket_activity(conn, since, user_id=None):
+    """
+    Return {'YYYY-MM-DD': bucket} for every day on or after `since` with activity.
+    `user_id=None` aggregates across all investigators.
+    """
+    params = [_day_key(since)]
+    user_filter = ''
+    if user_id is not None:
+        user_filter = 'AND user_id = ?'
+        params.append(int(user_id))
+
+    buckets = {}
+    c = conn.cursor()
+    c.execute(f'''
+        SELECT day,
+               SUM(scanned), SUM(secured), SUM(threats),
+               SUM(CASE WHEN category = 'Safe' THEN scanned ELSE 0 END),
+               SUM(CASE WHEN category = 'Defamatory' THEN scanned ELSE 0 END),
+               SUM(CASE WHEN category = 'Hate Speech' THEN scanned ELSE 0 END)
+        FROM daily_rollups
+        WHERE day >= ? {user_filter}
+        GROUP BY day
+    ''', params)
+    for day, scanned, secured, threats, safe, defamatory, hate_speech in c.fetchall():
+        buckets[day] = {
+            'scanned': scanned or 0,
+            'secured': secured or 0,
+            'threats': threats or 0,
+            'safe': safe or 0,
+            'defamatory': defamatory or 0,
+            'hate_speech': hate_speech or 0
+        }
+    return buckets
+
+
+def summarize(buckets, start, end=None):
+    """Sum buckets for days in [start, end] (inclusive) into the report_stats shape."""
+    start_key = _day_key(start)
+    end_key = _day_key(end) if end is not None else None
+    total = _empty_bucket()
+    for day, bucket in buckets.items():
+        if day < start_key or (end_key is not None and day > end_key):
+            continue
+        for key in total:
+            total[key] += bucket[key]
+    return {
+        'scanned': total['scanned'],
+        'secured': total['secured'],
+        'threats': total['threats'],
+        # Fetches/secured double as the activity graph series
+        'fetches': total['scanned'],
+        'retrievals': total['secured'],
+        'categories': {key: total[key] for key in CATEGORY_KEYS}
+    }
+
+
+def daily_trend(buckets, today, days=7):
+    """Per-day series for the last `days` days, oldest first."""
+    trend = []
+    for i in range(days - 1, -1, -1):
+        day = today - timedelta(days=i)
+        bucket = buckets.get(_day_key(day), _empty_bucket())
+        trend.append({'date': day.strftime('%b %d'), 'scanned': bucket['scanned'], 'secured': bucket['secured']})
+    return trend
+
+
+def dashboard_stats(conn, user_id, now):
+    """
+    Build the /report-stats payload from a single rollup query.
+    Windows are aligned to whole days: "monthly" covers the last 30 days plus today.
+    """
+    today = now.date()
+    month_start = today - timedelta(days=30)
+    week_start = today - timedelta(days=7)
+    yesterday = today - timedelta(days=1)
+
+    buckets = bucket_activity(conn, month_start, user_id)
+
+    trend = [
+        {'date': point['date'], 'fetches': point['scanned'], 'retrievals': point['secured']}
+        for point in daily_trend(buckets, today)
+    ]
+    return {
+        'monthly': summarize(buckets, month_start),
+        'weekly': summarize(buckets, week_start),
+        'daily': {
+            'yesterday': summarize(buckets, yesterday, yesterday),
+            'today': summarize(buckets, today, today)
+        },
+        'trend': trend
+    }
+
+
+def totals(conn, user_id=None, start_day=None, end_day=None, category=None):
+    """Sum rollup counters with optional user/day-range/category filters."""
+    query = 'SELECT COALESCE(SUM(scanned), 0), COALESCE(SUM(secured), 0), COALESCE(SUM(threats), 0), COALESCE(SUM(verified), 0) FROM daily_rollups WHERE 1 = 1'
+    params = []
+    if user_id is not None:
+        query += ' AND user_id = ?'
+        params.append(int(user_id))
+    if start_day:
+        query += ' AND day >= ?'
+        params.append(_day_key(start_day))
+    if end_day:
+        query += ' AND day <= ?'
+        params.append(_day_key(end_day))
+    if category:
+        query += ' AND category = ?'
+        params.append(category)
+    scanned, secured, threats, verified = conn.execute(query, params).fetchone()
+    return {'scanned': scanned, 'secured': secured, 'threats': threats, 'verified': verified}
+
+
+def category_counts(conn, user_id=None, start_day=None, end_day=None, field='scanned'):
+    """Return {category: SUM(field)} from the rollups."""
+    if field not in ('scanned', 'secured', 'verified'):
+        raise ValueError(f"Unsupported rollup field: {field}")
+    query = f'SELECT category, SUM({field}) FROM daily_rollups WHERE 1 = 1'
+    params = []
+    if user_id is not None:
+        query += ' AND user_id = ?'
+        params.append(int(user_id))
+    if start_day:
+        query += ' AND day >= ?'
+        params.append(_day_key(start_day))
+    if end_day:
+        query += ' AND day <= ?'
+        params.append(_day_key(end_day))
+    query += ' GROUP BY category'
+    return {category: count or 0 for category, count in conn.execute(query, params).fetchall()}
+
+
+def workload(conn, limit=50):
+    """Per-investigator scan/stored/threat totals for the admin workload report."""
+    placeholders = ', '.join('?' for _ in THREAT_CATEGORIES)
+    rows = conn.execute(f'''
+        SELECT u.id, u.username, u.email,
+               COALESCE(SUM(r.scanned), 0) AS scan_count,
+               COALESCE(SUM(r.verified), 0) AS stored_count,
+               COALESCE(SUM(CASE WHEN r.category IN ({placeholders}) THEN r.scanned ELSE 0 END), 0) AS threat_count
+        FROM users u
+        LEFT JOIN daily_rollups r ON u.id = r.user_id
+        WHERE u.is_admin = 0
+        GROUP BY u.id
+        ORDER BY scan_count DESC
+        LIMIT ?
+    ''', (*THREAT_CATEGORIES, limit)).fetchall()
+    return rows
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    if command != 'rebuild-rollups':
+        print("Usage: python analytics.py rebuild-rollups")
+        sys.exit(2)
+    conn = db.get_connection()
+    started = datetime.now()
+    rows = rebuild_rollups(conn)
+    conn.close()
+    print(f"Rebuilt daily_rollups: {rows} rows in {(datetime.now() - started).total_seconds():.2f}s")
@@ -7,7 +7,7 @@ import sqlite3
 import jwt
 from datetime import datetime, timedelta, timezone
 import requests
-from flask import Flask, request, jsonify, make_response
+from flask import Flask, request, jsonify, make_response, Response, stream_with_context
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
@@ -56,55 +56,125 @@ logger = logging.getLogger(__name__)
 load_dotenv()
 
 from store_blockchain import (
-    store_evidence, get_evidence, get_evidence_by_tx_hash, generate_evidence_hash
+    store_evidence, get_evidence, get_evidence_by_tx_hash, generate_evidence_hash, init_blockchain
 )
 
 import hashlib
 import time
 from crypto_utils import encrypt_field, decrypt_field
-
-# Heavy dependencies - wrapped for clean production startup
+import db
+from db import get_connection
+import analytics
+from user_cache import get_user_status, invalidate_user
+from audit import audit_chain, audit_writer
+import audit_verify
+from inference_scheduler import MicroBatchScheduler
+from classifier_backends import load_backend as load_classifier_backend
+from inference_cache import InferenceCache, cache_key, model_fingerprint
+from model_registry import registry as model_registry
+from lexicon_store import LexiconStore
+from ocr_pipeline import OcrPipeline, ocr_config_tag
+from ocr_cache import OcrCache
+from http_client import client as http_client
+from tweet_cache import TweetCache, FRESH as TWEET_CACHE_FRESH
+from x_rate_governor import XRateGovernor, XRateLimited
+from thread_capture import ThreadCapture, X_THREAD_CAPTURE_DEFAULT, referenced_id
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Heavy dependencies - wrapped for clean production startup.
+# transformers/torch/easyocr are only imported by the background loaders below.
 try:
-    from transformers import AutoTokenizer, AutoModelForSequenceClassification
-    import torch
     import emoji
-    HAS_LOCAL_AI = True
 except ImportError:
-    tokenizer = None
-    model = None
-    torch = None
     emoji = None
-    HAS_LOCAL_AI = False
+HAS_LOCAL_AI = importlib.util.find_spec('transformers') is not None
+tokenizer = None
+
+# Local inference batching (see predict_defamatory_batch)
+MAX_SEQ_LENGTH = 128
+INFERENCE_BATCH_SIZE = int(os.getenv('INFERENCE_BATCH_SIZE', 32))
+BULK_ANALYSIS_MAX_ITEMS = int(os.getenv('BULK_ANALYSIS_MAX_ITEMS', 500))
+INFERENCE_TIMEOUT_SECONDS = float(os.getenv('INFERENCE_TIMEOUT_SECONDS', 30))
+X_LOOKUP_MAX_IDS = 100  # X API limit for GET /2/tweets?ids=
+BULK_FETCH_MAX_POSTS = int(os.getenv('BULK_FETCH_MAX_POSTS', 300))
+BULK_OCR_CONCURRENCY = int(os.getenv('BULK_OCR_CONCURRENCY', 4))
+BULK_FETCH_DEADLINE_SECONDS = float(os.getenv('BULK_FETCH_DEADLINE_SECONDS', 90))  # per request; the rest are reported unprocessed
+BULK_FETCH_COMMIT_EVERY = int(os.getenv('BULK_FETCH_COMMIT_EVERY', 20))  # stored posts per transaction
+
+# How long a request waits for a component that is still loading before degrading
+MODEL_WAIT_SECONDS = float(os.getenv('MODEL_WAIT_SECONDS', 5))
+OCR_WAIT_SECONDS = float(os.getenv('OCR_WAIT_SECONDS', 5))
+
+MODEL_PATH = "models/afro_xlmr_forensics"
+classifier = None
+MODEL_VERSION = None
+HF_MODEL_VERSION = "hf:Brayo44/afro_xlmr_forensics"
+
+
+def _hf_only():
+    if not HAS_LOCAL_AI or os.getenv("USE_HF_API") == "true":
+        return True
+    # Production uses the HF API by default (full-precision torch doesn't fit the instance),
+    # unless a lighter local backend is chosen explicitly with INFERENCE_BACKEND
+    is_prod = os.getenv("FLASK_ENV") == "production"
+    return is_prod and os.getenv("INFERENCE_BACKEND", "").lower() not in ('onnx', 'torch-int8')
 
-try:
+
+def _load_classifier():
+    global tokenizer, classifier, MODEL_VERSION
+    if _hf_only():
+        logger.info("Local classifier not loaded: inference runs via the Hugging Face API")
+        return None
+    if not os.path.exists(MODEL_PATH):
+        logger.warning(f"Model path {MODEL_PATH} not found. Local inference disabled.")
+        return None
+    from transformers import AutoTokenizer
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
+    backend = load_classifier_backend(MODEL_PATH)
+    # Inference cache keys change whenever the model files or backend change
+    MODEL_VERSION = f"local:{backend.name}:{model_fingerprint(MODEL_PATH)}"
+    inference_cache.purge_other_versions(MODEL_VERSION)
+    classifier = backend
+    logger.info(f"Forensic model loaded successfully ({backend.name} backend)")
+    return backend
+
+
+OCR_LANGUAGES = ['en', 'sw']
+
+
+def _load_ocr_reader():
     import easyocr
-    # Initialize reader once at startup with English and Swahili support
-    # Note: This may take several minutes on first run to download models
-    logger.info("Initializing EasyOCR reader (en, sw) on CPU...")
-    ocr_reader = easyocr.Reader(['en', 'sw'], gpu=False) 
-    logger.info("EasyOCR initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize EasyOCR: {e}")
-    ocr_reader = None
+    # English and Swahili; may download detector/recognizer weights on first run
+    logger.info(f"Initializing EasyOCR reader ({', '.join(OCR_LANGUAGES)}) on CPU...")
+    return easyocr.Reader(OCR_LANGUAGES, gpu=False)
 
-device = None
-if HAS_LOCAL_AI:
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-    try:
-        MODEL_PATH = "models/afro_xlmr_forensics"
-        if os.path.exists(MODEL_PATH):
-            tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
-            model = AutoModelForSequenceClassification.from_pretrained(MODEL_PATH).to(device)
-            model.eval()
-            logger.info("Forensic model loaded successfully")
-        else:
-            logger.warning(f"Model path {MODEL_PATH} not found. Local inference disabled.")
-            model = None
-    except Exception as e:
-        logger.error(f"Local model loading failed: {e}")
-        model = None
+
+def _connect_blockchain():
+    if not init_blockchain():
+        raise RuntimeError("Could not connect to the evidence contract")
+    return True
+
+
+model_registry.register('classifier', _load_classifier)
+model_registry.register('ocr', _load_ocr_reader)
+model_registry.register('blockchain', _connect_blockchain)
+
+# Set by gunicorn.conf.py when preload_app is on: load weights in the master before fork
+PRELOAD_MODELS = os.getenv('FORENSIC_PRELOAD_MODELS', 'false').lower() == 'true'
+
+
+def _preload_models():
+    """Load model weights in the gunicorn master so forked workers share them copy-on-write."""
+    if importlib.util.find_spec('torch') is not None:
+        import torch
+        # No intra-op thread pool may exist at fork time; workers size their own in post_fork
+        torch.set_num_threads(1)
+    for name in ('classifier', 'ocr'):
+        model_registry.load_now(name)
 
 app = Flask(__name__)
+db.init_app(app)
 
 allowed_origins = [
     "https://forensic-tool-project.vercel.app",
@@ -182,41 +252,21 @@ def verify_captcha(captcha_id, user_answer):
     except:
         return False
 
+# Load tests (scripts/bench_workers.py) turn limiting off; never disable it in production
+app.config['RATELIMIT_ENABLED'] = os.getenv('RATELIMIT_ENABLED', 'true').lower() == 'true'
 limiter = Limiter(
     app=app,
     key_func=get_remote_address,
     default_limits=["200 per day", "50 per hour"]
 )
 
-# Forensic Lexicons for Personalization
-NCIC_LEXICON = [
-    "Hatupangwingwi", "Mende", "Chunga Kura", "Kama noma noma", 
-    "Kwekwe", "Madoa doa", "Operation Linda Kura", "Watu wa kurusha mawe", 
-    "Watajua hawajui", "Wabara waende kwao", "Wakuja", "Fumigation"
-]
-
-DEFAMATORY_MARKERS = [
-    "thief", "corrupt", "cartel", "mafia", "scammer", "conman", "mwizi", 
-    "fake", "fraud", "liar", "muongo", "character assassination", "poison",
-    "jinxed", "betrayed", "failed", "stole", "corrupt"
-]
-
-SECURITY_THREATS = [
-    "kill", "planning", "bomb", "attack", "al-shabaab", "terror", "violence",
-    "mapinduzi", "revolution", "overthrow", "dead"
-]
-
-SAFE_SIGNIFIERS = [
-    "think", "opinion", "debate", "agree", "disagree", "policy", "news",
-    "discussion", "report", "fact", "together", "peace"
-]
+# Forensic Lexicons for Personalization (NCIC, defamatory, security, safe signifiers),
+# versioned in the lexicon_versions table and hot-reloadable via /admin/lexicon/reload
+lexicon_store = LexiconStore(connection_factory=get_connection)
 
-def extract_forensic_markers(text):
-    text_lower = text.lower()
-    found_ncic = [word for word in NCIC_LEXICON if word.lower() in text_lower]
-    found_defam = [word for word in DEFAMATORY_MARKERS if word.lower() in text_lower]
-    found_security = [word for word in SECURITY_THREATS if word.lower() in text_lower]
-    found_safe = [word for word in SAFE_SIGNIFIERS if word.lower() in text_lower]
+def extract_forensic_markers(text, lexicon=None):
+    lexicon = lexicon or lexicon_store.current()
+    lexicon_hits = lexicon.matcher.match(text)
     
     # Capture handles
     found_entities = re.findall(r'@\w+', text)
@@ -231,10 +281,10 @@ def extract_forensic_markers(text):
     
     # Clean up markers by removing empty results
     return {
-        "ncic": list(set(found_ncic)),
-        "defamatory": list(set(found_defam)),
-        "security": list(set(found_security)),
-        "safe": list(set(found_safe)),
+        "ncic": lexicon_hits["ncic"],
+        "defamatory": lexicon_hits["defamatory"],
+        "security": lexicon_hits["security"],
+        "safe": lexicon_hits["safe"],
         "entities": list(set(found_entities)),
         "names": unique_names,
         "hashtags": hashtags
@@ -254,36 +304,38 @@ def process_visual_content(media_urls):
     if not media_urls:
         return {"text": "", "found": False, "status": "no_media"}
         
+    ocr_reader = model_registry.get('ocr', timeout=OCR_WAIT_SECONDS)
     if ocr_reader is None:
-        logger.warning("OCR process requested but reader is not initialized")
+        logger.warning(f"OCR process requested but reader is {model_registry.state('ocr')}")
         return {"text": "", "found": False, "status": "service_unavailable"}
     
-    extracted_text = []
-    found_any_text = False
-    
-    for url in media_urls:
-        try:
-            resp = requests.get(url, timeout=10)
-            if resp.status_code == 200:
-                results = ocr_reader.readtext(resp.content)
-                text = " ".join([res[1] for res in results])
-                if text.strip():
-                    extracted_text.append(text.strip())
-                    found_any_text = True
-        except Exception as e:
-            logger.error(f"OCR failed for {url}: {e}")
-            
+    # Concurrent download/decode + bounded OCR pool, with a deadline and partial results
+    result = ocr_pipeline.process(media_urls, ocr_reader)
+    logger.info(f"OCR of {len(media_urls)} images: {result['timings']}")
     return {
-        "text": " | ".join(extracted_text) if extracted_text else "",
-        "found": found_any_text,
-        "status": "extracted" if found_any_text else "no_text_detected"
+        "text": result["text"],
+        "found": result["found"],
+        "status": "extracted" if result["found"] else "no_text_detected",
+        "partial": result["partial"],
+        "images": result["images"],
+        "timings": result["timings"]
     }
 
 
-def predict_defamatory(text):
-    # Determine if we should use HF API (Always in Prod if local libs missing or explicitly requested)
-    is_prod = os.getenv("FLASK_ENV") == "production"
-    use_hf = is_prod or not HAS_LOCAL_AI or os.getenv("USE_HF_API") == "true" or model is None
+def predict_defamatory(text, use_hf=None, lexicon=None):
+    # Determine if we should use HF API (Always in Prod if local libs missing or explicitly requested).
+    # Batch callers resolve it once and pass it in, so each item doesn't wait on a loading model again.
+    # Callers that match markers themselves pass their lexicon snapshot so both use the same version.
+    if use_hf is None:
+        use_hf = _use_hf_inference()
+    engine = 'HF-Cloud' if use_hf else 'Local-AfroXLMR'
+
+    # Same cleaned text + same model => same scores; only thresholds/justifications are per request
+    model_version = HF_MODEL_VERSION if use_hf else MODEL_VERSION
+    key = cache_key(clean_for_ai(text), model_version)
+    cached = inference_cache.get(key)
+    if cached is not None:
+        return _build_verdict(text, cached, engine, lexicon)
 
     confidences = [0.0, 0.0, 0.0]
     if use_hf:
@@ -295,7 +347,8 @@ def predict_defamatory(text):
             headers = {"Authorization": f"Bearer {hf_token}"} if hf_token else {}
             
             payload = {"inputs": text, "options": {"wait_for_model": True}}
-            response = requests.post(API_URL, headers=headers, json=payload, timeout=20)
+            # Classification is side-effect free, so 429/5xx (e.g. model loading) are retried
+            response = http_client.post(API_URL, headers=headers, json=payload, timeout=(3.05, 20), idempotent=True)
             
             if response.status_code == 200:
                 output = response.json()
@@ -319,17 +372,88 @@ def predict_defamatory(text):
     else:
         # Local Inference
         try:
-            cleaned_text = clean_for_ai(text)
-            inputs = tokenizer(cleaned_text, return_tensors="pt", truncation=True, padding=True, max_length=128).to(device)
-            with torch.no_grad():
-                outputs = model(**inputs)
-                prob = torch.nn.functional.softmax(outputs.logits, dim=-1)
-                confidences = prob[0].tolist()
+            # Concurrent requests share forward passes through the micro-batcher
+            confidences = inference_scheduler.run(text, timeout=INFERENCE_TIMEOUT_SECONDS)
         except Exception as e:
             logger.error(f"Local Inference Failed: {e}")
             return {"is_defamatory": False, "category": "Error", "confidence": 0.0, "justification": "Local model execution failed."}
 
-    # Common Logic for Verdict and Justification
+    inference_cache.put(key, model_version, confidences)
+    return _build_verdict(text, confidences, engine, lexicon)
+
+
+def _use_hf_inference():
+    # Fall back to the HF API while the local model is still loading (after a bounded wait) or if it failed
+    return _hf_only() or model_registry.get('classifier', timeout=MODEL_WAIT_SECONDS) is None
+
+
+def _local_confidences_batch(texts):
+    """
+    Softmax scores for each text from the local model, in input order.
+    Inputs are sorted by token length and padded per batch, so short posts
+    don't pay for the longest one in the request.
+    """
+    cleaned = [clean_for_ai(t) for t in texts]
+    encodings = tokenizer(cleaned, truncation=True, max_length=MAX_SEQ_LENGTH)
+    input_ids = encodings['input_ids']
+    attention_mask = encodings['attention_mask']
+    order = sorted(range(len(cleaned)), key=lambda i: len(input_ids[i]))
+
+    confidences = [None] * len(texts)
+    for start in range(0, len(order), INFERENCE_BATCH_SIZE):
+        bucket = order[start:start + INFERENCE_BATCH_SIZE]
+        batch = tokenizer.pad(
+            {'input_ids': [input_ids[i] for i in bucket], 'attention_mask': [attention_mask[i] for i in bucket]},
+            return_tensors="np"
+        )
+        probs = classifier.predict_proba(batch['input_ids'], batch['attention_mask'])
+        for i, prob in zip(bucket, probs):
+            confidences[i] = prob
+    return confidences
+
+
+inference_scheduler = MicroBatchScheduler(_local_confidences_batch)
+inference_cache = InferenceCache(connection_factory=get_connection)
+# OCR results are shared across reposts of the same image (near-identical ones only if OCR_PHASH_THRESHOLD > 0)
+ocr_cache = OcrCache(connection_factory=get_connection, ocr_config=ocr_config_tag(OCR_LANGUAGES))
+ocr_pipeline = OcrPipeline(cache=ocr_cache)
+# X API lookups shared across investigators (encrypted, TTL-bound)
+tweet_cache = TweetCache(connection_factory=get_connection)
+x_rate_governor = XRateGovernor(connection_factory=get_connection)
+
+
+def predict_defamatory_batch(texts):
+    """
+    Classify many texts at once. Returns one predict_defamatory()-style dict per text, in order.
+    Local inference runs length-bucketed batches; the HF API path falls back to one call per text.
+    """
+    if not texts:
+        return []
+    # One lexicon version for the whole batch, even across a hot reload
+    lexicon = lexicon_store.current()
+    if _use_hf_inference():
+        return [predict_defamatory(text, use_hf=True, lexicon=lexicon) for text in texts]
+
+    keys = [cache_key(clean_for_ai(text), MODEL_VERSION) for text in texts]
+    all_confidences = [inference_cache.get(key) for key in keys]
+    misses = [i for i, confidences in enumerate(all_confidences) if confidences is None]
+    if misses:
+        try:
+            computed = _local_confidences_batch([texts[i] for i in misses])
+        except Exception as e:
+            logger.error(f"Local Batch Inference Failed: {e}")
+            return [
+                {"is_defamatory": False, "category": "Error", "confidence": 0.0, "justification": "Local model execution failed."}
+                for _ in texts
+            ]
+        for i, confidences in zip(misses, computed):
+            all_confidences[i] = confidences
+            inference_cache.put(keys[i], MODEL_VERSION, confidences)
+    return [_build_verdict(text, confidences, 'Local-AfroXLMR', lexicon) for text, confidences in zip(texts, all_confidences)]
+
+
+def _build_verdict(text, confidences, engine, lexicon=None):
+    """Apply thresholds and marker-based justifications to raw [safe, defamatory, hate_speech] scores."""
     categories = ["Safe", "Defamatory", "Hate Speech"]
     HATE_THRESHOLD = 0.45
     DEFAM_THRESHOLD = 0.25
@@ -343,7 +467,8 @@ def predict_defamatory(text):
         
     result_category = categories[top_class]
     flag = top_class > 0
-    markers = extract_forensic_markers(text)
+    lexicon = lexicon or lexicon_store.current()
+    markers = extract_forensic_markers(text, lexicon)
     
     def generate_granular_justification(cat, score):
         cat_lower = cat.lower().replace(" ", "_")
@@ -377,7 +502,8 @@ def predict_defamatory(text):
         "justification": all_justifications[result_category.lower().replace(" ", "_")],
         "all_scores": {"safe": confidences[0], "defamatory": confidences[1], "hate_speech": confidences[2]},
         "all_justifications": all_justifications,
-        "technical_justification": f"{'HF-Cloud' if use_hf else 'Local-AfroXLMR'} analyzed {len(text)} chars. Markers: {sum(len(v) for v in markers.values())}."
+        "technical_justification": f"{engine} analyzed {len(text)} chars. Markers: {sum(len(v) for v in markers.values())}.",
+        "lexicon_version": lexicon.label
     }
 
 bearer_token = os.getenv("X_BEARER_TOKEN")
@@ -387,6 +513,36 @@ if not bearer_token:
 
 headers = {"Authorization": f"Bearer {bearer_token}"}
 
+def x_api_get(url):
+    """
+    GET an X API URL within the endpoint's quota; raises XRateLimited instead of sending a request X would reject.
+    Retries happen here rather than in http_client so every attempt takes a token and reports its headers;
+    5xx and connection failures are retried, a 429 never is (the governor decides when to try again).
+    """
+    attempt = 0
+    while True:
+        endpoint = x_rate_governor.acquire('GET', url)
+        try:
+            response = http_client.get(url, headers=headers, retries=0)
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt >= http_client.max_retries:
+                raise
+        else:
+            x_rate_governor.observe(endpoint, response)
+            if response.status_code < 500 or attempt >= http_client.max_retries:
+                return response
+            response.close()
+        time.sleep(http_client.backoff(attempt))
+        attempt += 1
+
+def x_rate_limited_response(e):
+    response = make_response(jsonify({
+        "error": f"X API rate limit reached. Please try again in {e.retry_after} seconds.",
+        "retry_after": e.retry_after
+    }), 429)
+    response.headers['Retry-After'] = str(e.retry_after)
+    return response
+
 BREVO_API_KEY = os.getenv("BREVO_API_KEY")
 
 def send_forensic_email(email, token, email_type="activation"):
@@ -434,7 +590,7 @@ def send_forensic_email(email, token, email_type="activation"):
 
     headers = {"accept": "application/json", "api-key": BREVO_API_KEY, "content-type": "application/json"}
     try:
-        response = requests.post(url, json=payload, headers=headers)
+        response = http_client.post(url, json=payload, headers=headers, timeout=(3.05, 10))
         if response.status_code in [200, 201]:
             logger.info(f"{email_type} email successfully sent to {email}")
         else:
@@ -443,7 +599,7 @@ def send_forensic_email(email, token, email_type="activation"):
         logger.error(f"Failed to send {email_type} email: {e}")
 
 def init_db():
-    conn = sqlite3.connect('forensic.db')
+    conn = get_connection()
     c = conn.cursor()
     c.execute('''CREATE TABLE IF NOT EXISTS users (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -582,6 +738,17 @@ def init_db():
         c.execute('ALTER TABLE fetched_evidence ADD COLUMN confidence REAL')
     if 'engagement' not in columns:
         c.execute('ALTER TABLE fetched_evidence ADD COLUMN engagement TEXT')
+    if 'lexicon_version' not in columns:
+        c.execute('ALTER TABLE fetched_evidence ADD COLUMN lexicon_version TEXT')
+    # Thread capture: links replies and quoted posts to their conversation
+    if 'conversation_id' not in columns:
+        c.execute('ALTER TABLE fetched_evidence ADD COLUMN conversation_id TEXT')
+    if 'parent_post_id' not in columns:
+        c.execute('ALTER TABLE fetched_evidence ADD COLUMN parent_post_id TEXT')
+    if 'thread_relation' not in columns:
+        c.execute('ALTER TABLE fetched_evidence ADD COLUMN thread_relation TEXT')
+    if 'thread_depth' not in columns:
+        c.execute('ALTER TABLE fetched_evidence ADD COLUMN thread_depth INTEGER')
 
     columns = [row[1] for row in c.execute('PRAGMA table_info(stored_evidence)').fetchall()]
     if 'eth_tx_hash' not in columns:
@@ -626,40 +793,33 @@ def init_db():
         logger.warning(f"Could not add security columns: {e}")
     
     conn.commit()
+
+    # Versioned secondary indexes, then make sure hot queries actually use them
+    db.apply_migrations(conn)
+    for name, detail in db.audit_query_plans(conn):
+        logger.warning(f"Query plan audit: '{name}' falls back to a full scan ({detail})")
     conn.close()
 
 def log_audit(user_id, action, details):
     """
     Log a user action with tamper-evident hash chaining.
+    Entries are group-committed in the background; audit.SYNC_ACTIONS are
+    written before this returns.
     """
     try:
-        timestamp = datetime.now().isoformat()
         ip_address = request.remote_addr if request else "unknown"
-        
-        conn = sqlite3.connect('forensic.db')
-        c = conn.cursor()
-        
-        # Get the hash of the last entry to chain
-        c.execute('SELECT entry_hash FROM audit_logs ORDER BY id DESC LIMIT 1')
-        row = c.fetchone()
-        prev_hash = row[0] if row else "GENESIS_BLOCK"
-        
-        # Create hash of this entry
-        entry_data = f"{prev_hash}{user_id}{action}{details}{timestamp}{ip_address}"
-        entry_hash = hashlib.sha256(entry_data.encode('utf-8')).hexdigest()
-        
-        c.execute(
-            'INSERT INTO audit_logs (user_id, action, details, ip_address, timestamp, prev_hash, entry_hash) '
-            'VALUES (?, ?, ?, ?, ?, ?, ?)',
-            (user_id, action, details, ip_address, timestamp, prev_hash, entry_hash)
-        )
-        conn.commit()
-        conn.close()
+        audit_writer.submit(user_id, action, details, ip_address)
         logger.info(f"Audit Log: User {user_id} - {action} - {details}")
     except Exception as e:
         logger.error(f"Audit Logging Failed: {e}")
 
 init_db()
+audit_chain.recover()
+lexicon_store.bootstrap()
+if PRELOAD_MODELS:
+    _preload_models()  # remaining components start per worker (gunicorn post_fork)
+else:
+    model_registry.start()
 
 def token_required(f):
     @wraps(f)
@@ -678,13 +838,11 @@ def token_required(f):
         try:
             data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
             current_user = data['user_id']
-            conn = sqlite3.connect('forensic.db')
-            c = conn.cursor()
-            c.execute('SELECT is_active FROM users WHERE id = ?', (current_user,))
-            result = c.fetchone()
-            conn.close()
-            if not result or result[0] == 0:
+            status = get_user_status(current_user)
+            if not status or status['is_active'] == 0:
                 return jsonify({'error': 'Account not activated. Please check your email for activation link.'}), 403
+            if status['account_status'] == 'suspended':
+                return jsonify({'error': 'Your account has been suspended. Contact admin for assistance.'}), 403
         except jwt.ExpiredSignatureError:
             return jsonify({'error': 'Token has expired'}), 401
         except Exception:
@@ -692,6 +850,18 @@ def token_required(f):
         return f(current_user, *args, **kwargs)
     return decorated
 
+def admin_required(f):
+    # Role comes from the same cached status row token_required just loaded,
+    # so the check costs no extra query.
+    @wraps(f)
+    @token_required
+    def decorated(current_user, *args, **kwargs):
+        status = get_user_status(current_user)
+        if not status or not status['is_admin']:
+            return jsonify({'error': 'Unauthorized'}), 403
+        return f(current_user, *args, **kwargs)
+    return decorated
+
 
 def expand_urls(text, urls):
     if not urls:
@@ -736,7 +906,7 @@ def register():
     hashed = hashpw(password.encode('utf-8'), gensalt())
     password_history_json = json.dumps([hashed.decode('utf-8')])  # Store hash, not plain password
     
-    conn = sqlite3.connect('forensic.db')
+    conn = get_connection()
     c = conn.cursor()
     try:
         c.execute('INSERT INTO users (username, password, email, is_active, account_status, password_history, last_password_change, failed_attempts) VALUES (?, ?, ?, 0, ?, ?, ?, 0)', 
@@ -764,7 +934,15 @@ def get_captcha():
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({'status': 'ok', 'service': 'ForensicToolProject API'}), 200
+    # Liveness stays 200 while models load; 'ready' says whether every component has settled
+    components = model_registry.status()
+    ready = all(c['state'] in ('ready', 'disabled') for c in components.values())
+    return jsonify({
+        'status': 'ok',
+        'service': 'ForensicToolProject API',
+        'ready': ready,
+        'components': components
+    }), 200
 
 @app.route('/activate', methods=['GET'])
 def activate():
@@ -776,7 +954,7 @@ def activate():
         data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
         user_id = data['user_id']
 
-        conn = sqlite3.connect('forensic.db')
+        conn = get_connection()
         c = conn.cursor()
         c.execute('SELECT is_active FROM users WHERE id = ?', (user_id,))
         result = c.fetchone()
@@ -799,6 +977,7 @@ def activate():
 
         c.execute('UPDATE users SET is_active = 1, account_status = ? WHERE id = ?', ('pending', user_id))
         conn.commit()
+        invalidate_user(user_id)
         logger.info(f"User ID {user_id} activated successfully - pending admin approval")
         conn.close()
 
@@ -824,7 +1003,7 @@ def resend_activation():
     if not email:
         return jsonify({'error': 'Email is required'}), 400
 
-    conn = sqlite3.connect('forensic.db')
+    conn = get_connection()
     c = conn.cursor()
     c.execute('SELECT id FROM users WHERE email = ? AND is_active = 0', (email,))
     user = c.fetchone()
@@ -849,7 +1028,7 @@ def forgot_password():
     admin_recovery_key = data.get('admin_recovery_key')
     email = data.get('email')
 
-    conn = sqlite3.connect('forensic.db')
+    conn = get_connection()
     c = conn.cursor()
 
     # Admin Recovery Flow (username + recovery key)
@@ -898,6 +1077,7 @@ def forgot_password():
         
         conn.commit()
         conn.close()
+        invalidate_user(user_id)
         
         log_audit(user_id, "admin_recovery_success", "Password reset to default admin123")
         
@@ -953,7 +1133,7 @@ def reset_password():
             return jsonify({'error': 'Invalid reset token'}), 400
         
         user_id = decoded['user_id']
-        conn = sqlite3.connect('forensic.db')
+        conn = get_connection()
         c = conn.cursor()
         c.execute('SELECT password, password_history FROM users WHERE id = ?', (user_id,))
         row = c.fetchone()
@@ -1002,6 +1182,7 @@ def reset_password():
                   (new_hash, new_history_json, datetime.now().isoformat(), user_id))
         conn.commit()
         conn.close()
+        invalidate_user(user_id)
         
         return jsonify({'message': 'Password reset successful. You can now log in.'}), 200
 
@@ -1026,7 +1207,7 @@ def login():
         log_audit(0, "login_failed", "Empty credentials")
         return jsonify({'error': 'Username and password required'}), 400
 
-    conn = sqlite3.connect('forensic.db')
+    conn = get_connection()
     c = conn.cursor()
     c.execute('SELECT id, password, is_active, is_admin, account_status, failed_attempts, lockout_until, force_password_change FROM users WHERE username = ?', (username,))
     user = c.fetchone()
@@ -1136,10 +1317,11 @@ def google_login():
     try:
         client_id = os.getenv('Client_ID')
         try:
-            idinfo = id_token.verify_oauth2_token(token, google_requests.Request(), client_id)
+            # Google's signing certs are fetched over the pooled googleapis.com session
+            google_transport = google_requests.Request(session=http_client.session_for('https://www.googleapis.com'))
+            idinfo = id_token.verify_oauth2_token(token, google_transport, client_id)
         except ValueError:
-            import requests
-            resp = requests.get(f"https://www.googleapis.com/oauth2/v3/userinfo?access_token={token}")
+            resp = http_client.get("https://www.googleapis.com/oauth2/v3/userinfo", params={'access_token': token})
             if resp.status_code != 200:
                 raise ValueError("Invalid Google token")
             idinfo = resp.json()
@@ -1147,7 +1329,7 @@ def google_login():
         email = idinfo.get('email')
         username = idinfo.get('name') or email.split('@')[0]
 
-        conn = sqlite3.connect('forensic.db')
+        conn = get_connection()
         c = conn.cursor()
         c.execute('SELECT id, is_active, is_admin, account_status, force_password_change FROM users WHERE email = ?', (email,))
         user = c.fetchone()
@@ -1206,7 +1388,7 @@ def facebook_login():
         return jsonify({'error': 'Token is required'}), 400
 
     try:
-        resp = requests.get(f"https://graph.facebook.com/me?fields=id,name,email&access_token={token}")
+        resp = http_client.get("https://graph.facebook.com/me", params={'fields': 'id,name,email', 'access_token': token})
         if resp.status_code != 200:
             return jsonify({'error': 'Invalid Facebook token'}), 401
         
@@ -1218,7 +1400,7 @@ def facebook_login():
         if not email:
             email = f"{fb_id}@facebook.local"
 
-        conn = sqlite3.connect('forensic.db')
+        conn = get_connection()
         c = conn.cursor()
         c.execute('SELECT id, is_active, is_admin, account_status, force_password_change FROM users WHERE email = ?', (email,))
         user = c.fetchone()
@@ -1281,7 +1463,7 @@ def passkey_register_start(current_user):
     user_id = current_user['id']
     username = current_user['username']
     
-    conn = sqlite3.connect('forensic.db')
+    conn = get_connection()
     c = conn.cursor()
     c.execute('SELECT credential_id FROM webauthn_credentials WHERE user_id = ?', (user_id,))
     existing_credentials = [{'id': base64url_to_bytes(row[0]), 'type': 'public-key'} for row in c.fetchall()]
@@ -1307,7 +1489,7 @@ def passkey_register_start(current_user):
     options_dict = json.loads(options_to_json(options))
     challenge_str = options_dict['challenge']
 
-    conn = sqlite3.connect('forensic.db')
+    conn = get_connection()
     c = conn.cursor()
     c.execute('INSERT INTO webauthn_challenges (challenge_id, challenge, user_id) VALUES (?, ?, ?)', (challenge_id, challenge_str, user_id))
     conn.commit()
@@ -1326,7 +1508,7 @@ def passkey_register_finish(current_user):
     if not challenge_id or not response_data:
         return jsonify({'error': 'Missing challenge or response'}), 400
 
-    conn = sqlite3.connect('forensic.db')
+    conn = get_connection()
     c = conn.cursor()
     c.execute('SELECT challenge, user_id FROM webauthn_challenges WHERE challenge_id = ?', (challenge_id,))
     row = c.fetchone()
@@ -1381,7 +1563,7 @@ def passkey_login_start():
     options_dict = json.loads(options_to_json(options))
     challenge_str = options_dict['challenge']
 
-    conn = sqlite3.connect('forensic.db')
+    conn = get_connection()
     c = conn.cursor()
     c.execute('INSERT INTO webauthn_challenges (challenge_id, challenge) VALUES (?, ?)', (challenge_id, challenge_str))
     conn.commit()
@@ -1400,7 +1582,7 @@ def passkey_login_finish():
     if not challenge_id or not response_data:
         return jsonify({'error': 'Missing challenge or response'}), 400
 
-    conn = sqlite3.connect('forensic.db')
+    conn = get_connection()
     c = conn.cursor()
     c.execute('SELECT challenge FROM webauthn_challenges WHERE challenge_id = ?', (challenge_id,))
     row = c.fetchone()
@@ -1533,7 +1715,10 @@ def search_x_posts(current_user):
         f"&max_results={max_results}"
     )
 
-    response = requests.get(search_url, headers=headers)
+    try:
+        response = x_api_get(search_url)
+    except XRateLimited as e:
+        return x_rate_limited_response(e)
 
     if response.status_code != 200:
         logger.error(f"X search failed: {response.status_code} - {response.text}")
@@ -1586,6 +1771,279 @@ def search_x_posts(current_user):
     log_audit(current_user, "search_x_posts", f"Query: {query}")
     return jsonify({"posts": posts})
 
+# Full context + entities + media for a single post
+X_TWEET_LOOKUP_FIELDS = (
+    "expansions=author_id,attachments.media_keys,in_reply_to_user_id,referenced_tweets.id"
+    "&tweet.fields=created_at,conversation_id,text,entities,attachments,public_metrics"
+    "&user.fields=username"
+    "&media.fields=media_key,type,url,preview_image_url,variants"
+)
+
+def lookup_tweet(post_id, force_refresh=False):
+    """
+    GET /2/tweets/{post_id} through the shared tweet cache.
+    Returns (payload, cache_status, error_response); error_response is the failed X response, if any.
+    Raises XRateLimited when the lookup quota is exhausted.
+    """
+    if not force_refresh:
+        payload, state = tweet_cache.get(post_id)
+        if state == TWEET_CACHE_FRESH:
+            tweet_cache.record_hit(post_id)
+            return payload, "hit", None
+        if payload is not None:
+            # Only engagement is stale: refresh it with a metrics-only lookup, keep the rest
+            try:
+                response = x_api_get(f"https://api.x.com/2/tweets/{post_id}?tweet.fields=public_metrics")
+                status = response.status_code
+                metrics = response.json().get('data', {}).get('public_metrics') if status == 200 else None
+            except XRateLimited:
+                status, metrics = 429, None
+            except (requests.RequestException, ValueError) as e:
+                # Network failure or a non-JSON body: the cached engagement is still usable
+                status, metrics = type(e).__name__, None
+            if metrics is not None:
+                tweet_cache.update_metrics(post_id, metrics)
+                tweet_cache.count('metrics_refreshes')
+                payload['data']['public_metrics'] = metrics
+                return payload, "metrics_refreshed", None
+            logger.warning(f"Metrics refresh for {post_id} failed ({status}); serving cached engagement")
+            tweet_cache.record_hit(post_id)
+            return payload, "metrics_stale", None
+
+    tweet_cache.count('forced_refreshes' if force_refresh else 'misses')
+    response = x_api_get(f"https://api.x.com/2/tweets/{post_id}?{X_TWEET_LOOKUP_FIELDS}")
+    if response.status_code != 200:
+        return None, "miss", response
+    payload = response.json()
+    if payload.get('data'):
+        tweet_cache.put(post_id, payload)
+    return payload, "refreshed" if force_refresh else "miss", None
+
+def _includes_for(tweet, includes):
+    """The slice of a multi-ID lookup's shared includes block that belongs to one post."""
+    media_keys = set(tweet.get('attachments', {}).get('media_keys', []))
+    return {
+        'users': [u for u in includes.get('users', []) if u.get('id') == tweet.get('author_id')],
+        'media': [m for m in includes.get('media', []) if m.get('media_key') in media_keys],
+    }
+
+def lookup_tweets(post_ids, force_refresh=False):
+    """
+    Look up many posts: fresh cache entries first, the rest through GET /2/tweets?ids= in
+    chunks of X_LOOKUP_MAX_IDS. Returns ([(post_id, payload, cache_status, error)], api_calls).
+    """
+    results = {}
+    to_fetch = []
+    for post_id in post_ids:
+        payload, state = (None, None) if force_refresh else tweet_cache.get(post_id)
+        if state == TWEET_CACHE_FRESH:
+            tweet_cache.record_hit(post_id)
+            results[post_id] = (payload, "hit", None)
+        else:
+            to_fetch.append(post_id)
+
+    api_calls = 0
+    status = "refreshed" if force_refresh else "miss"
+    for start in range(0, len(to_fetch), X_LOOKUP_MAX_IDS):
+        chunk = to_fetch[start:start + X_LOOKUP_MAX_IDS]
+        for _ in chunk:
+            tweet_cache.count('forced_refreshes' if force_refresh else 'misses')
+        try:
+            response = x_api_get(f"https://api.x.com/2/tweets?ids={','.join(chunk)}&{X_TWEET_LOOKUP_FIELDS}")
+        except XRateLimited as e:
+            # Quota exhausted: report the rest without spending requests X would reject
+            for post_id in to_fetch[start:]:
+                results[post_id] = (None, status, f"X API rate limit reached; retry in {e.retry_after}s")
+            break
+        api_calls += 1
+        if response.status_code != 200:
+            for post_id in chunk:
+                results[post_id] = (None, status, f"X API error {response.status_code}")
+            logger.error(f"X multi-ID lookup failed: {response.status_code} - {response.text}")
+            continue
+        body = response.json()
+        includes = body.get('includes', {})
+        for tweet in body.get('data', []):
+            payload = {'data': tweet, 'includes': _includes_for(tweet, includes)}
+            tweet_cache.put(tweet['id'], payload)
+            results[tweet['id']] = (payload, status, None)
+        # Deleted, protected or unknown IDs come back as per-ID errors
+        for error in body.get('errors', []):
+            post_id = error.get('resource_id') or error.get('value')
+            if post_id in chunk and post_id not in results:
+                results[post_id] = (None, status, error.get('detail') or error.get('title', 'Not found'))
+        for post_id in chunk:
+            results.setdefault(post_id, (None, status, "Post not returned by X API"))
+    return [(post_id, *results[post_id]) for post_id in post_ids], api_calls
+
+def parse_tweet(payload):
+    """Text (URLs expanded), author, media URLs and metrics of the post in an X lookup payload."""
+    tweet_data = payload.get('data', {})
+    includes = _includes_for(tweet_data, payload.get('includes', {}))
+    author_id = tweet_data.get('author_id', '')
+    author_username = next((user['username'] for user in includes['users'] if user['id'] == author_id), '')
+
+    media_urls = []
+    for media_item in includes['media']:
+        if media_item.get('type') == 'photo' and media_item.get('url'):
+            media_urls.append(media_item['url'])
+        elif media_item.get('type') == 'video' and media_item.get('variants'):
+            # Get highest bitrate video URL
+            variants = media_item['variants']
+            max_bitrate = max(variants, key=lambda v: v.get('bit_rate', 0))
+            media_urls.append(max_bitrate['url'])
+
+    return {
+        "id": tweet_data.get('id', ''),
+        "text": expand_urls(tweet_data.get('text', ''), tweet_data.get('entities', {}).get('urls', []) or []),
+        "created_at": tweet_data.get('created_at', ''),
+        "author_id": author_id,
+        "author_username": author_username,
+        "conversation_id": tweet_data.get('conversation_id'),
+        "parent_post_id": referenced_id(tweet_data, 'replied_to'),
+        "media_urls": media_urls,
+        "metrics": tweet_data.get('public_metrics', {})
+    }
+
+def pending_media_verdict():
+    # Posts with media ALWAYS require confirmation, even if no text was found in the images,
+    # so the user can see that the system "checked" them.
+    return {"is_defamatory": False, "category": "Pending", "confidence": 0.0, "justification": "Awaiting human verification of media."}
+
+def build_post_data(post, visual_data, defamation_result):
+    metrics = post['metrics']
+    return {
+        "id": post['id'],
+        "text": post['text'],
+        "visual_text": visual_data["text"],
+        "visual_status": visual_data["status"],
+        "visual_metadata": {
+            "partial": visual_data.get("partial", False),
+            "images": visual_data.get("images", []),
+            "timings": visual_data.get("timings", {})
+        },
+        "requires_confirmation": len(post['media_urls']) > 0,
+        "author_username": post['author_username'],
+        "created_at": post['created_at'],
+        "author_id": post['author_id'],
+        "media_urls": post['media_urls'],
+        "conversation_id": post.get('conversation_id'),
+        "parent_post_id": post.get('parent_post_id'),
+        "engagement": {
+            "retweets": metrics.get('retweet_count', 0),
+            "replies": metrics.get('reply_count', 0),
+            "likes": metrics.get('like_count', 0),
+            "quotes": metrics.get('quote_count', 0),
+            "views": metrics.get('impression_count', 0)
+        },
+        "defamation": defamation_result
+    }
+
+FETCHED_EVIDENCE_INSERT = (
+    'INSERT INTO fetched_evidence (user_id, post_id, content, author_username, created_at, media_urls, timestamp, verified, engagement, is_defamatory, category, confidence, lexicon_version, '
+    'conversation_id, parent_post_id, thread_relation, thread_depth) '
+    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'
+)
+
+def fetched_evidence_row(user_id, post_data, fetched_at):
+    """FETCHED_EVIDENCE_INSERT parameters for a post, with sensitive fields encrypted."""
+    defamation_result = post_data['defamation']
+    return (
+        user_id, post_data['id'], encrypt_field(post_data['text']), encrypt_field(post_data['author_username']),
+        post_data['created_at'], encrypt_field(json.dumps(post_data['media_urls'])), fetched_at, None,
+        # Engagement metrics are stored for full compliance
+        encrypt_field(json.dumps(post_data['engagement'])),
+        1 if defamation_result.get('is_defamatory') else 0, defamation_result.get('category', 'Safe'),
+        defamation_result.get('confidence', 0.0), defamation_result.get('lexicon_version'),
+        post_data.get('conversation_id'), post_data.get('parent_post_id'), post_data.get('thread_relation'),
+        post_data.get('thread_depth')
+    )
+
+# --- Conversation thread capture (see thread_capture.py) ---
+X_THREAD_SEARCH_FIELDS = (
+    "tweet.fields=created_at,author_id,conversation_id,text,entities,attachments,public_metrics,referenced_tweets"
+    "&expansions=author_id,attachments.media_keys"
+    "&user.fields=username"
+    "&media.fields=media_key,type,url,preview_image_url,variants"
+)
+# Thread media is not OCR'd inline (it would hold the request for every image); it still requires confirmation
+THREAD_VISUAL_NOT_PROCESSED = {"text": "", "found": False, "status": "not_processed"}
+
+def search_conversation_page(conversation_id, next_token=None):
+    """One page (up to 100 posts) of a conversation from recent search; returns (status_code, body)."""
+    url = (
+        f"https://api.x.com/2/tweets/search/recent?"
+        f"query={requests.utils.quote(f'conversation_id:{conversation_id}')}"
+        f"&max_results=100&{X_THREAD_SEARCH_FIELDS}"
+    )
+    if next_token:
+        url += f"&next_token={requests.utils.quote(next_token)}"
+    response = x_api_get(url)
+    if response.status_code != 200:
+        logger.error(f"Conversation search failed for {conversation_id}: {response.status_code} - {response.text}")
+        return response.status_code, {}
+    return 200, response.json()
+
+def lookup_thread_posts(post_ids):
+    results, api_calls = lookup_tweets(post_ids)
+    return {post_id: payload for post_id, payload, _, _ in results if payload is not None}, api_calls
+
+thread_capture = ThreadCapture(search_page=search_conversation_page, lookup=lookup_thread_posts)
+
+def capture_thread(current_user, post):
+    """
+    Capture the conversation around post: skips posts this user has already fetched and classifies
+    the rest in batches. Returns (post_data for each new thread post, capture summary).
+    """
+    capture = thread_capture.capture(post['conversation_id'], anchor_id=post['id'], anchor_parent_id=post.get('parent_post_id'))
+    post_ids = [captured['payload']['data']['id'] for captured in capture['posts']]
+
+    already_fetched = set()
+    if post_ids:
+        conn = get_connection()
+        for start in range(0, len(post_ids), 500):
+            chunk = post_ids[start:start + 500]
+            # "+user_id" keeps the planner on the post_id index rather than scanning all of the user's rows
+            rows = conn.execute(
+                f"SELECT post_id FROM fetched_evidence WHERE post_id IN ({','.join('?' * len(chunk))}) AND +user_id = ?",
+                (*chunk, current_user)
+            ).fetchall()
+            already_fetched.update(row[0] for row in rows)
+        conn.close()
+
+    thread_posts = []
+    for captured in capture['posts']:
+        thread_post = parse_tweet(captured['payload'])
+        if thread_post['id'] in already_fetched:
+            continue
+        thread_post.update(parent_post_id=captured['parent_post_id'], thread_relation=captured['relation'],
+                           thread_depth=captured['depth'])
+        thread_posts.append(thread_post)
+
+    text_posts = [thread_post for thread_post in thread_posts if not thread_post['media_urls']]
+    verdicts = {}
+    for start in range(0, len(text_posts), BULK_ANALYSIS_MAX_ITEMS):
+        batch = text_posts[start:start + BULK_ANALYSIS_MAX_ITEMS]
+        for thread_post, verdict in zip(batch, predict_defamatory_batch([p['text'] for p in batch])):
+            verdicts[thread_post['id']] = verdict
+
+    thread_data = []
+    for thread_post in thread_posts:
+        post_data = build_post_data(thread_post, THREAD_VISUAL_NOT_PROCESSED,
+                                    verdicts.get(thread_post['id']) or pending_media_verdict())
+        post_data.update(thread_relation=thread_post['thread_relation'], thread_depth=thread_post['thread_depth'])
+        thread_data.append(post_data)
+
+    summary = {
+        "conversation_id": post['conversation_id'],
+        "captured": len(thread_data),
+        "already_captured": len(already_fetched),
+        "anchor_depth": capture['anchor_depth'],
+        "x_api_calls": capture['x_api_calls'],
+        "truncated": capture['truncated']
+    }
+    return thread_data, summary
+
 @app.route('/fetch-x-post', methods=['POST'])
 @token_required
 @limiter.limit("20 per hour")
@@ -1595,110 +2053,248 @@ def fetch_x_post(current_user):
         post_id = data.get('post_id')
         if not post_id:
             return jsonify({"error": "Post ID required"}), 400
+        post_id = str(post_id)
+        # Legal can demand a current snapshot instead of the shared cached copy
+        force_refresh = bool(data.get('force_refresh', False))
 
-        # Request full context + entities + media
-        url = (
-            f"https://api.x.com/2/tweets/{post_id}?"
-            f"expansions=author_id,attachments.media_keys,in_reply_to_user_id,referenced_tweets.id"
-            f"&tweet.fields=created_at,conversation_id,text,entities,attachments,public_metrics"
-            f"&user.fields=username"
-            f"&media.fields=media_key,type,url,preview_image_url,variants"
-        )
-        response = requests.get(url, headers=headers)
-        if response.status_code != 200:
+        try:
+            response_data, cache_status, response = lookup_tweet(post_id, force_refresh)
+        except XRateLimited as e:
+            log_audit(current_user, "fetch_x_post_failed", f"Post ID: {post_id}, Error: {str(e)}")
+            return x_rate_limited_response(e)
+        if response_data is None:
             return jsonify({"error": f"Failed to fetch post: {response.text}"}), response.status_code
 
-        response_data = response.json()
-        tweet_data = response_data.get('data', {})
-        tweet_text = tweet_data.get('text', '')
-
-        # Get full thread if this is part of a conversation
-        if 'conversation_id' in tweet_data and tweet_data['conversation_id'] != post_id:
-            # Optional: fetch full thread (advanced, add if needed)
-            pass
+        post = parse_tweet(response_data)
+        post['id'] = post['id'] or post_id
 
-        entities = tweet_data.get('entities', {})
-        urls = entities.get('urls', []) or []
-        created_at = tweet_data.get('created_at', '')
-        author_id = tweet_data.get('author_id', '')
-        expanded_text = expand_urls(tweet_text, urls)
-
-        users = response_data.get('includes', {}).get('users', [])
-        author_username = next((user['username'] for user in users if user['id'] == author_id), '')
-
-        media_urls = []
-        media = response_data.get('includes', {}).get('media', [])
-        for media_item in media:
-            if media_item.get('type') == 'photo' and media_item.get('url'):
-                media_urls.append(media_item['url'])
-            elif media_item.get('type') == 'video' and media_item.get('variants'):
-                # Get highest bitrate video URL
-                variants = media_item['variants']
-                max_bitrate = max(variants, key=lambda v: v.get('bit_rate', 0))
-                media_urls.append(max_bitrate['url'])
+        # Capture the full thread (replies, root, quote chains) if this is part of a conversation
+        thread_data, thread_summary = [], None
+        in_conversation = post['conversation_id'] and (
+            post['conversation_id'] != post['id'] or post['metrics'].get('reply_count', 0) > 0)
+        if in_conversation and bool(data.get('capture_thread', X_THREAD_CAPTURE_DEFAULT)):
+            try:
+                thread_data, thread_summary = capture_thread(current_user, post)
+            except Exception as e:
+                logger.error(f"Thread capture failed for post {post_id}: {e}")
+                thread_summary = {"conversation_id": post['conversation_id'], "error": str(e)}
 
         # --- OCR Visual Analysis ---
-        visual_data = process_visual_content(media_urls)
-        visual_text = visual_data["text"]
-        
-        # We ALWAYS require confirmation if there are images, even if no text was found
-        # This allows the user to see that the system "checked" the image.
-        requires_confirmation = len(media_urls) > 0
-        
-        defamation_result = {"is_defamatory": False, "category": "Pending", "confidence": 0.0, "justification": "Awaiting human verification of media."}
-        if not requires_confirmation:
-            defamation_result = predict_defamatory(expanded_text)
-        
-        logger.info(f"Defamation scan for post {post_id}: {defamation_result}")
-
-        metrics = tweet_data.get('public_metrics', {})
-        logger.info(f"Raw X metrics for {post_id}: {metrics}")
-        post_data = {
-            "id": post_id,
-            "text": expanded_text,
-            "visual_text": visual_text,
-            "visual_status": visual_data["status"],
-            "requires_confirmation": requires_confirmation,
-            "author_username": author_username,
-            "created_at": created_at,
-            "author_id": author_id,
-            "media_urls": media_urls,
-            "engagement": {
-                "retweets": metrics.get('retweet_count', 0),
-                "replies": metrics.get('reply_count', 0),
-                "likes": metrics.get('like_count', 0),
-                "quotes": metrics.get('quote_count', 0),
-                "views": metrics.get('impression_count', 0)
-            },
-            "defamation": defamation_result
-        }
-
-        # Encrypt sensitive fields for DB storage
-        enc_content = encrypt_field(expanded_text)
-        enc_author = encrypt_field(author_username)
-        enc_media = encrypt_field(json.dumps(media_urls))
-        # Embed engagement metrics into content metadata string for full compliance storage
-        engagement_json = json.dumps(post_data['engagement'])
-        enc_engagement = encrypt_field(engagement_json)
+        visual_data = process_visual_content(post['media_urls'])
 
-        # Store fetch in DB (encrypted)
-        conn = sqlite3.connect('forensic.db')
+        defamation_result = pending_media_verdict() if post['media_urls'] else predict_defamatory(post['text'])
+        logger.info(f"Defamation scan for post {post_id}: {defamation_result}")
+        logger.info(f"Raw X metrics for {post_id}: {post['metrics']}")
+
+        post_data = build_post_data(post, visual_data, defamation_result)
+        post_data["x_cache"] = cache_status
+        if post['conversation_id']:
+            # Place the fetched post in its thread too, so GET /x-thread doesn't list it last
+            is_root = post['conversation_id'] == post['id']
+            post_data.update(thread_relation='root' if is_root else 'reply',
+                             thread_depth=0 if is_root else (thread_summary or {}).get('anchor_depth'))
+
+        # Store fetch in DB (encrypted), with any captured thread posts in the same transaction
+        fetched_at = datetime.now().isoformat()
+        conn = get_connection()
         c = conn.cursor()
-        c.execute(
-            'INSERT INTO fetched_evidence (user_id, post_id, content, author_username, created_at, media_urls, timestamp, verified, engagement, is_defamatory, category, confidence) '
-            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
-            (current_user, post_id, enc_content, enc_author, created_at, enc_media, datetime.now().isoformat(), None, enc_engagement, 1 if defamation_result.get('is_defamatory') else 0, defamation_result.get('category', 'Safe'), defamation_result.get('confidence', 0.0))
-        )
+        c.execute(FETCHED_EVIDENCE_INSERT, fetched_evidence_row(current_user, post_data, fetched_at))
+        analytics.record_scan(conn, current_user, fetched_at, defamation_result.get('category', 'Safe'), defamation_result.get('is_defamatory'))
+        if thread_data:
+            c.executemany(FETCHED_EVIDENCE_INSERT, [fetched_evidence_row(current_user, thread_post, fetched_at) for thread_post in thread_data])
+            for thread_post in thread_data:
+                analytics.record_scan(conn, current_user, fetched_at, thread_post['defamation'].get('category', 'Safe'),
+                                      thread_post['defamation'].get('is_defamatory'))
         conn.commit()
         conn.close()
 
-        log_audit(current_user, "fetch_x_post", f"Post ID: {post_id}")
+        if thread_summary is not None:
+            post_data["thread"] = dict(thread_summary, posts=[{
+                "id": thread_post['id'],
+                "text": thread_post['text'],
+                "author_username": thread_post['author_username'],
+                "created_at": thread_post['created_at'],
+                "relation": thread_post['thread_relation'],
+                "parent_post_id": thread_post['parent_post_id'],
+                "depth": thread_post['thread_depth'],
+                "requires_confirmation": thread_post['requires_confirmation'],
+                "defamation": thread_post['defamation']
+            } for thread_post in thread_data])
+
+        thread_note = f", Thread: {thread_summary.get('captured', 0)} posts captured" if thread_summary else ""
+        log_audit(current_user, "fetch_x_post", f"Post ID: {post_id}, X cache: {cache_status}{thread_note}")
         return jsonify(post_data), 200
     except Exception as e:
         logger.error(f"Error in fetch_x_post: {str(e)}")
         log_audit(current_user, "fetch_x_post_failed", f"Post ID: {post_id}, Error: {str(e)}")
         return jsonify({"error": f"Failed to fetch post. Check X API status: {str(e)}"}), 500
 
+@app.route('/x-thread/<conversation_id>', methods=['GET'])
+@token_required
+def get_x_thread(current_user, conversation_id):
+    """Evidence rows this user has captured for a conversation, root first, then by depth and time."""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute(
+        'SELECT post_id, content, author_username, created_at, timestamp, verified, category, confidence, '
+        'parent_post_id, thread_relation, thread_depth FROM fetched_evidence WHERE user_id = ? AND conversation_id = ? '
+        'ORDER BY thread_depth IS NULL, thread_depth, created_at',
+        (current_user, conversation_id)
+    )
+    rows = c.fetchall()
+    conn.close()
+
+    posts = []
+    for r in rows:
+        try:
+            content = decrypt_field(r[1])
+            author = decrypt_field(r[2])
+        except Exception:
+            content = ''
+            author = ''
+        posts.append({
+            'post_id': r[0],
+            'content': content,
+            'author_username': author,
+            'created_at': r[3],
+            'timestamp': r[4],
+            'verified': r[5],
+            'category': r[6] if r[6] else 'Pending',
+            'confidence': r[7] if r[7] else 0.0,
+            'parent_post_id': r[8],
+            'relation': r[9],
+            'depth': r[10]
+        })
+    return jsonify({"conversation_id": conversation_id, "posts": posts}), 200
+
+@app.route('/fetch-x-posts-bulk', methods=['POST'])
+@token_required
+@limiter.limit("10 per hour")
+def fetch_x_posts_bulk(current_user):
+    """
+    Fetch, analyze and store many posts at once: {"post_ids": [...], "force_refresh": false}.
+    Streams newline-delimited JSON: one object per post as it completes, then a summary line
+    ({"done": true, ...}). Rows are committed every BULK_FETCH_COMMIT_EVERY posts, and whatever
+    completed is stored and audited even if the client disconnects or the stream fails. Posts not
+    finished within BULK_FETCH_DEADLINE_SECONDS are reported with an error instead of holding the worker.
+    """
+    data = request.get_json(silent=True) or {}
+    raw_ids = data.get('post_ids')
+    if not isinstance(raw_ids, list) or not raw_ids:
+        return jsonify({"error": "Provide a non-empty 'post_ids' list"}), 400
+    post_ids = list(dict.fromkeys(str(post_id).strip() for post_id in raw_ids))
+    if len(post_ids) > BULK_FETCH_MAX_POSTS:
+        return jsonify({"error": f"At most {BULK_FETCH_MAX_POSTS} post IDs per request"}), 400
+    invalid = [post_id for post_id in post_ids if not post_id.isdigit()]
+    if invalid:
+        return jsonify({"error": "Post IDs must be numeric", "invalid": invalid[:10]}), 400
+    force_refresh = bool(data.get('force_refresh', False))
+
+    def generate():
+        started = time.perf_counter()
+        deadline = started + BULK_FETCH_DEADLINE_SECONDS
+        pending = []
+        counts = {"stored": 0, "failed": 0, "timed_out": 0, "x_api_calls": 0}
+        errors = []
+
+        def flush():
+            if not pending:
+                return
+            batch = pending[:]
+            del pending[:]
+            fetched_at = datetime.now().isoformat()
+            conn = get_connection()
+            try:
+                conn.executemany(FETCHED_EVIDENCE_INSERT,
+                                 [fetched_evidence_row(current_user, post_data, fetched_at) for post_data in batch])
+                for post_data in batch:
+                    analytics.record_scan(conn, current_user, fetched_at, post_data['defamation'].get('category', 'Safe'),
+                                          post_data['defamation'].get('is_defamatory'))
+                conn.commit()
+                counts["stored"] += len(batch)
+            except Exception as e:
+                conn.rollback()
+                errors.append(f"Failed to store {len(batch)} fetched posts: {e}")
+                logger.error(errors[-1])
+            finally:
+                conn.close()
+
+        def completed(post_data):
+            pending.append(post_data)
+            if len(pending) >= BULK_FETCH_COMMIT_EVERY:
+                flush()
+            return json.dumps(post_data) + "\n"
+
+        def timed_out(post):
+            counts["timed_out"] += 1
+            return json.dumps({"id": post['id'], "error": f"Not processed within {BULK_FETCH_DEADLINE_SECONDS:g}s; "
+                               "fetch it again"}) + "\n"
+
+        try:
+            lookups, counts["x_api_calls"] = lookup_tweets(post_ids, force_refresh)
+
+            posts = []
+            for post_id, payload, cache_status, error in lookups:
+                if payload is None:
+                    counts["failed"] += 1
+                    yield json.dumps({"id": post_id, "error": error, "x_cache": cache_status}) + "\n"
+                    continue
+                post = parse_tweet(payload)
+                post['id'] = post['id'] or post_id
+                posts.append((post, cache_status))
+
+            # Text-only posts: one batched classification pass
+            text_posts = [(post, status) for post, status in posts if not post['media_urls']]
+            verdicts = predict_defamatory_batch([post['text'] for post, _ in text_posts])
+            for (post, cache_status), verdict in zip(text_posts, verdicts):
+                post_data = build_post_data(post, process_visual_content([]), verdict)
+                post_data["x_cache"] = cache_status
+                yield completed(post_data)
+            flush()
+
+            # Posts with media: OCR in parallel, streamed as each finishes, until the deadline
+            media_posts = [(post, status) for post, status in posts if post['media_urls']]
+            if media_posts:
+                pool = ThreadPoolExecutor(max_workers=BULK_OCR_CONCURRENCY)
+                futures = {pool.submit(process_visual_content, post['media_urls']): (post, status)
+                           for post, status in media_posts}
+                try:
+                    for future in as_completed(futures, timeout=max(0.0, deadline - time.perf_counter())):
+                        post, cache_status = futures.pop(future)
+                        try:
+                            visual_data = future.result()
+                        except Exception as e:
+                            logger.error(f"Bulk OCR failed for post {post['id']}: {e}")
+                            visual_data = {"text": "", "found": False, "status": "ocr_failed"}
+                        post_data = build_post_data(post, visual_data, pending_media_verdict())
+                        post_data["x_cache"] = cache_status
+                        yield completed(post_data)
+                except TimeoutError:
+                    logger.warning(f"Bulk fetch deadline reached with {len(futures)} media posts unprocessed")
+                    for post, _ in list(futures.values()):
+                        yield timed_out(post)
+                finally:
+                    # Don't hold the worker for OCR nobody will receive
+                    pool.shutdown(wait=False, cancel_futures=True)
+        except Exception as e:
+            errors.append(f"Bulk fetch failed: {e}")
+            logger.error(errors[-1])
+        finally:
+            # Runs on client disconnect (GeneratorExit) too: keep what was completed
+            flush()
+            log_audit(current_user, "fetch_x_posts_bulk",
+                      f"Requested: {len(post_ids)}, Stored: {counts['stored']}, Failed: {counts['failed']}, "
+                      f"Timed out: {counts['timed_out']}, X API calls: {counts['x_api_calls']}"
+                      + (f", Error: {errors[0]}" if errors else ""))
+
+        summary = {"done": True, "requested": len(post_ids), **counts,
+                   "elapsed_ms": round((time.perf_counter() - started) * 1000, 1)}
+        if errors:
+            summary["error"] = "; ".join(errors)
+        yield json.dumps(summary) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @app.route('/analyze-content', methods=['POST'])
 @token_required
 def analyze_content(current_user):
@@ -1710,13 +2306,16 @@ def analyze_content(current_user):
         if not tweet_text and not visual_text:
             return jsonify({"error": "No content provided for analysis"}), 400
         
+        # One lexicon snapshot for the verdict and the attribution, so both use the recorded lexicon_version
+        lexicon = lexicon_store.current()
+
         # Combined analysis for the primary flag
         full_content = (tweet_text + "\n" + visual_text).strip()
-        result = predict_defamatory(full_content)
+        result = predict_defamatory(full_content, lexicon=lexicon)
         
-        # Attribution Logic: check where markers were found
-        tweet_markers = extract_forensic_markers(tweet_text)
-        visual_markers = extract_forensic_markers(visual_text)
+        # Attribution Logic: check where markers were found (lexicon terms only)
+        tweet_markers = lexicon.matcher.match(tweet_text)
+        visual_markers = lexicon.matcher.match(visual_text)
         
         source = "Combined"
         if result['is_defamatory']:
@@ -1737,7 +2336,7 @@ def analyze_content(current_user):
         
         # Update the is_defamatory flag in the database after human verification
         try:
-            conn = sqlite3.connect('forensic.db')
+            conn = get_connection()
             c = conn.cursor()
             # Find the most recent fetch for this user/content to update the flag
             # Note: In a more robust system, we'd pass the DB internal ID here
@@ -1757,6 +2356,36 @@ def analyze_content(current_user):
         logger.error(f"Analysis error: {e}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/analyze-content-bulk', methods=['POST'])
+@token_required
+@limiter.limit("10 per minute")
+def analyze_content_bulk(current_user):
+    try:
+        data = request.get_json() or {}
+        texts = data.get('texts')
+        if not isinstance(texts, list) or not texts:
+            return jsonify({"error": "Provide a non-empty 'texts' list"}), 400
+        if len(texts) > BULK_ANALYSIS_MAX_ITEMS:
+            return jsonify({"error": f"At most {BULK_ANALYSIS_MAX_ITEMS} texts per request"}), 400
+        if not all(isinstance(t, str) for t in texts):
+            return jsonify({"error": "Every item in 'texts' must be a string"}), 400
+
+        started = time.perf_counter()
+        results = predict_defamatory_batch([t.strip() for t in texts])
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+
+        flagged = sum(1 for r in results if r.get('is_defamatory'))
+        log_audit(current_user, "analyze_content_bulk", f"Items: {len(texts)}, Flagged: {flagged}")
+        return jsonify({
+            "results": [dict(r, index=i) for i, r in enumerate(results)],
+            "count": len(results),
+            "flagged": flagged,
+            "elapsed_ms": elapsed_ms
+        }), 200
+    except Exception as e:
+        logger.error(f"Bulk analysis error: {e}")
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/store-evidence', methods=['POST'])
 @token_required
 @limiter.limit("20 per hour")
@@ -1804,16 +2433,17 @@ def store_evidence_endpoint(current_user):
         eth_tx_hash = result['eth_tx_hash']
         evidence_id = result['evidence_id']
 
-        conn = sqlite3.connect('forensic.db')
+        stored_at = datetime.now().isoformat()
+        conn = get_connection()
         c = conn.cursor()
         c.execute(
             'INSERT INTO stored_evidence (user_id, evidence_id, tx_hash, eth_tx_hash, post_id, timestamp) VALUES (?, ?, ?, ?, ?, ?)',
-            (current_user, str(evidence_id), tx_hash, eth_tx_hash, evidence_data.get("id"), datetime.now().isoformat())
+            (current_user, str(evidence_id), tx_hash, eth_tx_hash, evidence_data.get("id"), stored_at)
         )
+        analytics.record_secured(conn, current_user, stored_at, evidence_data.get("id"))
         conn.commit()
         conn.close()
 
-        log_audit(current_user, "store_evidence_success", f"ID: {evidence_id}, TX: {tx_hash}")
         log_audit(current_user, "store_evidence_success", f"ID: {evidence_id}, TX: {tx_hash}")
         etherscan_url = f"https://sepolia.etherscan.io/tx/{eth_tx_hash}"
         return jsonify({
@@ -1848,7 +2478,7 @@ def get_evidence_endpoint(current_user):
             # Fallback: check if the local DB has this evidence linked to this user
             # Useful for evidence stored before the investigator ID fix (e.g. legacy ID "2")
             try:
-                conn = sqlite3.connect('forensic.db')
+                conn = get_connection()
                 c = conn.cursor()
                 c.execute('SELECT user_id FROM stored_evidence WHERE evidence_id = ? LIMIT 1', (str(evidence_id),))
                 row = c.fetchone()
@@ -1874,7 +2504,7 @@ def get_evidence_endpoint(current_user):
         verification_status = "skipped"
         engagement_data = {}
 
-        conn = sqlite3.connect('forensic.db')
+        conn = get_connection()
         c = conn.cursor()
         
         # 1. Find the local post_id linked to this evidence_id
@@ -1897,9 +2527,11 @@ def get_evidence_endpoint(current_user):
             if calculated_hash == on_chain_hash:
                 is_verified = True
                 verification_status = "verified"
+                analytics.record_verification(conn, post_id, 1)
                 c.execute('UPDATE fetched_evidence SET verified = 1 WHERE post_id = ?', (post_id,))
             else:
                 verification_status = "tampered"
+                analytics.record_verification(conn, post_id, 0)
                 c.execute('UPDATE fetched_evidence SET verified = 0 WHERE post_id = ?', (post_id,))
 
         c.execute(
@@ -1958,7 +2590,7 @@ def retrieve_evidence(current_user):
         # This allows users to search by the transaction hash they see in their wallet
         lookup_hash = normalized_tx_hash
         try:
-            conn = sqlite3.connect('forensic.db')
+            conn = get_connection()
             c = conn.cursor()
             c.execute('SELECT tx_hash FROM stored_evidence WHERE eth_tx_hash = ? LIMIT 1', (normalized_tx_hash,))
             row = c.fetchone()
@@ -1981,7 +2613,7 @@ def retrieve_evidence(current_user):
         else:
             # Fallback: check against local DB using the evidence hash
             try:
-                conn = sqlite3.connect('forensic.db')
+                conn = get_connection()
                 c = conn.cursor()
                 # On-chain 'hash' is stored in localDB 'tx_hash' column
                 c.execute('SELECT user_id FROM stored_evidence WHERE tx_hash = ? LIMIT 1', (on_chain_hash,))
@@ -2009,7 +2641,7 @@ def retrieve_evidence(current_user):
         verification_status = "skipped"
         engagement_data = {}
 
-        conn = sqlite3.connect('forensic.db')
+        conn = get_connection()
         c = conn.cursor()
         # 1. Find the local post_id linked to this on_chain_hash
         c.execute('SELECT post_id FROM stored_evidence WHERE tx_hash = ? LIMIT 1', (on_chain_hash,))
@@ -2031,9 +2663,11 @@ def retrieve_evidence(current_user):
             if calculated_hash == on_chain_hash:
                 is_verified = True
                 verification_status = "verified"
+                analytics.record_verification(conn, post_id, 1)
                 c.execute('UPDATE fetched_evidence SET verified = 1 WHERE post_id = ?', (post_id,))
             else:
                 verification_status = "tampered"
+                analytics.record_verification(conn, post_id, 0)
                 c.execute('UPDATE fetched_evidence SET verified = 0 WHERE post_id = ?', (post_id,))
 
         c.execute(
@@ -2084,7 +2718,7 @@ def get_tx_hash(current_user):
         if evidence_id is None or not str(evidence_id).isdigit():
             return jsonify({"error": "Valid evidence ID is required"}), 400
 
-        conn = sqlite3.connect('forensic.db')
+        conn = get_connection()
         c = conn.cursor()
         c.execute(
             'SELECT tx_hash, eth_tx_hash FROM stored_evidence WHERE evidence_id = ? AND user_id = ?',
@@ -2117,7 +2751,7 @@ def report(current_user, user_id):
     category = request.args.get('category', 'all')
     action_type = request.args.get('action_type', 'all')
 
-    conn = sqlite3.connect('forensic.db')
+    conn = get_connection()
     c = conn.cursor()
     c.execute('SELECT username FROM users WHERE id = ?', (user_id,))
     username = c.fetchone()[0]
@@ -2234,96 +2868,12 @@ def report_stats(current_user, user_id):
     if str(current_user) != str(user_id):
         return jsonify({'error': f'Unauthorized access (ID mismatch: {current_user} != {user_id})'}), 403
 
-    conn = sqlite3.connect('forensic.db')
-    c = conn.cursor()
-
-    now = datetime.now()
-    month_ago = now - timedelta(days=30)
-    week_ago = now - timedelta(days=7)
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    yesterday_start = today_start - timedelta(days=1)
-    yesterday_end = today_start - timedelta(seconds=1)
-
-    def get_detailed_stats(start, end=None):
-        # Use current_user (int) to ensure reliable matching
-        uid = int(current_user)
-        params = [uid, start.isoformat()]
-        time_filter = "AND timestamp >= ?"
-        if end:
-            params.append(end.isoformat())
-            time_filter = "AND timestamp >= ? AND timestamp < ?"
-        
-        # Scanned Count
-        c.execute(f'SELECT COUNT(*) FROM fetched_evidence WHERE user_id = ? {time_filter}', params)
-        scanned = c.fetchone()[0]
-        
-        # Secured Count
-        c.execute(f'SELECT COUNT(*) FROM stored_evidence WHERE user_id = ? {time_filter}', params)
-        secured = c.fetchone()[0]
-        
-        # Threats Count
-        c.execute(f'SELECT COUNT(*) FROM fetched_evidence WHERE user_id = ? AND is_defamatory = 1 {time_filter}', params)
-        threats = c.fetchone()[0]
-
-        # Graph Data: Total Fetches for the period
-        # Since requests_log might be empty, we use fetched_evidence records as activity proxy
-        c.execute(f'SELECT COUNT(*) FROM fetched_evidence WHERE user_id = ? {time_filter}', params)
-        fetches = c.fetchone()[0]
-        
-        # Graph Data: Total Secured for the period (as retrievals proxy)
-        c.execute(f'SELECT COUNT(*) FROM stored_evidence WHERE user_id = ? {time_filter}', params)
-        retrievals = c.fetchone()[0]
-
-        # AI Category Breakdown
-        c.execute(f'SELECT count(*) FROM fetched_evidence WHERE user_id = ? AND category = "Safe" {time_filter}', params)
-        safe = c.fetchone()[0]
-        c.execute(f'SELECT count(*) FROM fetched_evidence WHERE user_id = ? AND category = "Defamatory" {time_filter}', params)
-        defamatory = c.fetchone()[0]
-        c.execute(f'SELECT count(*) FROM fetched_evidence WHERE user_id = ? AND category = "Hate Speech" {time_filter}', params)
-        hate_speech = c.fetchone()[0]
-
-        return {
-            'scanned': scanned, 
-            'secured': secured, 
-            'threats': threats,
-            'fetches': fetches,
-            'retrievals': retrievals,
-            'categories': {
-                'safe': safe,
-                'defamatory': defamatory,
-                'hate_speech': hate_speech
-            }
-        }
-
-    monthly = get_detailed_stats(month_ago)
-    weekly = get_detailed_stats(week_ago)
-    yesterday = get_detailed_stats(yesterday_start, yesterday_end)
-    today = get_detailed_stats(today_start)
-
-    # 7-day daily breakdown for trend line chart
-    trend = []
-    for i in range(7):
-        day_start = today_start - timedelta(days=i)
-        day_end = day_start + timedelta(days=1) - timedelta(seconds=1)
-        stats = get_detailed_stats(day_start, day_end)
-        trend.append({
-            'date': day_start.strftime('%b %d'), # "Mar 24" format
-            'fetches': stats['fetches'],
-            'retrievals': stats['retrievals']
-        })
-    trend.reverse() # Oldest to newest (left to right on chart)
-
+    conn = get_connection()
+    # One GROUP BY pass per table; monthly/weekly/daily/trend are derived from day buckets
+    stats = analytics.dashboard_stats(conn, current_user, datetime.now())
     conn.close()
 
-    return jsonify({
-        'monthly': monthly,
-        'weekly': weekly,
-        'daily': {
-            'yesterday': yesterday,
-            'today': today
-        },
-        'trend': trend
-    })
+    return jsonify(stats)
 
 @app.route('/generate-report/<user_id>', methods=['POST'])
 @token_required
@@ -2347,7 +2897,7 @@ def generate_report(current_user, user_id):
     category = filters.get('category', 'all')
     action_type = filters.get('action_type', 'all')
 
-    conn = sqlite3.connect('forensic.db')
+    conn = get_connection()
     c = conn.cursor()
     c.execute('SELECT username FROM users WHERE id = ?', (user_id,))
     username = c.fetchone()[0]
@@ -2738,7 +3288,7 @@ def send_owner_email(subject, html_content):
     }
     
     try:
-        response = requests.post(url, headers=headers, json=payload, timeout=10)
+        response = http_client.post(url, headers=headers, json=payload, timeout=(3.05, 10))
         if response.status_code in [201, 202, 200]:
             logger.info(f"Owner notification email sent successfully: {subject}")
             return True
@@ -2775,7 +3325,7 @@ def chatbot_message():
     # Store the conversation
     try:
         timestamp = datetime.now().isoformat()
-        conn = sqlite3.connect('forensic.db')
+        conn = get_connection()
         c = conn.cursor()
         c.execute('INSERT INTO chatbot_conversations (session_id, role, message, page_context, timestamp) VALUES (?, ?, ?, ?, ?)',
                   (session_id, 'user', message, page_context, timestamp))
@@ -2813,7 +3363,7 @@ def chatbot_schedule():
     
     try:
         timestamp = datetime.now().isoformat()
-        conn = sqlite3.connect('forensic.db')
+        conn = get_connection()
         c = conn.cursor()
         c.execute(
             'INSERT INTO expert_appointments (name, email, phone, topic, preferred_date, preferred_time, message, status, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
@@ -2824,7 +3374,7 @@ def chatbot_schedule():
         
         # Log in chatbot conversation
         if session_id:
-            conn = sqlite3.connect('forensic.db')
+            conn = get_connection()
             c = conn.cursor()
             c.execute('INSERT INTO chatbot_conversations (session_id, role, message, timestamp) VALUES (?, ?, ?, ?)',
                       (session_id, 'system', f'Appointment scheduled: {name}, {email}, {topic}', timestamp))
@@ -2868,7 +3418,7 @@ def chatbot_escalate():
     
     try:
         timestamp = datetime.now().isoformat()
-        conn = sqlite3.connect('forensic.db')
+        conn = get_connection()
         c = conn.cursor()
         
         # Mark all messages in this session as escalated
@@ -2921,7 +3471,7 @@ def logout():
     return response
 
 @app.route('/admin/change-password-force', methods=['POST'])
-@token_required
+@admin_required
 def change_password_force(current_user):
     try:
         data = request.get_json()
@@ -2934,20 +3484,16 @@ def change_password_force(current_user):
         if validation_error:
             return jsonify({'error': validation_error}), 400
             
-        conn = sqlite3.connect('forensic.db')
+        conn = get_connection()
         c = conn.cursor()
-        c.execute('SELECT is_admin, force_password_change, password_history FROM users WHERE id = ?', (current_user,))
+        c.execute('SELECT force_password_change, password_history FROM users WHERE id = ?', (current_user,))
         row = c.fetchone()
         
         if not row:
             conn.close()
             return jsonify({'error': 'User not found'}), 404
             
-        is_admin_user, force_change, password_history = row[0], row[1], row[2]
-        
-        if not is_admin_user:
-            conn.close()
-            return jsonify({'error': 'Unauthorized. Admin account required.'}), 403
+        force_change, password_history = row[0], row[1]
             
         if force_change != 1:
             conn.close()
@@ -3008,6 +3554,7 @@ def change_password_force(current_user):
         
         conn.commit()
         conn.close()
+        invalidate_user(current_user)
         
         log_audit(current_user, "admin_force_password_change", "Generated recovery key and updated password")
         
@@ -3021,7 +3568,7 @@ def change_password_force(current_user):
 
 # Create default admin user if not exists
 def create_admin_user():
-    conn = sqlite3.connect('forensic.db')
+    conn = get_connection()
     c = conn.cursor()
     
     # Check if admin user already exists
@@ -3061,25 +3608,15 @@ def create_admin_user():
         return True
 
 @app.route('/admin/stats', methods=['GET'])
-@token_required
+@admin_required
 def admin_report_stats(current_user):
-    # Check if admin
-    conn = sqlite3.connect('forensic.db')
-    c = conn.cursor()
-    c.execute('SELECT is_admin FROM users WHERE id = ?', (current_user,))
-    is_admin = c.fetchone()[0]
-    conn.close()
-    if not is_admin:
-        return jsonify({'error': 'Unauthorized'}), 403
-
-    conn = sqlite3.connect('forensic.db')
+    conn = get_connection()
     c = conn.cursor()
     c.execute('SELECT COUNT(*) FROM users')
     total_users = c.fetchone()[0]
-    c.execute('SELECT COUNT(*) FROM fetched_evidence')
-    total_scans = c.fetchone()[0]
-    c.execute('SELECT COUNT(*) FROM stored_evidence')
-    total_secured = c.fetchone()[0]
+    evidence_totals = analytics.totals(conn)
+    total_scans = evidence_totals['scanned']
+    total_secured = evidence_totals['secured']
     c.execute('SELECT COUNT(*) FROM audit_logs')
     total_logs = c.fetchone()[0]
     conn.close()
@@ -3092,18 +3629,10 @@ def admin_report_stats(current_user):
     })
 
 @app.route('/admin/ai-stats', methods=['GET'])
-@token_required
+@admin_required
 def admin_ai_stats(current_user):
-    conn = sqlite3.connect('forensic.db')
-    c = conn.cursor()
-    # Check if admin
-    c.execute('SELECT is_admin FROM users WHERE id = ?', (current_user,))
-    if not c.fetchone()[0]:
-        conn.close()
-        return jsonify({'error': 'Unauthorized'}), 403
-    
-    c.execute('SELECT category, COUNT(*) FROM fetched_evidence GROUP BY category')
-    rows = c.fetchall()
+    conn = get_connection()
+    counts = analytics.category_counts(conn)
     conn.close()
     
     stats = {
@@ -3111,18 +3640,19 @@ def admin_ai_stats(current_user):
         'Defamatory': 0,
         'Hate Speech': 0
     }
-    for r in rows:
-        if r[0] in stats:
-            stats[r[0]] = r[1]
-        elif r[0] is None:
-            stats['Safe'] += r[1]
+    for category, count in counts.items():
+        if category in stats:
+            stats[category] += count
+        elif category == 'Pending':
+            # Unclassified rows were historically reported as Safe
+            stats['Safe'] += count
             
     return jsonify(stats)
 
 @app.route('/admin/users/pending', methods=['GET'])
-@token_required
+@admin_required
 def admin_pending_users(current_user):
-    conn = sqlite3.connect('forensic.db')
+    conn = get_connection()
     c = conn.cursor()
     c.execute("SELECT id, username, email, created_at FROM users WHERE account_status = 'pending'")
     rows = c.fetchall()
@@ -3134,9 +3664,9 @@ def admin_reg_status():
     return jsonify({'enabled': True})
 
 @app.route('/admin/users', methods=['GET'])
-@token_required
+@admin_required
 def admin_get_users(current_user):
-    conn = sqlite3.connect('forensic.db')
+    conn = get_connection()
     c = conn.cursor()
     c.execute('SELECT id, username, email, is_active, is_admin, account_status, failed_attempts, lockout_until, last_login, last_login_ip FROM users WHERE is_admin = 0')
     rows = c.fetchall()
@@ -3148,17 +3678,10 @@ def admin_get_users(current_user):
     ]})
 
 @app.route('/admin/unlock-user/<int:user_id>', methods=['POST'])
-@token_required
-def admin_unlock_user(current_user):
-    # Check if admin
-    conn = sqlite3.connect('forensic.db')
+@admin_required
+def admin_unlock_user(current_user, user_id):
+    conn = get_connection()
     c = conn.cursor()
-    c.execute('SELECT is_admin FROM users WHERE id = ?', (current_user,))
-    if not c.fetchone()[0]:
-        conn.close()
-        return jsonify({'error': 'Unauthorized'}), 403
-    
-    # Unlock the user
     c.execute('UPDATE users SET failed_attempts = 0, lockout_until = NULL WHERE id = ?', (user_id,))
     conn.commit()
     conn.close()
@@ -3166,15 +3689,10 @@ def admin_unlock_user(current_user):
     return jsonify({'message': 'User unlocked successfully'}), 200
 
 @app.route('/admin/security-stats', methods=['GET'])
-@token_required
+@admin_required
 def admin_security_stats(current_user):
-    # Check if admin
-    conn = sqlite3.connect('forensic.db')
+    conn = get_connection()
     c = conn.cursor()
-    c.execute('SELECT is_admin FROM users WHERE id = ?', (current_user,))
-    if not c.fetchone()[0]:
-        conn.close()
-        return jsonify({'error': 'Unauthorized'}), 403
     
     # Get security stats
     c.execute('SELECT COUNT(*) FROM users WHERE lockout_until IS NOT NULL')
@@ -3186,7 +3704,7 @@ def admin_security_stats(current_user):
     c.execute('SELECT username, failed_attempts, lockout_until FROM users WHERE failed_attempts >= 3')
     suspicious_users = c.fetchall()
     
-    c.execute('SELECT u.username, a.action, a.details, a.timestamp FROM audit_logs a JOIN users u ON a.user_id = u.id WHERE a.action LIKE "login_%" ORDER BY a.timestamp DESC LIMIT 20')
+    c.execute("SELECT u.username, a.action, a.details, a.timestamp FROM audit_logs a JOIN users u ON a.user_id = u.id WHERE a.action >= 'login_' AND a.action < 'login`' ORDER BY a.timestamp DESC LIMIT 20")
     recent_login_activity = c.fetchall()
     
     conn.close()
@@ -3198,10 +3716,73 @@ def admin_security_stats(current_user):
         'recent_activity': [{'username': r[0], 'action': r[1], 'details': r[2], 'timestamp': r[3]} for r in recent_login_activity]
     }), 200
 
+@app.route('/admin/audit/verify', methods=['POST'])
+@admin_required
+def admin_verify_audit_chain(current_user):
+    full = request.args.get('full', 'false').lower() == 'true'
+    # Make sure entries still queued in the writer are part of this check
+    audit_writer.flush()
+    conn = get_connection()
+    report = audit_verify.verify_chain(conn, full=full)
+    conn.close()
+    log_audit(current_user, "audit_chain_verified",
+              f"Mode: {report['mode']}, OK: {report['ok']}, Entries: {report['entries_verified']}")
+    return jsonify(report), 200 if report['ok'] else 409
+
+@app.route('/admin/x-api-metrics', methods=['GET'])
+@admin_required
+def admin_x_api_metrics(current_user):
+    return jsonify({'tweet_cache': tweet_cache.metrics()}), 200
+
+@app.route('/admin/x-api-quota', methods=['GET'])
+@admin_required
+def admin_x_api_quota(current_user):
+    """Remaining X API quota per endpoint (from x-rate-limit headers) and governor counters."""
+    return jsonify(x_rate_governor.quota()), 200
+
+@app.route('/admin/http-metrics', methods=['GET'])
+@admin_required
+def admin_http_metrics(current_user):
+    """Per-host outbound request counts, retries, status classes and latency percentiles."""
+    return jsonify(http_client.metrics()), 200
+
+@app.route('/admin/lexicon', methods=['GET'])
+@admin_required
+def admin_get_lexicon(current_user):
+    return jsonify({'active': lexicon_store.current().info(), 'history': lexicon_store.history()}), 200
+
+@app.route('/admin/lexicon/reload', methods=['POST'])
+@admin_required
+def admin_reload_lexicon(current_user):
+    """Publish a new lexicon version without restarting: JSON body {"lexicons": {...}},
+    {"version": N} to roll back, or no body to re-read the lexicon file."""
+    data = request.get_json(silent=True) or {}
+    previous = lexicon_store.current().label
+    try:
+        if data.get('version') is not None:
+            active = lexicon_store.activate(int(data['version']), user_id=current_user)
+        else:
+            active = lexicon_store.reload(data.get('lexicons'), user_id=current_user)
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    except (ValueError, OSError) as e:
+        return jsonify({'error': f'Invalid lexicon: {e}'}), 400
+    log_audit(current_user, "lexicon_reloaded", f"{previous} -> {active.label}")
+    return jsonify({'previous': previous, 'active': active.info()}), 200
+
+@app.route('/admin/inference-metrics', methods=['GET'])
+@admin_required
+def admin_inference_metrics(current_user):
+    return jsonify({
+        'scheduler': inference_scheduler.metrics(),
+        'cache': inference_cache.metrics(),
+        'ocr_cache': ocr_cache.metrics()
+    }), 200
+
 @app.route('/admin/activities', methods=['GET'])
-@token_required
+@admin_required
 def admin_get_activities(current_user):
-    conn = sqlite3.connect('forensic.db')
+    conn = get_connection()
     c = conn.cursor()
     c.execute('''
         SELECT a.id, u.username, a.action, a.details, a.timestamp 
@@ -3214,96 +3795,111 @@ def admin_get_activities(current_user):
     return jsonify({'activities': [{'id': r[0], 'username': r[1], 'action': r[2], 'details': r[3], 'timestamp': r[4]} for r in rows]})
 
 @app.route('/admin/report-stats', methods=['GET'])
-@token_required
+@admin_required
 def admin_report_stats_preview(current_user):
     user_id = request.args.get('user_id')
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
     category = request.args.get('category')
     action_type = request.args.get('action_type')
+    target_user = user_id if user_id and user_id != 'all' else None
+    if target_user and not target_user.isdigit():
+        return jsonify({"error": "user_id must be numeric or 'all'"}), 400
 
-    conn = sqlite3.connect('forensic.db')
+    conn = get_connection()
     c = conn.cursor()
     now = datetime.now()
 
-    base_query = 'SELECT COUNT(*) FROM fetched_evidence WHERE user_id IS NOT NULL'
-    base_params = []
-    if user_id and user_id != 'all':
-        base_query += ' AND user_id = ?'
-        base_params.append(user_id)
-    if start_date:
-        base_query += ' AND timestamp >= ?'
-        base_params.append(f"{start_date}T00:00:00")
-    if end_date:
-        base_query += ' AND timestamp <= ?'
-        base_params.append(f"{end_date}T23:59:59")
-    if category and category != 'all':
-        base_query += ' AND category = ?'
-        base_params.append(category)
-    if action_type == 'stored':
-        base_query += ' AND verified = 1'
-    elif action_type == 'fetched':
+    if action_type == 'fetched':
+        # "Fetched only" depends on per-row verification state that the rollups don't keep
+        base_query = 'SELECT COUNT(*) FROM fetched_evidence WHERE user_id IS NOT NULL'
+        base_params = []
+        if target_user:
+            base_query += ' AND user_id = ?'
+            base_params.append(target_user)
+        if start_date:
+            base_query += ' AND timestamp >= ?'
+            base_params.append(f"{start_date}T00:00:00")
+        if end_date:
+            base_query += ' AND timestamp <= ?'
+            base_params.append(f"{end_date}T23:59:59")
+        if category and category != 'all':
+            base_query += ' AND category = ?'
+            base_params.append(category)
         base_query += ' AND (verified = 2 OR verified = 0)'
 
-    params = list(base_params)
-    c.execute(base_query, params)
-    scanned = c.fetchone()[0]
+        c.execute(base_query, base_params)
+        scanned = c.fetchone()[0]
 
-    params = list(base_params)
-    secured_query = 'SELECT COUNT(*) FROM stored_evidence s LEFT JOIN fetched_evidence f ON s.post_id = f.post_id WHERE s.user_id IS NOT NULL'
-    secured_params = []
-    if user_id and user_id != 'all':
-        secured_query += ' AND s.user_id = ?'
-        secured_params.append(user_id)
-    if start_date:
-        secured_query += ' AND s.timestamp >= ?'
-        secured_params.append(f"{start_date}T00:00:00")
-    if end_date:
-        secured_query += ' AND s.timestamp <= ?'
-        secured_params.append(f"{end_date}T23:59:59")
-    if category and category != 'all':
-        secured_query += ' AND f.category = ?'
-        secured_params.append(category)
-    c.execute(secured_query, secured_params)
-    secured = c.fetchone()[0]
-
-    threat_query = base_query + " AND category IN ('Defamatory', 'Hate Speech')"
-    c.execute(threat_query, base_params)
-    threats = c.fetchone()[0]
-
-    dist_query = base_query.replace('SELECT COUNT(*)', 'SELECT category, COUNT(*)') + ' GROUP BY category'
-    c.execute(dist_query, base_params)
-    rows = c.fetchall()
+        secured_query = 'SELECT COUNT(*) FROM stored_evidence s LEFT JOIN fetched_evidence f ON s.post_id = f.post_id WHERE s.user_id IS NOT NULL'
+        secured_params = []
+        if target_user:
+            secured_query += ' AND s.user_id = ?'
+            secured_params.append(target_user)
+        if start_date:
+            secured_query += ' AND s.timestamp >= ?'
+            secured_params.append(f"{start_date}T00:00:00")
+        if end_date:
+            secured_query += ' AND s.timestamp <= ?'
+            secured_params.append(f"{end_date}T23:59:59")
+        if category and category != 'all':
+            secured_query += ' AND f.category = ?'
+            secured_params.append(category)
+        c.execute(secured_query, secured_params)
+        secured = c.fetchone()[0]
 
-    dist = {'Safe': 0, 'Defamatory': 0, 'Hate Speech': 0}
-    for r in rows:
-        cat = r[0] or 'Safe'
-        if cat in dist:
-            dist[cat] = r[1]
-
-    # Handle NULL as Pending/Safe (unscanned content)
-    if dist.get('Safe', 0) == 0 and dist.get('Pending', 0) == 0 and dist.get(None, 0) == 0:
-        total_with_category = sum(dist.values())
-        if scanned > total_with_category:
-            dist['Safe'] = scanned - total_with_category
-
-    safe_count = dist.get('Safe', 0) + dist.get('Pending', 0) + dist.get(None, 0)
-    defamatory_count = dist.get('Defamatory', 0)
-    hate_speech_count = dist.get('Hate Speech', 0)
-
-    # Generate trend data for last 7 days
-    trend = []
-    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    for i in range(6, -1, -1):
-        day_start = today - timedelta(days=i)
-        day_end = day_start + timedelta(days=1) - timedelta(seconds=1)
-        c.execute('SELECT COUNT(*) FROM fetched_evidence WHERE user_id IS NOT NULL AND timestamp >= ? AND timestamp <= ?',
-                  (day_start.isoformat(), day_end.isoformat()))
-        day_scans = c.fetchone()[0]
-        c.execute('SELECT COUNT(*) FROM stored_evidence s WHERE s.timestamp >= ? AND timestamp <= ?',
-                  (day_start.isoformat(), day_end.isoformat()))
-        day_stored = c.fetchone()[0]
-        trend.append({'date': day_start.strftime('%b %d'), 'scanned': day_scans, 'secured': day_stored})
+        threat_query = base_query + " AND category IN ('Defamatory', 'Hate Speech')"
+        c.execute(threat_query, base_params)
+        threats = c.fetchone()[0]
+
+        dist_query = base_query.replace('SELECT COUNT(*)', 'SELECT category, COUNT(*)') + ' GROUP BY category'
+        c.execute(dist_query, base_params)
+        rows = c.fetchall()
+
+        dist = {'Safe': 0, 'Defamatory': 0, 'Hate Speech': 0}
+        for r in rows:
+            cat = r[0] or 'Safe'
+            if cat in dist:
+                dist[cat] = r[1]
+
+        # Handle NULL as Pending/Safe (unscanned content)
+        if dist.get('Safe', 0) == 0 and dist.get('Pending', 0) == 0 and dist.get(None, 0) == 0:
+            total_with_category = sum(dist.values())
+            if scanned > total_with_category:
+                dist['Safe'] = scanned - total_with_category
+
+        safe_count = dist.get('Safe', 0) + dist.get('Pending', 0) + dist.get(None, 0)
+        defamatory_count = dist.get('Defamatory', 0)
+        hate_speech_count = dist.get('Hate Speech', 0)
+    else:
+        # Served from daily_rollups: O(days) rows instead of O(evidence)
+        field = 'verified' if action_type == 'stored' else 'scanned'
+        rollup_start = start_date if start_date else None
+        rollup_end = end_date if end_date else None
+        cat_filter = category if category and category != 'all' else None
+        by_category = analytics.category_counts(conn, target_user, rollup_start, rollup_end, field=field)
+        secured_by_category = analytics.category_counts(conn, target_user, rollup_start, rollup_end, field='secured')
+        if cat_filter:
+            by_category = {cat_filter: by_category.get(cat_filter, 0)}
+            secured_by_category = {cat_filter: secured_by_category.get(cat_filter, 0)}
+        scanned = sum(by_category.values())
+        secured = sum(secured_by_category.values())
+        threats = sum(count for cat, count in by_category.items() if cat in analytics.THREAT_CATEGORIES)
+
+        dist = {'Safe': 0, 'Defamatory': 0, 'Hate Speech': 0}
+        for cat, count in by_category.items():
+            cat = 'Safe' if cat == 'Pending' else cat
+            if cat in dist:
+                dist[cat] += count
+
+        safe_count = dist['Safe']
+        defamatory_count = dist['Defamatory']
+        hate_speech_count = dist['Hate Speech']
+
+    # Generate trend data for last 7 days from the rollup day buckets
+    today = now.date()
+    trend_buckets = analytics.bucket_activity(conn, today - timedelta(days=6))
+    trend = analytics.daily_trend(trend_buckets, today)
 
     conn.close()
     return jsonify({
@@ -3313,7 +3909,7 @@ def admin_report_stats_preview(current_user):
     })
 
 @app.route('/admin/report/evidence', methods=['GET'])
-@token_required
+@admin_required
 def admin_report_evidence(current_user, user_id=None):
     user_id = request.args.get('user_id')
     start_date = request.args.get('start_date')
@@ -3321,7 +3917,7 @@ def admin_report_evidence(current_user, user_id=None):
     category = request.args.get('category')
     action_type = request.args.get('action_type')
 
-    conn = sqlite3.connect('forensic.db')
+    conn = get_connection()
     c = conn.cursor()
 
     # Handle category filter - NULL means unscanned/Pending
@@ -3383,12 +3979,12 @@ def admin_report_evidence(current_user, user_id=None):
     return jsonify({'evidence': evidence})
 
 @app.route('/admin/generate-activity-report', methods=['POST'])
-@token_required
+@admin_required
 def admin_gen_act_report(current_user):
     return admin_generate_activity_report(current_user)
 
 @app.route('/admin/generate-report', methods=['POST'])
-@token_required
+@admin_required
 def admin_gen_rep(current_user):
     data = request.get_json() or {}
     user_id = data.get('user_id')
@@ -3401,7 +3997,7 @@ def admin_gen_rep(current_user):
 
     target_user_id = None if user_id == 'all' else user_id
 
-    conn = sqlite3.connect('forensic.db')
+    conn = get_connection()
     c = conn.cursor()
 
     if target_user_id:
@@ -3562,82 +4158,75 @@ def admin_gen_rep(current_user):
     return response
 
 @app.route('/admin/user/<int:user_id>/approve', methods=['POST', 'PUT'])
-@token_required
+@admin_required
 def admin_approve_user(current_user, user_id):
-    conn = sqlite3.connect('forensic.db')
+    conn = get_connection()
     c = conn.cursor()
     c.execute('UPDATE users SET account_status = ? WHERE id = ?',
               ('active', user_id))
     conn.commit()
     conn.close()
+    invalidate_user(user_id)
     log_audit(current_user, "user_approved", f"User ID {user_id} approved")
     return jsonify({'message': 'User approved successfully'})
 
 @app.route('/admin/user/<int:user_id>/suspend', methods=['POST', 'PUT'])
-@token_required
+@admin_required
 def admin_suspend_user(current_user, user_id):
-    conn = sqlite3.connect('forensic.db')
+    conn = get_connection()
     c = conn.cursor()
     c.execute('UPDATE users SET account_status = ? WHERE id = ?', ('suspended', user_id))
     conn.commit()
     conn.close()
+    invalidate_user(user_id)
     log_audit(current_user, "user_suspended", f"User ID {user_id} suspended")
     return jsonify({'message': 'User suspended successfully'})
 
 @app.route('/admin/user/<int:user_id>/activate', methods=['POST'])
-@token_required
+@admin_required
 def admin_reactivate_user(current_user, user_id):
-    conn = sqlite3.connect('forensic.db')
+    conn = get_connection()
     c = conn.cursor()
     c.execute('UPDATE users SET account_status = ? WHERE id = ?', ('active', user_id))
     conn.commit()
     conn.close()
+    invalidate_user(user_id)
     log_audit(current_user, "user_reactivated", f"User ID {user_id} reactivated")
     return jsonify({'message': 'User reactivated successfully'})
 
 @app.route('/admin/user/<int:user_id>/activate', methods=['POST'])
-@token_required
+@admin_required
 def admin_activate_user(current_user, user_id):
-    conn = sqlite3.connect('forensic.db')
+    conn = get_connection()
     c = conn.cursor()
     c.execute('UPDATE users SET is_active = 1 WHERE id = ?', (user_id,))
     conn.commit()
     conn.close()
+    invalidate_user(user_id)
     return jsonify({'message': 'User activated successfully'})
 
 @app.route('/admin/user/<int:user_id>', methods=['DELETE'])
-@token_required
+@admin_required
 def admin_delete_user(current_user, user_id):
-    conn = sqlite3.connect('forensic.db')
+    conn = get_connection()
     c = conn.cursor()
     c.execute('DELETE FROM users WHERE id = ?', (user_id,))
     conn.commit()
     conn.close()
+    invalidate_user(user_id)
     return jsonify({'message': 'User deleted successfully'})
 
 @app.route('/admin/toggle-registration', methods=['POST'])
-@token_required
+@admin_required
 def admin_toggle_reg(current_user):
     return jsonify({'message': 'Registration toggled successfully', 'enabled': True})
 
 @app.route('/admin/workload-report', methods=['GET'])
-@token_required
+@admin_required
 def admin_workload_report(current_user):
-    conn = sqlite3.connect('forensic.db')
+    conn = get_connection()
     c = conn.cursor()
-    c.execute('''
-        SELECT u.id, u.username, u.email,
-               COUNT(f.id) as scan_count,
-               SUM(CASE WHEN f.verified = 1 THEN 1 ELSE 0 END) as stored_count,
-               SUM(CASE WHEN f.category IN ('Defamatory', 'Hate Speech') THEN 1 ELSE 0 END) as threat_count
-        FROM users u
-        LEFT JOIN fetched_evidence f ON u.id = f.user_id
-        WHERE u.is_admin = 0
-        GROUP BY u.id
-        ORDER BY scan_count DESC
-        LIMIT 50
-    ''')
-    rows = c.fetchall()
+    rows = analytics.workload(conn, limit=50)
     conn.close()
     workload = [
         {'id': r[0], 'username': r[1], 'email': r[2], 'scans': r[3] or 0, 'stored': r[4] or 0, 'threats': r[5] or 0}
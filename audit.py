@@ -0,0 +1,263 @@
+"""
+Tamper-Evident Audit Chain Writer for Forensic Tool
+Appends audit_logs rows whose entry_hash links to the previous row's hash.
+
+The chain head (last id + entry_hash) is kept in memory so an append is one
+INSERT in one transaction on a dedicated connection, instead of a fresh
+connection plus a SELECT of the last row every time. Appends are serialized by
+a process-wide lock, and BEGIN IMMEDIATE holds SQLite's write lock while the
+link is computed, so neither threads nor other processes can fork the chain.
+If another connection has committed since our last append (PRAGMA
+data_version changed) the head is re-read inside that same transaction.
+
+Request handlers don't write directly: AuditWriter queues entries and a
+background thread group-commits them, except for SYNC_ACTIONS, which block
+until durable. Queued entries are flushed at interpreter exit.
+"""
+import os
+import time
+import queue
+import atexit
+import sqlite3
+import threading
+import logging
+from datetime import datetime
+
+import db
+from audit_verify import GENESIS_HASH, compute_entry_hash
+
+logger = logging.getLogger(__name__)
+
+
+# Group commit: write every AUDIT_BATCH_SIZE entries or AUDIT_FLUSH_INTERVAL_MS, whichever is first
+AUDIT_ASYNC = os.getenv('AUDIT_ASYNC', 'true').lower() != 'false'
+AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', 64))
+AUDIT_FLUSH_INTERVAL_MS = int(os.getenv('AUDIT_FLUSH_INTERVAL_MS', 50))
+
+# Security-critical actions are committed before log_audit() returns
+SYNC_ACTIONS = frozenset({'login_failed', 'unauthorized_retrieval_attempt'})
+
+
+class AuditChain:
+    """Serialized appender for the audit_logs hash chain."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._head_id = None
+        self._head_hash = None
+        self._data_version = None
+
+    def _connection(self):
+        # Never reuse a handle across a fork (gunicorn preload)
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = db.open_dedicated_connection()
+            self._conn.isolation_level = None  # explicit BEGIN/COMMIT below
+            self._pid = os.getpid()
+            self._head_hash = None
+            self._data_version = None
+        return self._conn
+
+    def _reset_connection(self):
+        self._conn = None
+        self._head_hash = None
+
+    def _load_head(self, conn):
+        row = conn.execute('SELECT id, entry_hash FROM audit_logs ORDER BY id DESC LIMIT 1').fetchone()
+        if row:
+            self._head_id, self._head_hash = row[0], row[1] or GENESIS_HASH
+        else:
+            self._head_id, self._head_hash = 0, GENESIS_HASH
+
+    def recover(self):
+        """Load the chain head from the database (called once at startup)."""
+        with self._lock:
+            conn = self._connection()
+            self._load_head(conn)
+            self._data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+            logger.info(f"Audit chain head recovered at entry {self._head_id}")
+            return self._head_id, self._head_hash
+
+    def head(self):
+        with self._lock:
+            return self._head_id, self._head_hash
+
+    def append(self, user_id, action, details, ip_address, timestamp=None):
+        """Append one entry and return its entry_hash."""
+        timestamp = timestamp or datetime.now().isoformat()
+        return self.append_batch([(user_id, action, details, ip_address, timestamp)])[-1]
+
+    def append_batch(self, entries):
+        """
+        Append (user_id, action, details, ip_address, timestamp) tuples in order,
+        in a single transaction. Returns their entry hashes.
+        """
+        if not entries:
+            return []
+        with self._lock:
+            try:
+                return self._append_locked(entries)
+            except sqlite3.ProgrammingError:
+                # Handle was closed underneath us (db.close_all); reopen once
+                self._reset_connection()
+                return self._append_locked(entries)
+
+    def _append_locked(self, entries):
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+            if self._head_hash is None or data_version != self._data_version:
+                self._load_head(conn)
+            prev_hash = self._head_hash
+            rows = []
+            for user_id, action, details, ip_address, timestamp in entries:
+                entry_hash = compute_entry_hash(prev_hash, user_id, action, details, timestamp, ip_address)
+                rows.append((user_id, action, details, ip_address, timestamp, prev_hash, entry_hash))
+                prev_hash = entry_hash
+            conn.executemany(
+                'INSERT INTO audit_logs (user_id, action, details, ip_address, timestamp, prev_hash, entry_hash) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            head_id = conn.execute('SELECT last_insert_rowid()').fetchone()[0]
+            conn.execute('COMMIT')
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            self._head_hash = None
+            raise
+        # Our own commit doesn't change data_version, so the value read above stays valid
+        self._head_id, self._head_hash = head_id, prev_hash
+        self._data_version = data_version
+        return [row[-1] for row in rows]
+
+
+audit_chain = AuditChain()
+
+
+class _Pending:
+    """A queued entry; `done` is set once it is committed when the caller waits."""
+    __slots__ = ('entry', 'done', 'error')
+
+    def __init__(self, entry, wait=False):
+        self.entry = entry
+        self.done = threading.Event() if wait else None
+        self.error = None
+
+
+class AuditWriter:
+    """
+    Background writer that group-commits queued audit entries.
+
+    Entries are hashed in queue order and committed every AUDIT_BATCH_SIZE
+    entries or AUDIT_FLUSH_INTERVAL_MS milliseconds, whichever comes first.
+    Synchronous entries (SYNC_ACTIONS) go through the same queue, so the chain
+    order is preserved, but the caller blocks until its batch has committed.
+    """
+
+    def __init__(self, chain, batch_size=AUDIT_BATCH_SIZE, flush_interval_ms=AUDIT_FLUSH_INTERVAL_MS):
+        self._chain = chain
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self._start_lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self.batches = 0
+        self.entries = 0
+
+    def _ensure_started(self):
+        # The writer thread doesn't survive a fork; start a fresh one per process
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._queue = queue.Queue()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+            self._thread.start()
+
+    def submit(self, user_id, action, details, ip_address, sync=None):
+        """Queue an entry. Blocks until committed for sync actions (raises on failure)."""
+        if sync is None:
+            sync = action in SYNC_ACTIONS
+        entry = (user_id, action, details, ip_address, datetime.now().isoformat())
+        if not AUDIT_ASYNC:
+            self._chain.append_batch([entry])
+            return
+        self._ensure_started()
+        pending = _Pending(entry, wait=sync)
+        self._queue.put(pending)
+        if sync:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+
+    def flush(self, timeout=5.0):
+        """Block until everything queued so far is committed."""
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            return True
+        marker = _Pending(None, wait=True)
+        self._queue.put(marker)
+        return marker.done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        """Flush and stop the writer (registered with atexit)."""
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.error("Audit writer did not stop in time; queued entries may be lost")
+        else:
+            logger.info(f"Audit writer stopped after {self.entries} entries in {self.batches} batches")
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+                # A waiting caller (sync action or flush) ends the batch early
+                if item.done is not None or len(batch) >= self.batch_size:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if batch:
+                self._commit(batch)
+
+    def _commit(self, batch):
+        entries = [p.entry for p in batch if p.entry is not None]
+        error = None
+        try:
+            self._chain.append_batch(entries)
+            self.batches += 1
+            self.entries += len(entries)
+        except Exception as e:
+            error = e
+            logger.error(f"Audit group commit of {len(entries)} entries failed: {e}")
+            for entry in entries:
+                logger.error(f"Unwritten audit entry: {entry}")
+        for p in batch:
+            if p.done is not None:
+                p.error = error
+                p.done.set()
+
+
+_STOP = object()
+
+audit_writer = AuditWriter(audit_chain)
+atexit.register(audit_writer.close)
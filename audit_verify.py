@@ -0,0 +1,180 @@
+"""
+Audit-Chain Verification for Forensic Tool
+Streams audit_logs in id order, recomputes every SHA-256 link and reports the
+first entry whose prev_hash or entry_hash doesn't match.
+
+Every AUDIT_CHECKPOINT_INTERVAL verified entries an HMAC-signed checkpoint
+(entry id + entry hash) is stored in audit_checkpoints. Later runs start from
+the newest checkpoint whose signature is valid and whose entry is unchanged,
+so a routine check only touches entries written since then. Edits to entries
+older than the checkpoint are only caught by a --full run.
+
+    python audit_verify.py            # incremental, from the last checkpoint
+    python audit_verify.py --full     # from the genesis entry
+"""
+import os
+import sys
+import hmac
+import time
+import hashlib
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+GENESIS_HASH = "GENESIS_BLOCK"
+
+AUDIT_CHECKPOINT_INTERVAL = int(os.getenv('AUDIT_CHECKPOINT_INTERVAL', 1000))
+STREAM_CHUNK_SIZE = 5000
+
+
+def compute_entry_hash(prev_hash, user_id, action, details, timestamp, ip_address):
+    """SHA-256 link used by both the writer (audit.py) and this verifier."""
+    entry_data = f"{prev_hash}{user_id}{action}{details}{timestamp}{ip_address}"
+    return hashlib.sha256(entry_data.encode('utf-8')).hexdigest()
+
+
+def _checkpoint_key():
+    key = os.getenv('AUDIT_CHECKPOINT_KEY') or os.getenv('SECRET_KEY')
+    if not key:
+        logger.warning("AUDIT_CHECKPOINT_KEY/SECRET_KEY not set -- checkpoints signed with a default key")
+        key = 'your-secret-key-change-in-production'
+    return key.encode('utf-8')
+
+
+def sign_checkpoint(entry_id, entry_hash, key=None):
+    key = key or _checkpoint_key()
+    return hmac.new(key, f"{entry_id}:{entry_hash}".encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+def _latest_trusted_checkpoint(conn, result, key):
+    """Newest checkpoint with a valid signature whose entry is still intact, or None."""
+    rows = conn.execute(
+        'SELECT c.entry_id, c.entry_hash, c.entries_verified, c.signature, a.entry_hash '
+        'FROM audit_checkpoints c LEFT JOIN audit_logs a ON a.id = c.entry_id '
+        'ORDER BY c.entry_id DESC'
+    )
+    for entry_id, entry_hash, entries_verified, signature, current_hash in rows:
+        if not hmac.compare_digest(signature, sign_checkpoint(entry_id, entry_hash, key)):
+            result['invalid_checkpoints'].append(entry_id)
+            continue
+        if current_hash != entry_hash:
+            # The checkpointed entry itself was altered or deleted
+            result['first_broken'] = {
+                'id': entry_id,
+                'reason': 'checkpointed entry missing' if current_hash is None else 'checkpointed entry_hash changed',
+                'expected': entry_hash,
+                'actual': current_hash
+            }
+            return None
+        return entry_id, entry_hash, entries_verified
+    return None
+
+
+def verify_chain(conn, full=False, checkpoint_interval=AUDIT_CHECKPOINT_INTERVAL, write_checkpoints=True):
+    """
+    Verify the audit chain and return a summary dict:
+    ok, mode, start_id, last_id, entries_verified, first_broken,
+    checkpoints_written, invalid_checkpoints, elapsed_seconds, entries_per_second.
+    """
+    started = time.perf_counter()
+    key = _checkpoint_key()
+    result = {
+        'ok': True,
+        'mode': 'full' if full else 'incremental',
+        'start_id': 0,
+        'last_id': 0,
+        'entries_verified': 0,
+        'first_broken': None,
+        'checkpoints_written': 0,
+        'invalid_checkpoints': []
+    }
+
+    prev_hash, start_id, total_verified = GENESIS_HASH, 0, 0
+    if not full:
+        checkpoint = _latest_trusted_checkpoint(conn, result, key)
+        if result['first_broken']:
+            result['ok'] = False
+        elif checkpoint:
+            start_id, prev_hash, total_verified = checkpoint
+    result['start_id'] = start_id
+    result['last_id'] = start_id
+
+    new_checkpoints = []
+    if result['ok']:
+        # Iterating the cursor in chunks keeps memory flat; WAL gives us a stable snapshot
+        cur = conn.execute(
+            'SELECT id, user_id, action, details, ip_address, timestamp, prev_hash, entry_hash '
+            'FROM audit_logs WHERE id > ? ORDER BY id', (start_id,)
+        )
+        verified = 0
+        while result['ok']:
+            rows = cur.fetchmany(STREAM_CHUNK_SIZE)
+            if not rows:
+                break
+            for entry_id, user_id, action, details, ip_address, timestamp, stored_prev, entry_hash in rows:
+                if stored_prev != prev_hash:
+                    result['first_broken'] = {'id': entry_id, 'reason': 'prev_hash does not link to previous entry',
+                                              'expected': prev_hash, 'actual': stored_prev}
+                    result['ok'] = False
+                    break
+                expected = compute_entry_hash(prev_hash, user_id, action, details, timestamp, ip_address)
+                if expected != entry_hash:
+                    result['first_broken'] = {'id': entry_id, 'reason': 'entry_hash does not match entry contents',
+                                              'expected': expected, 'actual': entry_hash}
+                    result['ok'] = False
+                    break
+                prev_hash = entry_hash
+                verified += 1
+                result['last_id'] = entry_id
+                if checkpoint_interval and (total_verified + verified) % checkpoint_interval == 0:
+                    new_checkpoints.append((entry_id, entry_hash, total_verified + verified))
+        cur.close()
+        result['entries_verified'] = verified
+
+    # Checkpoints before a broken link are still trustworthy
+    if write_checkpoints and new_checkpoints:
+        created_at = datetime.now().isoformat()
+        conn.executemany(
+            'INSERT OR REPLACE INTO audit_checkpoints (entry_id, entry_hash, entries_verified, created_at, signature) '
+            'VALUES (?, ?, ?, ?, ?)',
+            [(entry_id, entry_hash, count, created_at, sign_checkpoint(entry_id, entry_hash, key))
+             for entry_id, entry_hash, count in new_checkpoints]
+        )
+        conn.commit()
+        result['checkpoints_written'] = len(new_checkpoints)
+
+    elapsed = time.perf_counter() - started
+    result['elapsed_seconds'] = round(elapsed, 4)
+    result['entries_per_second'] = round(result['entries_verified'] / elapsed, 1) if elapsed > 0 else 0.0
+    if result['ok']:
+        logger.info(f"Audit chain verified: {result['entries_verified']} entries from id {start_id} "
+                    f"({result['entries_per_second']} entries/s)")
+    else:
+        logger.error(f"Audit chain broken at entry {result['first_broken']['id']}: {result['first_broken']['reason']}")
+    return result
+
+
+if __name__ == '__main__':
+    import db
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    args = sys.argv[1:]
+    if any(a not in ('--full', '--no-checkpoints') for a in args):
+        print("Usage: python audit_verify.py [--full] [--no-checkpoints]")
+        sys.exit(2)
+    conn = db.get_connection()
+    db.apply_migrations(conn)
+    report = verify_chain(conn, full='--full' in args, write_checkpoints='--no-checkpoints' not in args)
+    conn.close()
+    print(f"Mode: {report['mode']} (from entry {report['start_id']})")
+    print(f"Verified {report['entries_verified']} entries up to id {report['last_id']} "
+          f"in {report['elapsed_seconds']}s ({report['entries_per_second']} entries/s)")
+    if report['invalid_checkpoints']:
+        print(f"WARNING: checkpoints with invalid signatures: {report['invalid_checkpoints']}")
+    if report['first_broken']:
+        broken = report['first_broken']
+        print(f"BROKEN at entry {broken['id']}: {broken['reason']}")
+        print(f"  expected: {broken['expected']}")
+        print(f"  actual:   {broken['actual']}")
+        sys.exit(1)
+    print(f"Chain intact. Checkpoints written: {report['checkpoints_written']}")
@@ -8,7 +8,7 @@ Usage:
 
 Schedule with cron (Linux) or Task Scheduler (Windows) for daily backups.
 """
-import shutil
+import sqlite3
 import os
 import logging
 from datetime import datetime
@@ -34,14 +34,23 @@ def backup():
     backup_path = os.path.join(BACKUP_DIR, backup_filename)
 
     try:
-        shutil.copy2(DB_PATH, backup_path)
-        backup_size = os.path.getsize(backup_path)
-        original_size = os.path.getsize(DB_PATH)
-
-        if backup_size != original_size:
-            logger.error(f"Backup size mismatch: original={original_size}, backup={backup_size}")
+        # The live DB runs in WAL mode, so recent commits may still sit in
+        # forensic.db-wal. The online backup API captures a consistent snapshot.
+        src = sqlite3.connect(DB_PATH)
+        dst = sqlite3.connect(backup_path)
+        with dst:
+            src.backup(dst)
+        dst.close()
+        src.close()
+
+        check = sqlite3.connect(backup_path)
+        integrity = check.execute('PRAGMA integrity_check').fetchone()[0]
+        check.close()
+        if integrity != 'ok':
+            logger.error(f"Backup integrity check failed: {integrity}")
             os.remove(backup_path)
             return False
+        backup_size = os.path.getsize(backup_path)
 
         logger.info(f"Backup created: {backup_filename} ({backup_size} bytes)")
         cleanup_old_backups()
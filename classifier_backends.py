@@ -0,0 +1,98 @@
+"""
+Selectable Inference Backends for the Afro-XLMR Classifier
+Picks how models/afro_xlmr_forensics is executed on CPU:
+
+    INFERENCE_BACKEND=torch        full-precision PyTorch (default)
+    INFERENCE_BACKEND=torch-int8   PyTorch with dynamic int8 quantized Linear layers
+    INFERENCE_BACKEND=onnx         ONNX Runtime on the exported graph (no torch needed)
+
+All backends take padded numpy input_ids / attention_mask and return softmax
+probabilities as lists, so predict_defamatory's thresholds apply unchanged.
+Export the ONNX graph with: python scripts/export_onnx.py export
+
+With FLASK_ENV=production the API uses the Hugging Face API unless
+INFERENCE_BACKEND is set explicitly to onnx or torch-int8. Run
+scripts/export_onnx.py parity and bench on the real weights before doing so.
+"""
+import os
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('torch', 'torch-int8', 'onnx')
+INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'torch').lower()
+ONNX_MODEL_FILE = os.getenv('ONNX_MODEL_FILE', 'onnx/model.int8.onnx')  # relative to the model directory
+ONNX_INTRA_OP_THREADS = int(os.getenv('ONNX_INTRA_OP_THREADS', 0))  # 0 = onnxruntime default
+
+
+def softmax(logits):
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+class TorchBackend:
+    """PyTorch execution, optionally with dynamic int8 quantization of Linear layers."""
+
+    def __init__(self, model_path, quantize=False):
+        import torch
+        from transformers import AutoModelForSequenceClassification
+
+        self._torch = torch
+        self.name = 'torch-int8' if quantize else 'torch'
+        # Dynamic quantization kernels are CPU-only
+        use_cuda = torch.cuda.is_available() and not quantize
+        self.device = torch.device("cuda" if use_cuda else "cpu")
+        model = AutoModelForSequenceClassification.from_pretrained(model_path)
+        if quantize:
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model = model.to(self.device)
+        self.model.eval()
+
+    def predict_proba(self, input_ids, attention_mask):
+        torch = self._torch
+        with torch.inference_mode():
+            outputs = self.model(
+                input_ids=torch.from_numpy(np.asarray(input_ids, dtype=np.int64)).to(self.device),
+                attention_mask=torch.from_numpy(np.asarray(attention_mask, dtype=np.int64)).to(self.device)
+            )
+            return torch.nn.functional.softmax(outputs.logits, dim=-1).tolist()
+
+
+class OnnxBackend:
+    """ONNX Runtime execution of a graph written by scripts/export_onnx.py."""
+
+    def __init__(self, model_path, model_file=ONNX_MODEL_FILE):
+        import onnxruntime as ort
+
+        path = os.path.join(model_path, model_file)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} not found -- run scripts/export_onnx.py export first")
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if ONNX_INTRA_OP_THREADS:
+            options.intra_op_num_threads = ONNX_INTRA_OP_THREADS
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.name = f"onnx:{os.path.basename(path)}"
+
+    def predict_proba(self, input_ids, attention_mask):
+        logits = self.session.run(['logits'], {
+            'input_ids': np.asarray(input_ids, dtype=np.int64),
+            'attention_mask': np.asarray(attention_mask, dtype=np.int64)
+        })[0]
+        return softmax(logits).tolist()
+
+
+def load_backend(model_path, name=None):
+    """Instantiate the configured backend for a model directory."""
+    name = (name or INFERENCE_BACKEND).lower()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown INFERENCE_BACKEND '{name}'. Choose one of: {', '.join(BACKENDS)}")
+    if name == 'onnx':
+        backend = OnnxBackend(model_path)
+    else:
+        backend = TorchBackend(model_path, quantize=(name == 'torch-int8'))
+    logger.info(f"Classifier backend ready: {backend.name}")
+    return backend
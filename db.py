@@ -0,0 +1,481 @@
+"""
+SQLite Data-Access Layer for Forensic Tool
+Hands out pooled, WAL-mode connections to forensic.db so request handlers
+stop paying connect/schema-parse/journal-lock costs on every call.
+
+Each thread (gunicorn worker thread or background job) keeps one long-lived
+connection. Callers still use the familiar pattern:
+
+    conn = get_connection()
+    c = conn.cursor()
+    ...
+    conn.commit()
+    conn.close()   # returns the connection to the pool, does not close it
+
+Schema indexes are applied as numbered migrations tracked in PRAGMA user_version.
+Run `python db.py check-plans` to verify no hot query falls back to a full scan.
+"""
+import os
+import re
+import sys
+import sqlite3
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.getenv('FORENSIC_DB_PATH', 'forensic.db')
+
+# Tuned for a read-heavy dashboard workload on a single small instance
+BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+CACHE_SIZE_KB = int(os.getenv('SQLITE_CACHE_SIZE_KB', 16384))       # 16 MB page cache per connection
+MMAP_SIZE_BYTES = int(os.getenv('SQLITE_MMAP_SIZE', 64 * 1024 * 1024))  # 64 MB memory-mapped I/O
+STATEMENT_CACHE_SIZE = 256  # Prepared statements kept per connection
+
+_local = threading.local()
+_registry_lock = threading.Lock()
+_all_connections = []
+_generation = 0  # Bumped by close_all() so threads drop stale handles
+
+
+def _configure(conn):
+    """Apply WAL journaling and performance pragmas to a new connection."""
+    conn.execute('PRAGMA journal_mode=WAL')
+    # NORMAL is durable under WAL except for the last transactions on power loss
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+    conn.execute(f'PRAGMA cache_size=-{CACHE_SIZE_KB}')
+    conn.execute(f'PRAGMA mmap_size={MMAP_SIZE_BYTES}')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute('PRAGMA foreign_keys=OFF')
+
+
+def _open_connection():
+    conn = sqlite3.connect(
+        DB_PATH,
+        timeout=BUSY_TIMEOUT_MS / 1000.0,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        # Each handle is only ever used by its owning thread; this just lets
+        # close_all() tear the pool down from a shutdown hook.
+        check_same_thread=False,
+    )
+    _configure(conn)
+    with _registry_lock:
+        _all_connections.append(conn)
+    logger.info(f"Opened pooled SQLite connection (pid={os.getpid()}, thread={threading.current_thread().name})")
+    return conn
+
+
+class PooledConnection:
+    """
+    Thin wrapper around the thread's shared sqlite3 connection.
+    close() releases the handle back to the pool instead of closing the socket,
+    rolling back anything the caller forgot to commit.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._released = False
+        _local.depth = getattr(_local, 'depth', 0) + 1
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self._conn.commit()
+        else:
+            self._conn.rollback()
+        self.close()
+        return False
+
+    def cursor(self):
+        return self._conn.cursor()
+
+    def execute(self, sql, params=()):
+        return self._conn.execute(sql, params)
+
+    def executemany(self, sql, seq):
+        return self._conn.executemany(sql, seq)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        if self._released:
+            return
+        self._released = True
+        _local.depth = max(getattr(_local, 'depth', 1) - 1, 0)
+        # Only the outermost holder may discard pending work; nested holders
+        # (e.g. log_audit called while a handler has the connection) share it.
+        if _local.depth == 0 and self._conn.in_transaction:
+            self._conn.rollback()
+
+
+def _thread_connection():
+    conn = getattr(_local, 'conn', None)
+    # Connections must never cross a fork (gunicorn preload) -- reopen in the child
+    if (conn is None or getattr(_local, 'pid', None) != os.getpid()
+            or getattr(_local, 'generation', None) != _generation):
+        conn = _open_connection()
+        _local.conn = conn
+        _local.pid = os.getpid()
+        _local.generation = _generation
+        _local.depth = 0
+    return conn
+
+
+def get_connection():
+    """Return this thread's pooled connection to forensic.db."""
+    return PooledConnection(_thread_connection())
+
+
+def open_dedicated_connection():
+    """
+    Open a configured connection owned by one component (e.g. the audit chain
+    writer) rather than a thread. It is still closed by close_all().
+    """
+    return _open_connection()
+
+
+def release_thread_connection():
+    """Reset the thread's pool state at the end of a request (Flask teardown)."""
+    conn = getattr(_local, 'conn', None)
+    if conn is None or getattr(_local, 'pid', None) != os.getpid():
+        return
+    _local.depth = 0
+    if conn.in_transaction:
+        try:
+            conn.rollback()
+        except sqlite3.Error as e:
+            logger.warning(f"Rollback on release failed: {e}")
+
+
+def close_all():
+    """Close every pooled connection (shutdown hook / tests)."""
+    global _generation
+    with _registry_lock:
+        _generation += 1
+        conns = list(_all_connections)
+        _all_connections.clear()
+    for conn in conns:
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+def init_app(app):
+    """Register pool teardown with a Flask app."""
+    @app.teardown_appcontext
+    def _release_db(exc):
+        release_thread_connection()
+
+
+# --- Schema migrations (versioned via PRAGMA user_version) ---
+
+# Feature tables. Their DDL lives here rather than in the feature modules so this
+# layer depends on none of them and `python db.py migrate` is self-contained.
+
+# Rows without a verdict (e.g. media awaiting human confirmation) roll up as Pending
+_CATEGORY_SQL = "COALESCE(NULLIF({col}, ''), 'Pending')"
+
+# Used by analytics.py
+ROLLUPS_DDL = [
+    '''CREATE TABLE IF NOT EXISTS daily_rollups (
+        user_id INTEGER NOT NULL,
+        day TEXT NOT NULL,
+        category TEXT NOT NULL,
+        scanned INTEGER NOT NULL DEFAULT 0,
+        secured INTEGER NOT NULL DEFAULT 0,
+        threats INTEGER NOT NULL DEFAULT 0,
+        verified INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, day, category)
+    ) WITHOUT ROWID''',
+    'CREATE INDEX IF NOT EXISTS idx_daily_rollups_day ON daily_rollups(day)',
+]
+
+ROLLUPS_REBUILD = [
+    'DELETE FROM daily_rollups',
+    f'''INSERT INTO daily_rollups (user_id, day, category, scanned, secured, threats, verified)
+        SELECT user_id, day, category, SUM(scanned), SUM(secured), SUM(threats), SUM(verified)
+        FROM (
+            SELECT user_id, substr(timestamp, 1, 10) AS day,
+                   {_CATEGORY_SQL.format(col='category')} AS category,
+                   1 AS scanned, 0 AS secured,
+                   CASE WHEN is_defamatory = 1 THEN 1 ELSE 0 END AS threats,
+                   CASE WHEN verified = 1 THEN 1 ELSE 0 END AS verified
+            FROM fetched_evidence
+            WHERE user_id IS NOT NULL AND timestamp IS NOT NULL
+            UNION ALL
+            SELECT s.user_id, substr(s.timestamp, 1, 10),
+                   {_CATEGORY_SQL.format(col="(SELECT f.category FROM fetched_evidence f WHERE f.post_id = s.post_id ORDER BY f.id DESC LIMIT 1)")},
+                   0, 1, 0, 0
+            FROM stored_evidence s
+            WHERE s.user_id IS NOT NULL AND s.timestamp IS NOT NULL
+        )
+        GROUP BY user_id, day, category''',
+]
+
+# Used by audit_verify.py
+CHECKPOINTS_DDL = [
+    '''CREATE TABLE IF NOT EXISTS audit_checkpoints (
+        entry_id INTEGER PRIMARY KEY,
+        entry_hash TEXT NOT NULL,
+        entries_verified INTEGER NOT NULL,
+        created_at TEXT NOT NULL,
+        signature TEXT NOT NULL
+    )''',
+]
+
+# Used by inference_cache.py
+CACHE_DDL = [
+    '''CREATE TABLE IF NOT EXISTS inference_cache (
+        cache_key TEXT PRIMARY KEY,
+        model_version TEXT NOT NULL,
+        confidences TEXT NOT NULL,
+        created_at REAL NOT NULL
+    ) WITHOUT ROWID''',
+    'CREATE INDEX IF NOT EXISTS idx_inference_cache_version ON inference_cache(model_version)',
+]
+
+# Used by lexicon_store.py
+LEXICON_DDL = [
+    '''CREATE TABLE IF NOT EXISTS lexicon_versions (
+        version INTEGER PRIMARY KEY AUTOINCREMENT,
+        content_sha256 TEXT NOT NULL UNIQUE,
+        lexicons TEXT NOT NULL,
+        term_count INTEGER NOT NULL,
+        source TEXT,
+        created_by INTEGER,
+        created_at TEXT NOT NULL,
+        activated_at TEXT
+    )''',
+    'CREATE INDEX IF NOT EXISTS idx_lexicon_versions_activated ON lexicon_versions(activated_at)',
+]
+
+# Used by ocr_cache.py
+OCR_CACHE_DDL = [
+    '''CREATE TABLE IF NOT EXISTS ocr_cache (
+        sha256 TEXT NOT NULL,
+        ocr_config TEXT NOT NULL,
+        dhash INTEGER NOT NULL,
+        band0 INTEGER NOT NULL,
+        band1 INTEGER NOT NULL,
+        band2 INTEGER NOT NULL,
+        band3 INTEGER NOT NULL,
+        text TEXT NOT NULL,
+        boxes TEXT NOT NULL,
+        width INTEGER,
+        height INTEGER,
+        created_at REAL NOT NULL,
+        hits INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (sha256, ocr_config)
+    ) WITHOUT ROWID''',
+    'CREATE INDEX IF NOT EXISTS idx_ocr_cache_band0 ON ocr_cache(band0)',
+    'CREATE INDEX IF NOT EXISTS idx_ocr_cache_band1 ON ocr_cache(band1)',
+    'CREATE INDEX IF NOT EXISTS idx_ocr_cache_band2 ON ocr_cache(band2)',
+    'CREATE INDEX IF NOT EXISTS idx_ocr_cache_band3 ON ocr_cache(band3)',
+]
+
+# Used by tweet_cache.py
+TWEET_CACHE_DDL = [
+    '''CREATE TABLE IF NOT EXISTS x_tweet_cache (
+        post_id TEXT PRIMARY KEY,
+        payload TEXT NOT NULL,
+        fetched_at REAL NOT NULL,
+        public_metrics TEXT,
+        metrics_fetched_at REAL NOT NULL,
+        hits INTEGER NOT NULL DEFAULT 0
+    )''',
+    'CREATE INDEX IF NOT EXISTS idx_x_tweet_cache_fetched_at ON x_tweet_cache(fetched_at)',
+]
+
+# Used by x_rate_governor.py
+X_RATE_LIMIT_DDL = [
+    '''CREATE TABLE IF NOT EXISTS x_rate_limits (
+        endpoint TEXT PRIMARY KEY,
+        quota_limit INTEGER,
+        remaining INTEGER NOT NULL,
+        reset_at REAL NOT NULL,
+        updated_at REAL NOT NULL
+    )''',
+]
+
+SCHEMA_MIGRATIONS = [
+    (1, "Secondary indexes for evidence, audit and request lookups", [
+        'CREATE INDEX IF NOT EXISTS idx_fetched_evidence_user_ts ON fetched_evidence(user_id, timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_fetched_evidence_post_id ON fetched_evidence(post_id)',
+        'CREATE INDEX IF NOT EXISTS idx_fetched_evidence_category ON fetched_evidence(category)',
+        'CREATE INDEX IF NOT EXISTS idx_stored_evidence_user_ts ON stored_evidence(user_id, timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_stored_evidence_post_id ON stored_evidence(post_id)',
+        'CREATE INDEX IF NOT EXISTS idx_stored_evidence_evidence_id ON stored_evidence(evidence_id)',
+        'CREATE INDEX IF NOT EXISTS idx_stored_evidence_tx_hash ON stored_evidence(tx_hash)',
+        'CREATE INDEX IF NOT EXISTS idx_stored_evidence_eth_tx_hash ON stored_evidence(eth_tx_hash)',
+        'CREATE INDEX IF NOT EXISTS idx_audit_logs_action_ts ON audit_logs(action, timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_audit_logs_timestamp ON audit_logs(timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_requests_log_user_ts ON requests_log(user_id, timestamp)',
+    ]),
+    (2, "daily_rollups table for dashboard statistics, backfilled from raw evidence",
+        ROLLUPS_DDL + ROLLUPS_REBUILD),
+    (3, "audit_checkpoints table for incremental audit-chain verification",
+        CHECKPOINTS_DDL),
+    (4, "inference_cache table for the shared classifier result cache",
+        CACHE_DDL),
+    (5, "lexicon_versions table for versioned forensic lexicons",
+        LEXICON_DDL),
+    (6, "ocr_cache table for OCR results keyed by content and perceptual hash",
+        OCR_CACHE_DDL),
+    (7, "x_tweet_cache table for shared, encrypted X API lookups",
+        TWEET_CACHE_DDL),
+    (8, "x_rate_limits table for the shared X API rate governor",
+        X_RATE_LIMIT_DDL),
+    (9, "Conversation index for captured thread evidence", [
+        'CREATE INDEX IF NOT EXISTS idx_fetched_evidence_user_conversation ON fetched_evidence(user_id, conversation_id)',
+    ]),
+]
+
+
+def schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def apply_migrations(conn):
+    """Apply any pending schema migrations. Tables must already exist (see api.init_db)."""
+    current = schema_version(conn)
+    applied = []
+    for version, description, statements in SCHEMA_MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            for stmt in statements:
+                conn.execute(stmt)
+            # PRAGMA cannot be parameterised; version is a trusted int
+            conn.execute(f'PRAGMA user_version = {int(version)}')
+            conn.commit()
+            applied.append(version)
+            logger.info(f"Applied schema migration {version}: {description}")
+        except sqlite3.Error as e:
+            conn.rollback()
+            logger.error(f"Schema migration {version} failed: {e}")
+            raise
+    if applied:
+        # Refresh planner statistics so the new indexes are actually chosen
+        conn.execute('PRAGMA optimize')
+    return applied
+
+
+# --- Query planner audit ---
+
+# Hot queries issued by dashboard, report and retrieval routes.
+# Each must be answered through an index, never by scanning the table.
+HOT_QUERIES = {
+    'report.fetched': (
+        'SELECT id, post_id, content, author_username, created_at, media_urls, timestamp, verified, category, confidence '
+        'FROM fetched_evidence WHERE user_id = ? AND timestamp >= ? AND timestamp <= ?',
+        (1, '2000-01-01T00:00:00', '2100-01-01T23:59:59')),
+    'report.stored': (
+        'SELECT s.id, s.evidence_id, s.tx_hash, s.eth_tx_hash, s.timestamp, s.post_id, '
+        'f.content, f.author_username, f.category, f.confidence, f.engagement '
+        'FROM stored_evidence s LEFT JOIN fetched_evidence f ON s.post_id = f.post_id WHERE s.user_id = ?',
+        (1,)),
+    'report_stats.scanned': (
+        'SELECT COUNT(*) FROM fetched_evidence WHERE user_id = ? AND timestamp >= ? AND timestamp < ?',
+        (1, '2000-01-01T00:00:00', '2100-01-01T00:00:00')),
+    'report_stats.secured': (
+        'SELECT COUNT(*) FROM stored_evidence WHERE user_id = ? AND timestamp >= ? AND timestamp < ?',
+        (1, '2000-01-01T00:00:00', '2100-01-01T00:00:00')),
+    'report_stats.day_buckets': (
+        "SELECT substr(timestamp, 1, 10) AS day, COUNT(*), SUM(CASE WHEN category = 'Safe' THEN 1 ELSE 0 END) "
+        'FROM fetched_evidence WHERE user_id = ? AND timestamp >= ? GROUP BY day',
+        (1, '2000-01-01')),
+    'get_evidence.owner': (
+        'SELECT user_id FROM stored_evidence WHERE evidence_id = ? LIMIT 1', ('1',)),
+    'get_evidence.engagement': (
+        'SELECT engagement FROM fetched_evidence WHERE post_id = ? LIMIT 1', ('1',)),
+    'get_x_thread': (
+        'SELECT post_id, content, author_username, created_at, timestamp, verified, category, confidence, '
+        'parent_post_id, thread_relation, thread_depth FROM fetched_evidence WHERE user_id = ? AND conversation_id = ? '
+        'ORDER BY thread_depth IS NULL, thread_depth, created_at',
+        (1, '1')),
+    'get_evidence.mark_verified': (
+        'UPDATE fetched_evidence SET verified = 1 WHERE post_id = ?', ('1',)),
+    'retrieve_evidence.eth_tx_hash': (
+        'SELECT tx_hash FROM stored_evidence WHERE eth_tx_hash = ? LIMIT 1', ('0x0',)),
+    'retrieve_evidence.tx_hash': (
+        'SELECT post_id FROM stored_evidence WHERE tx_hash = ? LIMIT 1', ('0x0',)),
+    'get_tx_hash': (
+        'SELECT tx_hash, eth_tx_hash FROM stored_evidence WHERE evidence_id = ? AND user_id = ?', ('1', 1)),
+    'admin_security_stats.failed_logins': (
+        "SELECT COUNT(*) FROM audit_logs WHERE action = 'login_failed' AND timestamp > datetime('now', '-24 hours')",
+        ()),
+    'admin_security_stats.recent_logins': (
+        'SELECT u.username, a.action, a.details, a.timestamp FROM audit_logs a JOIN users u ON a.user_id = u.id '
+        "WHERE a.action >= 'login_' AND a.action < 'login`' ORDER BY a.timestamp DESC LIMIT 20",
+        ()),
+    'admin_activities': (
+        'SELECT a.id, u.username, a.action, a.details, a.timestamp FROM audit_logs a '
+        'JOIN users u ON a.user_id = u.id ORDER BY a.timestamp DESC LIMIT 100',
+        ()),
+}
+
+
+def _is_full_scan(detail, filtered=False):
+    """
+    "SCAN t" reads the whole table. "SCAN t USING [COVERING] INDEX ..." reads the whole
+    index, which is only fine for unfiltered ORDER BY ... LIMIT walks; when the query has
+    a WHERE clause that step should have been a SEARCH.
+    """
+    if not detail.startswith('SCAN ') or 'CONSTANT ROW' in detail:
+        return False
+    return filtered or ' USING ' not in detail
+
+
+def audit_query_plans(conn, queries=None):
+    """
+    Run EXPLAIN QUERY PLAN for each registered hot query.
+    Returns a list of (name, plan_detail) for every step that scans a table, or
+    walks a whole index for a query that filters with WHERE.
+    """
+    offenders = []
+    for name, (sql, params) in (queries or HOT_QUERIES).items():
+        filtered = re.search(r'\bWHERE\b', sql, re.IGNORECASE) is not None
+        for row in conn.execute(f'EXPLAIN QUERY PLAN {sql}', params).fetchall():
+            detail = row[-1]
+            if _is_full_scan(detail, filtered):
+                offenders.append((name, detail))
+    return offenders
+
+
+def check_query_plans(conn, queries=None):
+    """Raise RuntimeError if any hot query falls back to a full table scan."""
+    offenders = audit_query_plans(conn, queries)
+    if offenders:
+        summary = '; '.join(f"{name}: {detail}" for name, detail in offenders)
+        raise RuntimeError(f"Hot queries fall back to full scans: {summary}")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    command = sys.argv[1] if len(sys.argv) > 1 else 'check-plans'
+    conn = get_connection()
+    if command == 'migrate':
+        applied = apply_migrations(conn)
+        print(f"Schema version {schema_version(conn)} (applied: {applied or 'none'})")
+    elif command == 'check-plans':
+        offenders = audit_query_plans(conn)
+        for name, detail in offenders:
+            print(f"FULL SCAN  {name}: {detail}")
+        print(f"{len(HOT_QUERIES) - len({n for n, _ in offenders})}/{len(HOT_QUERIES)} hot queries use indexes")
+        conn.close()
+        sys.exit(1 if offenders else 0)
+    else:
+        print("Usage: python db.py [migrate|check-plans]")
+        sys.exit(2)
+    conn.close()
@@ -0,0 +1,49 @@
+"""
+Gunicorn Configuration for the Forensic API
+Preload is opt-in (GUNICORN_PRELOAD=true) and only applies with more than one
+worker. The master then imports api.py and loads the classifier and EasyOCR
+weights once (FORENSIC_PRELOAD_MODELS) before forking, so workers share those
+pages copy-on-write instead of each loading its own copy. The load happens
+before the master binds, so the container's health check start period must
+cover it. Without preload each worker imports api.py itself and the models
+load in the background while /health already answers.
+
+Fork safety: the master pins torch to one thread so no OpenMP pool exists at
+fork time, and gc.freeze() keeps the collector from touching (and so copying)
+the inherited objects. Each worker then sizes its own torch thread pool and
+starts its per-process components (blockchain connection, writer threads).
+
+    WEB_CONCURRENCY=2 gunicorn -c gunicorn.conf.py api:app
+"""
+import gc
+import os
+import sys
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', 1))
+threads = int(os.getenv('GUNICORN_THREADS', 2))
+timeout = 120
+keepalive = 5
+
+preload_app = os.getenv('GUNICORN_PRELOAD', 'false').lower() == 'true' and workers > 1
+if preload_app:
+    # Read by api.py at import time (in the master)
+    os.environ.setdefault('FORENSIC_PRELOAD_MODELS', 'true')
+
+# 0 = split the machine's cores evenly across workers
+TORCH_THREADS_PER_WORKER = int(os.getenv('TORCH_THREADS_PER_WORKER', 0))
+
+
+def pre_fork(server, worker):
+    # Move everything allocated so far out of GC tracking so workers don't dirty it
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    if 'torch' in sys.modules:
+        import torch
+        torch.set_num_threads(TORCH_THREADS_PER_WORKER or max(1, (os.cpu_count() or 1) // workers))
+    if preload_app:
+        # Without preload the worker hasn't imported api.py yet; it starts the registry itself
+        from model_registry import registry
+        registry.start()
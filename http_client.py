@@ -0,0 +1,194 @@
+"""
+Shared Outbound HTTP Client for Forensic Tool
+Every outbound call from the API (X API, Hugging Face inference, Brevo email,
+Google/Facebook OAuth, media downloads for OCR) goes through one client:
+
+  - one pooled keep-alive requests.Session per host, so repeat calls reuse
+    the TCP+TLS connection instead of opening a new one each time
+  - explicit (connect, read) timeouts on every call (HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT unless the caller passes its own)
+  - retry with full-jitter exponential backoff on connection failures and on
+    429/5xx. Idempotent requests (GET, or idempotent=True) retry on all of
+    them; other POSTs only on 429 and connect failures, where the server
+    cannot have acted. A Retry-After longer than HTTP_BACKOFF_MAX_SECONDS is
+    not waited out; the response is returned to the caller instead. X API
+    429s carry x-rate-limit-reset rather than Retry-After; it is treated the
+    same way.
+  - per-host request/error/retry counters and latency percentiles, exposed
+    at /admin/http-metrics
+
+Sessions are created lazily per process (gunicorn forks after import).
+"""
+import os
+import time
+import random
+import threading
+import logging
+from collections import deque
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', 3.05))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', 20))
+HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', 2))
+HTTP_BACKOFF_BASE_SECONDS = float(os.getenv('HTTP_BACKOFF_BASE_SECONDS', 0.5))
+HTTP_BACKOFF_MAX_SECONDS = float(os.getenv('HTTP_BACKOFF_MAX_SECONDS', 8))
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', 10))
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+LATENCY_SAMPLES = 500
+
+
+def _host_of(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _retry_after_seconds(response):
+    value = response.headers.get('Retry-After')
+    try:
+        if value is not None:
+            return max(0.0, float(value))
+        # X API reports its quota window reset as an epoch second instead
+        reset = response.headers.get('x-rate-limit-reset')
+        if reset is not None and response.status_code == 429:
+            return max(0.0, float(reset) - time.time())
+    except ValueError:
+        pass
+    return None
+
+
+class _HostStats:
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.statuses = {}
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def snapshot(self):
+        latencies = sorted(self.latencies)
+
+        def pct(p):
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))], 1) if latencies else None
+
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'retries': self.retries,
+            'statuses': dict(self.statuses),
+            'latency_ms': {
+                'avg': round(sum(latencies) / len(latencies), 1) if latencies else None,
+                'p50': pct(0.5),
+                'p95': pct(0.95),
+                'max': round(latencies[-1], 1) if latencies else None,
+            },
+        }
+
+
+class HttpClient:
+    def __init__(self, pool_size=HTTP_POOL_SIZE, max_retries=HTTP_MAX_RETRIES):
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self._lock = threading.Lock()
+        self._pid = None
+        self._sessions = {}
+        self._stats = {}
+
+    def session_for(self, url):
+        """The pooled session for url's host (also usable by libraries that accept a session)."""
+        host = _host_of(url)
+        with self._lock:
+            if self._pid != os.getpid():
+                # Sockets inherited across fork must not be shared with the parent
+                self._pid = os.getpid()
+                self._sessions = {}
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount(host, adapter)
+                self._sessions[host] = session
+            return session
+
+    def _record(self, host, status=None, elapsed_ms=None, error=False, retry=False):
+        with self._lock:
+            stats = self._stats.setdefault(host, _HostStats())
+            if retry:
+                stats.retries += 1
+                return
+            stats.requests += 1
+            if elapsed_ms is not None:
+                stats.latencies.append(elapsed_ms)
+            if error:
+                stats.errors += 1
+            if status is not None:
+                bucket = f"{status // 100}xx"
+                stats.statuses[bucket] = stats.statuses.get(bucket, 0) + 1
+                if status >= 500:
+                    stats.errors += 1
+
+    def request(self, method, url, timeout=None, retries=None, idempotent=None, **kwargs):
+        """requests.request() over the host's pooled session, with timeouts and retries."""
+        method = method.upper()
+        host = _host_of(url)
+        session = self.session_for(url)
+        timeout = timeout or (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+        retries = self.max_retries if retries is None else retries
+        idempotent = method in IDEMPOTENT_METHODS if idempotent is None else idempotent
+        retry_statuses = RETRY_STATUSES if idempotent else frozenset({429})
+
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                response = session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._record(host, elapsed_ms=(time.perf_counter() - started) * 1000, error=True)
+                # Non-idempotent calls only retry when the request never reached the server
+                retryable = idempotent or isinstance(e, requests.ConnectTimeout)
+                if attempt >= retries or not retryable:
+                    raise
+                delay = self.backoff(attempt)
+                logger.warning(f"{method} {host} failed ({type(e).__name__}); retry {attempt + 1}/{retries} in {delay:.2f}s")
+            else:
+                self._record(host, status=response.status_code, elapsed_ms=(time.perf_counter() - started) * 1000)
+                if response.status_code not in retry_statuses or attempt >= retries:
+                    return response
+                delay = self.backoff(attempt)
+                retry_after = _retry_after_seconds(response)
+                if retry_after is not None:
+                    if retry_after > HTTP_BACKOFF_MAX_SECONDS:
+                        return response
+                    delay = max(delay, retry_after)
+                logger.warning(f"{method} {host} returned {response.status_code}; retry {attempt + 1}/{retries} in {delay:.2f}s")
+                response.close()
+            self._record(host, retry=True)
+            time.sleep(delay)
+            attempt += 1
+
+    def backoff(self, attempt):
+        # Full jitter: uniform in [0, min(max, base * 2^attempt)]
+        return random.uniform(0, min(HTTP_BACKOFF_MAX_SECONDS, HTTP_BACKOFF_BASE_SECONDS * (2 ** attempt)))
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def metrics(self):
+        with self._lock:
+            return {host: stats.snapshot() for host, stats in self._stats.items()}
+
+    def reset_metrics(self):
+        with self._lock:
+            self._stats = {}
+
+
+client = HttpClient()
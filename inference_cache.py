@@ -0,0 +1,159 @@
+"""
+Content-Addressed Inference Result Cache for Forensic Tool
+Caches classifier confidences keyed by SHA-256(clean_for_ai(text) + model version),
+so the same viral post isn't run through the model again when it is fetched,
+re-analyzed after human confirmation, or pulled by another investigator.
+
+Only the raw [safe, defamatory, hate_speech] scores are stored; thresholds and
+justifications are re-applied per request. Tier 1 is an in-process LRU with a
+TTL; tier 2 (INFERENCE_CACHE_SQLITE=true) is the inference_cache table, shared
+by all workers and kept across restarts.
+
+The model version is a fingerprint of the model directory (file names, sizes,
+mtimes) plus the backend name, taken when the model is loaded. Swapping the
+model files therefore changes every key, and rows for other versions are
+purged from the SQLite tier at startup.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+INFERENCE_CACHE_MAX_ENTRIES = int(os.getenv('INFERENCE_CACHE_MAX_ENTRIES', 5000))
+INFERENCE_CACHE_TTL_SECONDS = float(os.getenv('INFERENCE_CACHE_TTL_SECONDS', 24 * 3600))
+INFERENCE_CACHE_SQLITE = os.getenv('INFERENCE_CACHE_SQLITE', 'false').lower() == 'true'
+
+
+def model_fingerprint(model_dir):
+    """Stable hash of a model directory's file listing (path, size, mtime)."""
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(model_dir):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            digest.update(f"{os.path.relpath(path, model_dir)}:{st.st_size}:{st.st_mtime_ns}\n".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def cache_key(cleaned_text, model_version):
+    return hashlib.sha256(f"{model_version}\0{cleaned_text}".encode('utf-8')).hexdigest()
+
+
+class InferenceCache:
+    """Two-tier (memory LRU + optional SQLite) cache of classifier confidences."""
+
+    def __init__(self, max_entries=INFERENCE_CACHE_MAX_ENTRIES, ttl=INFERENCE_CACHE_TTL_SECONDS,
+                 connection_factory=None, use_sqlite=INFERENCE_CACHE_SQLITE):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._connection_factory = connection_factory
+        self.use_sqlite = use_sqlite and connection_factory is not None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {'memory_hits': 0, 'sqlite_hits': 0, 'misses': 0, 'evictions': 0, 'sqlite_errors': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def get(self, key):
+        """Return cached confidences for key, or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._counters['memory_hits'] += 1
+                    return entry[1]
+                del self._entries[key]
+
+        if self.use_sqlite:
+            try:
+                conn = self._connection_factory()
+                row = conn.execute(
+                    'SELECT confidences, created_at FROM inference_cache WHERE cache_key = ?', (key,)
+                ).fetchone()
+                conn.close()
+                if row and row[1] + self.ttl > now:
+                    confidences = json.loads(row[0])
+                    self._remember(key, confidences, row[1] + self.ttl)
+                    self._count('sqlite_hits')
+                    return confidences
+            except Exception as e:
+                logger.warning(f"Inference cache SQLite read failed: {e}")
+                self._count('sqlite_errors')
+
+        self._count('misses')
+        return None
+
+    def put(self, key, model_version, confidences):
+        now = time.time()
+        self._remember(key, list(confidences), now + self.ttl)
+        if self.use_sqlite:
+            try:
+                conn = self._connection_factory()
+                conn.execute(
+                    'INSERT OR REPLACE INTO inference_cache (cache_key, model_version, confidences, created_at) '
+                    'VALUES (?, ?, ?, ?)',
+                    (key, model_version, json.dumps(list(confidences)), now)
+                )
+                conn.commit()
+                conn.close()
+            except Exception as e:
+                logger.warning(f"Inference cache SQLite write failed: {e}")
+                self._count('sqlite_errors')
+
+    def _remember(self, key, confidences, expires_at):
+        with self._lock:
+            self._entries[key] = (expires_at, confidences)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters['evictions'] += 1
+
+    def purge_other_versions(self, model_version):
+        """Drop expired rows and rows from a superseded model/backend (called after the model loads)."""
+        with self._lock:
+            self._entries.clear()
+        if not self.use_sqlite:
+            return 0
+        # Only the same namespace (e.g. "local:") is superseded; other sources keep their rows
+        namespace = model_version.split(':', 1)[0] + ':%'
+        conn = self._connection_factory()
+        cur = conn.execute(
+            'DELETE FROM inference_cache WHERE (model_version != ? AND model_version LIKE ?) OR created_at < ?',
+            (model_version, namespace, time.time() - self.ttl)
+        )
+        conn.commit()
+        conn.close()
+        if cur.rowcount:
+            logger.info(f"Purged {cur.rowcount} stale inference cache rows")
+        return cur.rowcount
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self.use_sqlite:
+            conn = self._connection_factory()
+            conn.execute('DELETE FROM inference_cache')
+            conn.commit()
+            conn.close()
+
+    def metrics(self):
+        with self._lock:
+            counters = dict(self._counters)
+            entries = len(self._entries)
+        hits = counters['memory_hits'] + counters['sqlite_hits']
+        lookups = hits + counters['misses']
+        return dict(counters, entries=entries, hit_rate=round(hits / lookups, 4) if lookups else 0.0,
+                    sqlite_tier=self.use_sqlite, ttl_seconds=self.ttl, max_entries=self.max_entries)
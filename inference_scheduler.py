@@ -0,0 +1,147 @@
+"""
+Micro-Batching Inference Scheduler for Forensic Tool
+Concurrent requests (gunicorn threads) enqueue single texts; one worker thread
+collects them into micro-batches bounded by max_batch_size and max_wait_ms,
+runs one forward pass per batch and resolves each caller's Future.
+
+A lone request waits at most max_wait_ms before running on its own, so the
+knob trades a few milliseconds of latency for shared forward passes under load.
+Queue depth, batch sizes and queue wait times are exposed via metrics().
+"""
+import os
+import time
+import queue
+import threading
+import logging
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+INFERENCE_MAX_BATCH_SIZE = int(os.getenv('INFERENCE_MAX_BATCH_SIZE', 16))
+INFERENCE_MAX_WAIT_MS = float(os.getenv('INFERENCE_MAX_WAIT_MS', 10))
+
+_STOP = object()
+
+
+class MicroBatchScheduler:
+    """Collects submitted items into batches for `batch_fn(items) -> results` (same order)."""
+
+    def __init__(self, batch_fn, max_batch_size=INFERENCE_MAX_BATCH_SIZE, max_wait_ms=INFERENCE_MAX_WAIT_MS, name='inference'):
+        self._batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+        self._start_lock = threading.Lock()
+        self._metrics_lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._reset_metrics()
+
+    def _reset_metrics(self):
+        self._batches = 0
+        self._items = 0
+        self._max_batch = 0
+        self._last_batch = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._run_total = 0.0
+        self._errors = 0
+
+    def _ensure_started(self):
+        # Worker threads don't survive a fork; each process gets its own
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._queue = queue.Queue()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name=f'{self.name}-scheduler', daemon=True)
+            self._thread.start()
+
+    def submit(self, item):
+        """Queue one item and return a Future for its result."""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((item, future, time.monotonic()))
+        return future
+
+    def run(self, item, timeout=None):
+        """Submit and wait for the result (re-raises batch_fn errors)."""
+        return self.submit(item).result(timeout=timeout)
+
+    def close(self, timeout=5.0):
+        if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch = [first]
+            deadline = first[2] + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stopping = True
+                    break
+                batch.append(entry)
+            self._execute(batch)
+
+    def _execute(self, batch):
+        started = time.monotonic()
+        items = [entry[0] for entry in batch]
+        try:
+            results = self._batch_fn(items)
+            if len(results) != len(items):
+                raise RuntimeError(f"batch_fn returned {len(results)} results for {len(items)} items")
+        except Exception as e:
+            logger.error(f"Micro-batch of {len(items)} failed: {e}")
+            with self._metrics_lock:
+                self._errors += 1
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+        finished = time.monotonic()
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
+
+        waits = [started - enqueued for _, _, enqueued in batch]
+        with self._metrics_lock:
+            self._batches += 1
+            self._items += len(batch)
+            self._last_batch = len(batch)
+            self._max_batch = max(self._max_batch, len(batch))
+            self._wait_total += sum(waits)
+            self._wait_max = max(self._wait_max, max(waits))
+            self._run_total += finished - started
+
+    def metrics(self):
+        with self._metrics_lock:
+            batches, items = self._batches, self._items
+            return {
+                'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+                'batches': batches,
+                'items': items,
+                'errors': self._errors,
+                'avg_batch_size': round(items / batches, 2) if batches else 0.0,
+                'last_batch_size': self._last_batch,
+                'max_batch_size_seen': self._max_batch,
+                'avg_queue_wait_ms': round(self._wait_total / items * 1000, 2) if items else 0.0,
+                'max_queue_wait_ms': round(self._wait_max * 1000, 2),
+                'avg_batch_run_ms': round(self._run_total / batches * 1000, 2) if batches else 0.0,
+                'config': {'max_batch_size': self.max_batch_size, 'max_wait_ms': self.max_wait * 1000}
+            }
+
+    def reset_metrics(self):
+        with self._metrics_lock:
+            self._reset_metrics()
@@ -0,0 +1,82 @@
+"""
+Forensic Lexicon Matcher for Forensic Tool
+Finds NCIC, defamatory, security and safe-signifier terms in a post with a
+single pass over its words, instead of one substring scan per lexicon entry.
+
+Terms and text are split into the same word tokens, and terms are stored in a
+token trie (a word-level Aho-Corasick goto graph). Matching walks the trie
+from every token, so:
+  - only whole words match ("dead" no longer fires on "deadline"),
+  - multi-word terms ("Operation Linda Kura") match across any whitespace or
+    punctuation between their words, and overlapping terms are all reported,
+  - cost grows with the length of the post, not the size of the lexicon.
+
+Lexicons are JSON files mapping category -> list of terms (see
+lexicons/forensic_lexicon.json), so NCIC lists can grow to thousands of terms.
+"""
+import re
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r'\w+')
+_TERMS = object()  # trie key holding the (category, term) pairs that end at a node
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text.lower())
+
+
+def load_lexicon_file(path):
+    """Read a {category: [terms]} JSON lexicon file."""
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or not all(isinstance(v, list) for v in data.values()):
+        raise ValueError(f"Lexicon file {path} must map category names to lists of terms")
+    return data
+
+
+class LexiconMatcher:
+    """Compiled, word-boundary-aware matcher over a {category: [terms]} lexicon."""
+
+    def __init__(self, lexicons, categories=()):
+        # Categories always present in match() results, even if the file has no terms for them
+        self.categories = list(dict.fromkeys([*categories, *lexicons]))
+        self._trie = {}
+        self.term_count = 0
+        for category, terms in lexicons.items():
+            for term in terms:
+                tokens = tokenize(term)
+                if not tokens:
+                    logger.warning(f"Skipping lexicon term without words: {term!r}")
+                    continue
+                node = self._trie
+                for token in tokens:
+                    node = node.setdefault(token, {})
+                hits = node.setdefault(_TERMS, [])
+                if (category, term) not in hits:
+                    hits.append((category, term))
+                    self.term_count += 1
+
+    def match(self, text):
+        """Return {category: [terms found]} (each term once, in order of first occurrence)."""
+        found = {category: [] for category in self.categories}
+        if not text:
+            return found
+        seen = set()
+        tokens = tokenize(text)
+        trie = self._trie
+        for start in range(len(tokens)):
+            node = trie.get(tokens[start])
+            offset = start + 1
+            while node is not None:
+                for hit in node.get(_TERMS, ()):
+                    if hit not in seen:
+                        seen.add(hit)
+                        found[hit[0]].append(hit[1])
+                if offset >= len(tokens):
+                    break
+                node = node.get(tokens[offset])
+                offset += 1
+        return found
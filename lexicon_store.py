@@ -0,0 +1,198 @@
+"""
+Versioned Forensic Lexicon Store for Forensic Tool
+Keeps every lexicon the API has used (NCIC, defamatory, security, safe) in the
+lexicon_versions table, identified by an increasing version number and the
+SHA-256 of its canonical JSON. The active version's compiled LexiconMatcher is
+held in memory and swapped atomically on reload, so lexicons can be updated
+without restarting the model-heavy process, and every analysis result can say
+exactly which lexicon produced its markers.
+
+Sources of a new version: lexicons/forensic_lexicon.json (LEXICON_PATH), or a
+{category: [terms]} body posted to the admin reload endpoint. Re-posting an
+existing lexicon re-activates its old version number instead of minting a new
+one, which also makes rollback a plain reload.
+
+The database is authoritative across gunicorn workers: a reload in one worker
+marks the version active, and other workers pick it up within
+LEXICON_SYNC_SECONDS.
+"""
+import os
+import json
+import time
+import hashlib
+import threading
+import logging
+from datetime import datetime
+
+from lexicon_matcher import LexiconMatcher, load_lexicon_file
+
+logger = logging.getLogger(__name__)
+
+LEXICON_CATEGORIES = ('ncic', 'defamatory', 'security', 'safe')
+DEFAULT_LEXICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lexicons', 'forensic_lexicon.json')
+LEXICON_PATH = os.getenv('LEXICON_PATH', DEFAULT_LEXICON_PATH)
+LEXICON_SYNC_SECONDS = float(os.getenv('LEXICON_SYNC_SECONDS', 10))
+
+
+def load_default_lexicons():
+    """The lexicon file as {category: [terms]} (for scripts that don't use the database)."""
+    return load_lexicon_file(LEXICON_PATH)
+
+
+def canonicalize(lexicons):
+    """Validate and normalize a {category: [terms]} mapping; returns (lexicons, canonical JSON)."""
+    if not isinstance(lexicons, dict) or not lexicons:
+        raise ValueError("Lexicon must be a non-empty object mapping categories to term lists")
+    normalized = {}
+    for category, terms in lexicons.items():
+        if not isinstance(terms, list) or not all(isinstance(t, str) for t in terms):
+            raise ValueError(f"Lexicon category '{category}' must be a list of strings")
+        # Trim and drop duplicates (case-insensitive), keeping the first spelling
+        seen = set()
+        normalized[category] = []
+        for term in terms:
+            term = ' '.join(term.split())
+            if term and term.lower() not in seen:
+                seen.add(term.lower())
+                normalized[category].append(term)
+    missing = [c for c in LEXICON_CATEGORIES if c not in normalized]
+    if missing:
+        raise ValueError(f"Lexicon is missing categories: {', '.join(missing)}")
+    return normalized, json.dumps(normalized, sort_keys=True, ensure_ascii=False)
+
+
+class LexiconVersion:
+    """An immutable, compiled lexicon version."""
+
+    def __init__(self, version, sha256, lexicons):
+        self.version = version
+        self.sha256 = sha256
+        self.lexicons = lexicons
+        self.matcher = LexiconMatcher(lexicons, categories=LEXICON_CATEGORIES)
+
+    @property
+    def label(self):
+        """Identifier recorded with analysis results, e.g. 'v3-1a2b3c4d5e6f'."""
+        return f"v{self.version}-{self.sha256[:12]}"
+
+    def info(self):
+        return {
+            'version': self.version,
+            'label': self.label,
+            'sha256': self.sha256,
+            'term_count': self.matcher.term_count,
+            'categories': {category: len(terms) for category, terms in self.lexicons.items()},
+        }
+
+
+class LexiconStore:
+    def __init__(self, connection_factory, path=LEXICON_PATH, sync_interval=LEXICON_SYNC_SECONDS):
+        self._connection_factory = connection_factory
+        self.path = path
+        self.sync_interval = sync_interval
+        self._active = None
+        self._compiled = {}  # version -> LexiconVersion (compiled once per version)
+        self._lock = threading.Lock()
+        self._last_sync = 0.0
+
+    def current(self):
+        """The active LexiconVersion. Cheap; re-checks the database every sync_interval seconds."""
+        active = self._active
+        if active is None or time.monotonic() - self._last_sync > self.sync_interval:
+            try:
+                self.sync()
+            except Exception as e:
+                if self._active is None:
+                    raise
+                logger.warning(f"Lexicon sync failed, keeping {self._active.label}: {e}")
+                self._last_sync = time.monotonic()
+            active = self._active
+        return active
+
+    def bootstrap(self):
+        """Import the lexicon file if its content is new, otherwise keep the database's active version."""
+        lexicons, canonical = canonicalize(load_lexicon_file(self.path))
+        sha256 = hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+        conn = self._connection_factory()
+        known = conn.execute('SELECT 1 FROM lexicon_versions WHERE content_sha256 = ?', (sha256,)).fetchone()
+        conn.close()
+        if known:
+            return self.sync()
+        return self.publish(lexicons, source=os.path.basename(self.path))
+
+    def sync(self):
+        """Adopt the version marked active in the database (e.g. by another worker's reload)."""
+        conn = self._connection_factory()
+        row = conn.execute(
+            'SELECT version, content_sha256, lexicons FROM lexicon_versions '
+            'WHERE activated_at IS NOT NULL ORDER BY activated_at DESC, version DESC LIMIT 1'
+        ).fetchone()
+        conn.close()
+        self._last_sync = time.monotonic()
+        if row is None:
+            return self.bootstrap()
+        with self._lock:
+            if self._active is None or self._active.version != row[0]:
+                self._active = self._compile(row[0], row[1], json.loads(row[2]))
+                logger.info(f"Lexicon {self._active.label} active ({self._active.matcher.term_count} terms)")
+        return self._active
+
+    def reload(self, lexicons=None, user_id=None):
+        """Publish lexicons (or re-read the lexicon file) and make it the active version."""
+        if lexicons is None:
+            return self.publish(load_lexicon_file(self.path), source=os.path.basename(self.path), user_id=user_id)
+        return self.publish(lexicons, source='admin_upload', user_id=user_id)
+
+    def publish(self, lexicons, source=None, user_id=None):
+        lexicons, canonical = canonicalize(lexicons)
+        sha256 = hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+        term_count = sum(len(terms) for terms in lexicons.values())
+        now = datetime.now().isoformat()
+        conn = self._connection_factory()
+        try:
+            conn.execute(
+                'INSERT OR IGNORE INTO lexicon_versions '
+                '(content_sha256, lexicons, term_count, source, created_by, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (sha256, canonical, term_count, source, user_id, now)
+            )
+            conn.execute('UPDATE lexicon_versions SET activated_at = ? WHERE content_sha256 = ?', (now, sha256))
+            version = conn.execute('SELECT version FROM lexicon_versions WHERE content_sha256 = ?',
+                                   (sha256,)).fetchone()[0]
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        with self._lock:
+            self._active = self._compile(version, sha256, lexicons)
+            self._last_sync = time.monotonic()
+        logger.info(f"Lexicon {self._active.label} published from {source} ({term_count} terms)")
+        return self._active
+
+    def activate(self, version, user_id=None):
+        """Re-activate a previously published version (rollback)."""
+        conn = self._connection_factory()
+        row = conn.execute('SELECT lexicons FROM lexicon_versions WHERE version = ?', (version,)).fetchone()
+        conn.close()
+        if row is None:
+            raise LookupError(f"Lexicon version {version} does not exist")
+        return self.publish(json.loads(row[0]), source=f'rollback:v{version}', user_id=user_id)
+
+    def _compile(self, version, sha256, lexicons):
+        if version not in self._compiled:
+            self._compiled[version] = LexiconVersion(version, sha256, lexicons)
+        return self._compiled[version]
+
+    def history(self, limit=50):
+        conn = self._connection_factory()
+        rows = conn.execute(
+            'SELECT version, content_sha256, term_count, source, created_by, created_at, activated_at '
+            'FROM lexicon_versions ORDER BY version DESC LIMIT ?', (limit,)
+        ).fetchall()
+        conn.close()
+        return [
+            {'version': r[0], 'sha256': r[1], 'term_count': r[2], 'source': r[3],
+             'created_by': r[4], 'created_at': r[5], 'activated_at': r[6]}
+            for r in rows
+        ]
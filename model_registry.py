@@ -0,0 +1,110 @@
+"""
+Background Model Registry for Forensic Tool
+Loads heavy components (Afro-XLMR classifier, EasyOCR reader, blockchain
+connection) in background threads so importing api.py, and therefore
+gunicorn boot and /health, no longer waits on them.
+
+Each component moves through pending -> loading -> ready | failed | disabled.
+A loader returning None means the component is intentionally off (e.g. the
+model directory is absent, or the HF API is used instead).
+
+Routes call get(name, timeout) to wait a bounded time for a component and
+fall back (HF API, "service_unavailable") when it isn't ready.
+"""
+import os
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+PENDING, LOADING, READY, FAILED, DISABLED = 'pending', 'loading', 'ready', 'failed', 'disabled'
+
+
+class _Component:
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self.state = PENDING
+        self.value = None
+        self.error = None
+        self.load_seconds = None
+        self.ready = threading.Event()  # set once the component reaches a final state
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._components = {}
+        self._lock = threading.Lock()
+        self._started_pid = None
+
+    def register(self, name, loader):
+        """Register loader() for name. Must be called before start()."""
+        self._components[name] = _Component(name, loader)
+
+    def start(self):
+        """Start one loader thread per component (once per process)."""
+        with self._lock:
+            if self._started_pid == os.getpid():
+                return
+            self._started_pid = os.getpid()
+            for component in self._components.values():
+                threading.Thread(target=self._load, args=(component,),
+                                 name=f'load-{component.name}', daemon=True).start()
+
+    def load_now(self, name):
+        """Load a component synchronously in the calling thread (e.g. before fork)."""
+        component = self._components[name]
+        self._load(component)
+        component.ready.wait()
+        return component.value
+
+    def _load(self, component):
+        with self._lock:
+            if component.state != PENDING:
+                return
+            component.state = LOADING
+        started = time.perf_counter()
+        try:
+            value = component.loader()
+            component.value = value
+            component.state = READY if value is not None else DISABLED
+        except Exception as e:
+            component.error = str(e)
+            component.state = FAILED
+            logger.error(f"Component '{component.name}' failed to load: {e}")
+        component.load_seconds = round(time.perf_counter() - started, 2)
+        component.ready.set()
+        logger.info(f"Component '{component.name}' {component.state} after {component.load_seconds}s")
+
+    def get(self, name, timeout=0):
+        """Return the component's value, waiting up to timeout seconds; None if not ready."""
+        component = self._components.get(name)
+        if component is None:
+            return None
+        if component.state != READY and timeout:
+            component.ready.wait(timeout)
+        return component.value if component.state == READY else None
+
+    def state(self, name):
+        component = self._components.get(name)
+        return component.state if component else None
+
+    def status(self):
+        return {
+            name: {'state': c.state, 'load_seconds': c.load_seconds, 'error': c.error}
+            for name, c in self._components.items()
+        }
+
+    def _after_fork_in_child(self):
+        # Loader threads don't survive fork; anything mid-load must be retried by start()
+        self._lock = threading.Lock()
+        self._started_pid = None
+        for component in self._components.values():
+            if component.state == LOADING:
+                component.state = PENDING
+                component.ready = threading.Event()
+
+
+registry = ModelRegistry()
+os.register_at_fork(after_in_child=registry._after_fork_in_child)
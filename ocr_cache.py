@@ -0,0 +1,180 @@
+"""
+Perceptual-Hash OCR Result Cache for Forensic Tool
+The same meme images are reposted across many tweets, often re-encoded or
+resized. Every OCR result is stored in the ocr_cache table under two keys:
+
+  sha256 - of the downloaded bytes; an exact repost hits before decoding
+  dhash  - a 64-bit difference hash of the decoded image; with
+           OCR_PHASH_THRESHOLD > 0, a re-encoded or resized copy within that
+           many bits (Hamming distance) and with the same aspect ratio hits
+           before EasyOCR runs
+
+Near hits are off by default (OCR_PHASH_THRESHOLD=0): a dHash of a 9x8
+thumbnail barely moves when only the caption on a meme template changes, so
+a near hit can return another image's text, which would then be stored as
+this post's evidence. Only enable it where that trade-off is acceptable;
+near hits are reported with match "perceptual" and their distance.
+
+Near-duplicate lookup uses multi-index hashing: the dHash is split into four
+16-bit bands, each indexed, and only rows sharing at least one band are
+compared. Any hash within 3 bits of a stored one always shares a band, so
+thresholds up to 3 find every match; larger thresholds are best-effort.
+
+Rows are tagged with the OCR configuration (languages, max side length), so
+changing how OCR runs doesn't serve results produced the old way.
+"""
+import os
+import json
+import time
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+OCR_CACHE_ENABLED = os.getenv('OCR_CACHE_ENABLED', 'true').lower() == 'true'
+OCR_PHASH_THRESHOLD = int(os.getenv('OCR_PHASH_THRESHOLD', 0))  # 0 = exact SHA-256 hits only
+OCR_ASPECT_TOLERANCE = 0.02  # near hits must match the stored image's width/height ratio this closely
+
+
+def dhash(image, size=8):
+    """64-bit difference hash of a PIL image (signed, so it fits an SQLite INTEGER)."""
+    from PIL import Image
+
+    small = image.convert('L').resize((size + 1, size), Image.BILINEAR)
+    pixels = small.tobytes()
+    value = 0
+    for row in range(size):
+        offset = row * (size + 1)
+        for col in range(size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def hamming(a, b):
+    return ((a ^ b) & 0xFFFFFFFFFFFFFFFF).bit_count()
+
+
+def _bands(value):
+    value &= 0xFFFFFFFFFFFFFFFF
+    return [(value >> shift) & 0xFFFF for shift in (48, 32, 16, 0)]
+
+
+def serialize_boxes(results):
+    """EasyOCR readtext results -> JSON-safe [{box, text, confidence}] (numpy types converted)."""
+    return [
+        {'box': [[int(x), int(y)] for x, y in box], 'text': text, 'confidence': round(float(confidence), 4)}
+        for box, text, confidence in results
+    ]
+
+
+class OcrCache:
+    def __init__(self, connection_factory, ocr_config, threshold=OCR_PHASH_THRESHOLD, enabled=OCR_CACHE_ENABLED):
+        self._connection_factory = connection_factory
+        self.ocr_config = ocr_config
+        self.threshold = threshold
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters = {'exact_hits': 0, 'near_hits': 0, 'misses': 0, 'stores': 0, 'errors': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _hit(self, conn, sha256, kind):
+        conn.execute('UPDATE ocr_cache SET hits = hits + 1 WHERE sha256 = ? AND ocr_config = ?',
+                     (sha256, self.ocr_config))
+        conn.commit()
+        self._count(kind)
+
+    def get_exact(self, sha256):
+        """Cached {text, boxes, match} for identical bytes, or None. Doesn't count a miss."""
+        if not self.enabled:
+            return None
+        try:
+            conn = self._connection_factory()
+            row = conn.execute('SELECT text, boxes FROM ocr_cache WHERE sha256 = ? AND ocr_config = ?',
+                               (sha256, self.ocr_config)).fetchone()
+            if row:
+                self._hit(conn, sha256, 'exact_hits')
+            conn.close()
+        except Exception as e:
+            logger.warning(f"OCR cache lookup failed: {e}")
+            self._count('errors')
+            return None
+        return {'text': row[0], 'boxes': json.loads(row[1]), 'match': 'exact'} if row else None
+
+    def get_similar(self, image_hash, width, height):
+        """
+        Closest cached result within the Hamming threshold and with the same aspect ratio,
+        or None (counts a miss). Always None with threshold 0.
+        """
+        if not self.enabled:
+            return None
+        if self.threshold <= 0:
+            self._count('misses')
+            return None
+        try:
+            conn = self._connection_factory()
+            bands = _bands(image_hash)
+            rows = conn.execute(
+                'SELECT sha256, dhash, text, boxes, width, height FROM ocr_cache WHERE ocr_config = ? AND '
+                '(band0 = ? OR band1 = ? OR band2 = ? OR band3 = ?)',
+                (self.ocr_config, *bands)
+            ).fetchall()
+            best = None
+            for row in rows:
+                distance = hamming(image_hash, row[1])
+                if distance > self.threshold or (best is not None and distance >= best[0]):
+                    continue
+                # dHash ignores proportions: a crop or a differently framed template can collide
+                stored_ratio = row[4] / row[5] if row[4] and row[5] else None
+                if stored_ratio is None or abs(width / height - stored_ratio) > OCR_ASPECT_TOLERANCE * stored_ratio:
+                    continue
+                best = (distance, row)
+            if best:
+                self._hit(conn, best[1][0], 'near_hits')
+            conn.close()
+        except Exception as e:
+            logger.warning(f"OCR cache lookup failed: {e}")
+            self._count('errors')
+            return None
+        if best is None:
+            self._count('misses')
+            return None
+        distance, row = best
+        return {'text': row[2], 'boxes': json.loads(row[3]), 'match': 'perceptual', 'distance': distance}
+
+    def put(self, sha256, image_hash, text, boxes, width=None, height=None):
+        if not self.enabled:
+            return
+        try:
+            conn = self._connection_factory()
+            conn.execute(
+                'INSERT OR REPLACE INTO ocr_cache (sha256, ocr_config, dhash, band0, band1, band2, band3, '
+                'text, boxes, width, height, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (sha256, self.ocr_config, image_hash, *_bands(image_hash), text, json.dumps(boxes),
+                 width, height, time.time())
+            )
+            conn.commit()
+            conn.close()
+            self._count('stores')
+        except Exception as e:
+            logger.warning(f"OCR cache write failed: {e}")
+            self._count('errors')
+
+    def metrics(self):
+        with self._lock:
+            counters = dict(self._counters)
+        hits = counters['exact_hits'] + counters['near_hits']
+        lookups = hits + counters['misses']
+        stats = dict(counters, hit_rate=round(hits / lookups, 4) if lookups else 0.0,
+                     threshold=self.threshold, ocr_config=self.ocr_config, enabled=self.enabled)
+        if self.enabled:
+            try:
+                conn = self._connection_factory()
+                stats['entries'] = conn.execute('SELECT COUNT(*) FROM ocr_cache WHERE ocr_config = ?',
+                                                (self.ocr_config,)).fetchone()[0]
+                conn.close()
+            except Exception as e:
+                logger.warning(f"OCR cache stats failed: {e}")
+        return stats
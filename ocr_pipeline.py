@@ -0,0 +1,235 @@
+"""
+Media OCR Pipeline for Forensic Tool
+Extracts text from a post's media attachments for /fetch-x-post.
+
+Stages, per image:
+  download  - all URLs fetched concurrently through the shared http_client
+              (pooled keep-alive sessions; at most OCR_MAX_DOWNLOADS in flight
+              per process)
+  decode    - decoded once with Pillow, converted to grayscale (OCR_GRAYSCALE)
+              and downscaled so the longest side is at most OCR_MAX_SIDE pixels
+  cache     - with an OcrCache, identical bytes (SHA-256) skip decoding;
+              near-identical images (dHash) skip OCR only when
+              OCR_PHASH_THRESHOLD is raised above its default of 0
+  ocr       - EasyOCR on a process-wide pool of OCR_WORKERS threads so
+              concurrent requests can't oversubscribe the CPU. With
+              OCR_DETECT_FIRST the text detector runs on its own first:
+              images with no text regions never reach the recognizer, and
+              the detected crops go through it OCR_BATCH_SIZE at a time.
+
+Run scripts/bench_ocr.py to compare these settings for recall and wall time.
+
+Each request has a deadline (OCR_DEADLINE_SECONDS). Images that are not done
+by then are reported as "timeout" and whatever text was extracted so far is
+returned (partial=True). A readtext call that is already running cannot be
+interrupted; it finishes in the background and its result is discarded.
+"""
+import io
+import os
+import hashlib
+import time
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import requests
+
+from http_client import client as http_client
+from ocr_cache import dhash, serialize_boxes
+
+logger = logging.getLogger(__name__)
+
+OCR_MAX_DOWNLOADS = int(os.getenv('OCR_MAX_DOWNLOADS', 8))
+OCR_WORKERS = int(os.getenv('OCR_WORKERS', 2))
+OCR_DEADLINE_SECONDS = float(os.getenv('OCR_DEADLINE_SECONDS', 20))
+OCR_MAX_SIDE = int(os.getenv('OCR_MAX_SIDE', 1600))
+OCR_MAX_IMAGE_BYTES = int(os.getenv('OCR_MAX_IMAGE_BYTES', 10 * 1024 * 1024))
+OCR_GRAYSCALE = os.getenv('OCR_GRAYSCALE', 'true').lower() == 'true'
+OCR_DETECT_FIRST = os.getenv('OCR_DETECT_FIRST', 'true').lower() == 'true'
+OCR_BATCH_SIZE = int(os.getenv('OCR_BATCH_SIZE', 8))
+OCR_DOWNLOAD_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+
+
+class ImageTooLarge(Exception):
+    pass
+
+
+def ocr_config_tag(languages, max_side=OCR_MAX_SIDE, grayscale=OCR_GRAYSCALE):
+    """Identifies settings that change OCR output (used to partition the OCR cache)."""
+    return f"easyocr:{'+'.join(languages)}:{max_side}:{'gray' if grayscale else 'rgb'}"
+
+
+def decode_image(data, max_side=OCR_MAX_SIDE, grayscale=OCR_GRAYSCALE):
+    """Decode image bytes once into a PIL image (L or RGB) whose longest side is <= max_side."""
+    from PIL import Image
+
+    mode = 'L' if grayscale else 'RGB'
+    image = Image.open(io.BytesIO(data))
+    image.draft(mode, (max_side, max_side))  # JPEG: let the decoder downscale (and drop chroma) for free
+    image = image.convert(mode)
+    if max(image.size) > max_side:
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+    return image
+
+
+class OcrPipeline:
+    def __init__(self, cache=None, max_downloads=OCR_MAX_DOWNLOADS, ocr_workers=OCR_WORKERS, max_side=OCR_MAX_SIDE,
+                 grayscale=OCR_GRAYSCALE, detect_first=OCR_DETECT_FIRST, batch_size=OCR_BATCH_SIZE):
+        self.cache = cache
+        self.max_downloads = max_downloads
+        self.ocr_workers = ocr_workers
+        self.max_side = max_side
+        self.grayscale = grayscale
+        self.detect_first = detect_first
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._pid = None
+        self._download_pool = None
+        self._ocr_pool = None
+
+    def _ensure_started(self):
+        # Thread pools don't survive fork; (re)create them lazily in each worker
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._download_pool = ThreadPoolExecutor(max_workers=self.max_downloads, thread_name_prefix='ocr-fetch')
+            self._ocr_pool = ThreadPoolExecutor(max_workers=self.ocr_workers, thread_name_prefix='ocr')
+
+    def _fetch_and_decode(self, url):
+        """Download and decode url; returns a dict with either 'image' (needs OCR) or 'cached'."""
+        import numpy as np
+
+        timings = {}
+        started = time.perf_counter()
+        resp = http_client.get(url, timeout=OCR_DOWNLOAD_TIMEOUT, stream=True, retries=1)
+        try:
+            resp.raise_for_status()
+            data = resp.raw.read(OCR_MAX_IMAGE_BYTES + 1, decode_content=True)
+        finally:
+            resp.close()
+        if len(data) > OCR_MAX_IMAGE_BYTES:
+            raise ImageTooLarge(f"larger than {OCR_MAX_IMAGE_BYTES} bytes")
+        timings['download_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        fetched = {'timings': timings, 'bytes': len(data), 'sha256': hashlib.sha256(data).hexdigest()}
+
+        if self.cache is not None:
+            cached = self.cache.get_exact(fetched['sha256'])
+            if cached is not None:
+                return dict(fetched, cached=cached)
+
+        started = time.perf_counter()
+        try:
+            image = decode_image(data, self.max_side, self.grayscale)
+        except Exception as e:
+            raise ValueError(f"decode failed: {e}")
+        fetched['shape'] = [image.height, image.width]
+        if self.cache is not None:
+            fetched['dhash'] = dhash(image)
+            cached = self.cache.get_similar(fetched['dhash'], image.width, image.height)
+            if cached is not None:
+                timings['decode_ms'] = round((time.perf_counter() - started) * 1000, 1)
+                return dict(fetched, cached=cached)
+        fetched['image'] = np.asarray(image)
+        timings['decode_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        return fetched
+
+    def recognize(self, reader, image):
+        """OCR a decoded array; returns (readtext-style results, {detect_ms, recognize_ms, regions})."""
+        timings = {}
+        if not self.detect_first:
+            started = time.perf_counter()
+            results = reader.readtext(image, batch_size=self.batch_size)
+            timings['recognize_ms'] = round((time.perf_counter() - started) * 1000, 1)
+            return results, timings
+
+        started = time.perf_counter()
+        horizontal_list, free_list = reader.detect(image, canvas_size=self.max_side)
+        timings['detect_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        # detect() returns one list per input image
+        horizontal_list, free_list = horizontal_list[0], free_list[0]
+        timings['regions'] = len(horizontal_list) + len(free_list)
+        if not timings['regions']:
+            return [], timings
+
+        started = time.perf_counter()
+        results = reader.recognize(image, horizontal_list, free_list, batch_size=self.batch_size)
+        timings['recognize_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        return results, timings
+
+    def _ocr(self, reader, fetched):
+        started = time.perf_counter()
+        results, timings = self.recognize(reader, fetched['image'])
+        timings['ocr_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        text = ' '.join(r[1] for r in results).strip()
+        if self.cache is not None:
+            height, width = fetched['shape']
+            self.cache.put(fetched['sha256'], fetched['dhash'], text, serialize_boxes(results), width, height)
+        return text, timings
+
+    def process(self, urls, reader, deadline_seconds=OCR_DEADLINE_SECONDS):
+        """Download, decode and OCR urls; returns per-image results, joined text and stage timings."""
+        self._ensure_started()
+        started = time.perf_counter()
+        deadline = started + deadline_seconds
+        images = [{'url': url, 'status': 'pending', 'text': ''} for url in urls]
+
+        pending = {}
+        for index, url in enumerate(urls):
+            pending[self._download_pool.submit(self._fetch_and_decode, url)] = ('fetch', index)
+
+        while pending:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            done, _ = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, index = pending.pop(future)
+                entry = images[index]
+                try:
+                    if stage == 'fetch':
+                        fetched = future.result()
+                        entry.update(fetched['timings'], bytes=fetched['bytes'], sha256=fetched['sha256'])
+                        if 'shape' in fetched:
+                            entry['shape'] = fetched['shape']
+                        if 'cached' in fetched:
+                            entry['cache'] = fetched['cached']['match']
+                            entry['text'] = fetched['cached']['text']
+                            entry['status'] = 'extracted' if entry['text'] else 'no_text_detected'
+                        else:
+                            pending[self._ocr_pool.submit(self._ocr, reader, fetched)] = ('ocr', index)
+                    else:
+                        entry['text'], timings = future.result()
+                        entry.update(timings)
+                        entry['status'] = 'extracted' if entry['text'] else 'no_text_detected'
+                except ImageTooLarge as e:
+                    entry.update(status='too_large', error=str(e))
+                except ValueError as e:
+                    entry.update(status='decode_failed', error=str(e))
+                except requests.RequestException as e:
+                    entry.update(status='download_failed', error=str(e))
+                except Exception as e:
+                    entry.update(status='ocr_failed', error=str(e))
+                    logger.error(f"OCR failed for {entry['url']}: {e}")
+
+        for future, (stage, index) in pending.items():
+            future.cancel()
+            images[index]['status'] = 'timeout'
+            images[index]['timed_out_in'] = 'download' if stage == 'fetch' else 'ocr'
+        if pending:
+            logger.warning(f"OCR deadline of {deadline_seconds}s hit with {len(pending)} of {len(urls)} images unfinished")
+
+        texts = [entry['text'] for entry in images if entry['text']]
+        return {
+            'text': ' | '.join(texts),
+            'found': bool(texts),
+            'partial': bool(pending),
+            'images': images,
+            'timings': {
+                'download_ms': round(sum(e.get('download_ms', 0) for e in images), 1),
+                'decode_ms': round(sum(e.get('decode_ms', 0) for e in images), 1),
+                'ocr_ms': round(sum(e.get('ocr_ms', 0) for e in images), 1),
+                'wall_ms': round((time.perf_counter() - started) * 1000, 1),
+            },
+        }
+
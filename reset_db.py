@@ -14,6 +14,11 @@ def reset_database():
             'stored_evidence',
             'audit_logs',
             'requests_log',
+            'daily_rollups',
+            'audit_checkpoints',
+            'inference_cache',
+            'ocr_cache',
+            'x_tweet_cache',
             'users' # Included because user said "delete everything" to "start fresh"
         ]
         
@@ -0,0 +1,97 @@
+"""
+Admin Route Authorization Benchmark
+Compares the per-request auth cost of an /admin/* route before and after
+admin_required:
+
+  before: token_required SELECT is_active + in-route SELECT is_admin
+  after:  token_required + admin_required both served by user_cache
+
+Runs against a throwaway database so it never touches forensic.db.
+Usage: python scripts/bench_admin_auth.py [iterations]
+"""
+import os
+import sys
+import time
+import tempfile
+import statistics
+
+_tmp_dir = tempfile.mkdtemp(prefix='bench_admin_auth_')
+os.environ['FORENSIC_DB_PATH'] = os.path.join(_tmp_dir, 'bench.db')
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import db
+from user_cache import get_user_status, user_status_cache
+
+ADMIN_ID = 1
+
+
+def setup():
+    conn = db.get_connection()
+    conn.execute('''CREATE TABLE users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE, password TEXT, email TEXT,
+        is_active INTEGER DEFAULT 0, is_admin INTEGER DEFAULT 0, account_status TEXT DEFAULT 'active')''')
+    conn.executemany(
+        'INSERT INTO users (username, password, email, is_active, is_admin) VALUES (?, ?, ?, 1, ?)',
+        [(f'user{i}', 'x', f'user{i}@example.com', 1 if i == 0 else 0) for i in range(1000)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def legacy_auth(user_id):
+    # token_required
+    conn = db.get_connection()
+    c = conn.cursor()
+    c.execute('SELECT is_active FROM users WHERE id = ?', (user_id,))
+    result = c.fetchone()
+    conn.close()
+    if not result or result[0] == 0:
+        return False
+    # in-route admin check
+    conn = db.get_connection()
+    c = conn.cursor()
+    c.execute('SELECT is_admin FROM users WHERE id = ?', (user_id,))
+    is_admin = c.fetchone()[0]
+    conn.close()
+    return bool(is_admin)
+
+
+def cached_auth(user_id):
+    # token_required
+    status = get_user_status(user_id)
+    if not status or status['is_active'] == 0 or status['account_status'] == 'suspended':
+        return False
+    # admin_required
+    return bool(get_user_status(user_id)['is_admin'])
+
+
+def measure(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        assert fn(ADMIN_ID)
+        samples.append((time.perf_counter() - started) * 1e6)
+    samples.sort()
+    return {
+        'mean': statistics.mean(samples),
+        'p50': samples[len(samples) // 2],
+        'p99': samples[int(len(samples) * 0.99) - 1]
+    }
+
+
+if __name__ == '__main__':
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    setup()
+    measure(legacy_auth, 1000)  # warm page cache and statement cache
+
+    user_status_cache.clear()
+    before = measure(legacy_auth, iterations)
+    after = measure(cached_auth, iterations)
+    db.close_all()
+
+    print(f"Admin route auth overhead over {iterations} requests (microseconds)")
+    print(f"{'':<28}{'mean':>10}{'p50':>10}{'p99':>10}")
+    for label, result in (('before (2 queries/request)', before), ('after (cached role)', after)):
+        print(f"{label:<28}{result['mean']:>10.1f}{result['p50']:>10.1f}{result['p99']:>10.1f}")
+    print(f"Speedup (mean): {before['mean'] / after['mean']:.1f}x")
+    print(f"Cache stats: {user_status_cache.stats()}")
@@ -0,0 +1,188 @@
+"""
+OCR Pre-processing Benchmark for the Forensic API
+Runs EasyOCR over a fixture set under several pre-processing configurations
+and reports text recall and wall time per image for each.
+
+    python scripts/bench_ocr.py generate [--fixtures fixtures/ocr]   # synthetic fixture set
+    python scripts/bench_ocr.py bench [--fixtures fixtures/ocr] [--repeat 1]
+
+A fixture set is a directory of images plus labels.json mapping each file
+name to the text it contains ("" for images without text). `generate` renders
+a deterministic synthetic set (memes, screenshots, full-size phone photos,
+text-free photos); drop real screenshots and their transcriptions into the
+same directory to benchmark on real media.
+
+Recall is the share of expected words found in the OCR output. Wall time
+covers decode + pre-processing + OCR, not download. Run from the repository
+root; needs easyocr and Pillow.
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ocr_pipeline import OcrPipeline, decode_image
+
+FIXTURES_DIR = 'fixtures/ocr'
+LANGUAGES = ['en', 'sw']
+
+# name -> (max_side or None for raw bytes, grayscale, detect_first, batch_size)
+CONFIGS = {
+    'raw-readtext': (None, False, False, 1),   # previous behaviour: full-resolution bytes
+    'downscale-1600': (1600, False, False, 1),
+    'downscale-1600-gray': (1600, True, False, 1),
+    'pipeline-1600': (1600, True, True, 8),     # API defaults
+    'pipeline-1024': (1024, True, True, 8),
+}
+
+PHRASES = [
+    "Huyu mwanasiasa ni mwizi wa mali ya umma",
+    "BREAKING NEWS county budget report released today",
+    "Vote wisely this election season",
+    "Wakenya tuungane pamoja kwa amani",
+    "They stole the relief food meant for families",
+    "Official statement from the ministry of health",
+]
+
+
+def _font(size):
+    from PIL import ImageFont
+    for name in ('DejaVuSans-Bold.ttf', 'DejaVuSans.ttf', 'Arial.ttf'):
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=size)
+
+
+def generate(fixtures_dir, seed=7):
+    from PIL import Image, ImageDraw, ImageFilter
+
+    rng = random.Random(seed)
+    os.makedirs(fixtures_dir, exist_ok=True)
+    labels = {}
+    # (kind, size, font size, JPEG?)
+    layouts = [
+        ('meme', (800, 800), 48, True),
+        ('screenshot', (1170, 2532), 56, False),
+        ('photo', (4032, 3024), 160, True),
+        ('banner', (1600, 400), 64, False),
+    ]
+    for index, phrase in enumerate(PHRASES):
+        kind, size, font_size, jpeg = layouts[index % len(layouts)]
+        background = tuple(rng.randint(150, 255) for _ in range(3))
+        image = Image.new('RGB', size, background)
+        draw = ImageDraw.Draw(image)
+        # Clutter so the detector has something besides the text to look at
+        for _ in range(30):
+            x, y = rng.randint(0, size[0]), rng.randint(0, size[1])
+            r = rng.randint(10, size[0] // 10)
+            draw.ellipse((x, y, x + r, y + r), fill=tuple(rng.randint(100, 255) for _ in range(3)))
+        font = _font(font_size)
+        phrase_words, lines, line = phrase.split(), [], ''
+        for word in phrase_words:
+            candidate = f"{line} {word}".strip()
+            if draw.textlength(candidate, font=font) > size[0] * 0.85 and line:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        lines.append(line)
+        y = size[1] // 3
+        for text_line in lines:
+            draw.text((size[0] * 0.07, y), text_line, fill=(0, 0, 0), font=font)
+            y += int(font_size * 1.4)
+        name = f"{index:02d}_{kind}.{'jpg' if jpeg else 'png'}"
+        if jpeg:
+            image.save(os.path.join(fixtures_dir, name), quality=85)
+        else:
+            image.save(os.path.join(fixtures_dir, name))
+        labels[name] = phrase
+
+    # Text-free photos: the detector should stop these before recognition
+    for index in range(3):
+        image = Image.effect_noise((3024, 4032), rng.randint(20, 60)).convert('RGB').filter(ImageFilter.GaussianBlur(4))
+        name = f"{len(PHRASES) + index:02d}_notext.jpg"
+        image.save(os.path.join(fixtures_dir, name), quality=85)
+        labels[name] = ""
+
+    with open(os.path.join(fixtures_dir, 'labels.json'), 'w', encoding='utf-8') as f:
+        json.dump(labels, f, indent=2, ensure_ascii=False)
+    print(f"Wrote {len(labels)} fixtures to {fixtures_dir}")
+
+
+def words(text):
+    return re.findall(r'\w+', text.lower())
+
+
+def recall(expected, found):
+    expected_words = words(expected)
+    if not expected_words:
+        return None
+    found_words = set(words(found))
+    return sum(1 for w in expected_words if w in found_words) / len(expected_words)
+
+
+def bench(fixtures_dir, repeat):
+    import easyocr
+    import numpy as np
+
+    with open(os.path.join(fixtures_dir, 'labels.json'), encoding='utf-8') as f:
+        labels = json.load(f)
+    fixtures = {name: open(os.path.join(fixtures_dir, name), 'rb').read() for name in labels}
+    print(f"Loading EasyOCR ({', '.join(LANGUAGES)}) ...")
+    reader = easyocr.Reader(LANGUAGES, gpu=False)
+
+    rows = []
+    for config, (max_side, grayscale, detect_first, batch_size) in CONFIGS.items():
+        pipeline = OcrPipeline(max_side=max_side or 0, grayscale=grayscale,
+                               detect_first=detect_first, batch_size=batch_size)
+        samples, recalls, text_free, text_free_clean = [], [], 0, 0
+        for _ in range(repeat):
+            for name, data in fixtures.items():
+                started = time.perf_counter()
+                if max_side is None:
+                    results = reader.readtext(data)
+                else:
+                    image = np.asarray(decode_image(data, max_side, grayscale))
+                    results, _ = pipeline.recognize(reader, image)
+                samples.append((time.perf_counter() - started) * 1000)
+                text = ' '.join(r[1] for r in results)
+                score = recall(labels[name], text)
+                if score is None:
+                    text_free += 1
+                    text_free_clean += not text.strip()
+                else:
+                    recalls.append(score)
+        samples.sort()
+        rows.append({
+            'config': config,
+            'mean_ms': round(sum(samples) / len(samples), 1),
+            'p95_ms': round(samples[max(0, int(len(samples) * 0.95) - 1)], 1),
+            'total_s': round(sum(samples) / 1000, 2),
+            'recall': round(sum(recalls) / len(recalls), 4) if recalls else None,
+            'notext_clean': f"{text_free_clean}/{text_free}",
+        })
+        print(json.dumps(rows[-1]))
+
+    print(f"\n{'config':<22}{'mean ms':>9}{'p95 ms':>9}{'total s':>9}{'recall':>8}{'no-text ok':>12}")
+    for r in rows:
+        print(f"{r['config']:<22}{r['mean_ms']:>9}{r['p95_ms']:>9}{r['total_s']:>9}{str(r['recall']):>8}{r['notext_clean']:>12}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['generate', 'bench'])
+    parser.add_argument('--fixtures', default=FIXTURES_DIR)
+    parser.add_argument('--repeat', type=int, default=1)
+    args = parser.parse_args()
+
+    if args.command == 'generate':
+        generate(args.fixtures)
+    else:
+        bench(args.fixtures, args.repeat)
@@ -0,0 +1,86 @@
+"""
+Cold-Start Benchmark for the Forensic API
+Starts a fresh interpreter, imports api.py and requests /health through the
+Flask test client, then asserts the first /health answer arrives within the
+limit (default 1 second) of process start. Model, OCR and blockchain loading
+happen in the background and must not hold it up.
+
+    python scripts/bench_startup.py [--limit 1.0] [--wait 300]
+
+--wait additionally polls /health until every component has settled and
+prints per-component load times. Run from the repository root with the same
+.env the server uses.
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+CHILD = r'''
+import time, json, sys
+t0 = time.perf_counter()
+sys.path.insert(0, '.')
+import api
+imported = time.perf_counter()
+client = api.app.test_client()
+resp = client.get('/health')
+answered = time.perf_counter()
+body = resp.get_json()
+print(json.dumps({'event': 'first_health', 'status_code': resp.status_code,
+                  'import_seconds': round(imported - t0, 3),
+                  'health_ms': round((answered - imported) * 1000, 2),
+                  'total_seconds': round(answered - t0, 3),
+                  'components': body.get('components')}), flush=True)
+wait = float(sys.argv[1])
+deadline = time.perf_counter() + wait
+while wait and time.perf_counter() < deadline:
+    body = client.get('/health').get_json()
+    if body.get('ready'):
+        break
+    time.sleep(0.5)
+if wait:
+    print(json.dumps({'event': 'settled', 'ready': body.get('ready'),
+                      'seconds': round(time.perf_counter() - t0, 2),
+                      'components': body.get('components')}), flush=True)
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--limit', type=float, default=1.0, help='max seconds from process start to first /health')
+    parser.add_argument('--wait', type=float, default=0, help='also wait up to N seconds for all components')
+    args = parser.parse_args()
+
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    proc = subprocess.run([sys.executable, '-c', CHILD, str(args.wait)], cwd=root,
+                          capture_output=True, text=True)
+    events = [json.loads(line) for line in proc.stdout.splitlines() if line.startswith('{')]
+    if proc.returncode != 0 or not events:
+        print(proc.stderr[-2000:])
+        print("FAIL: api.py could not be imported")
+        return 1
+
+    first = events[0]
+    print(f"import api.py:        {first['import_seconds']:.3f}s")
+    print(f"first /health:        {first['health_ms']:.2f}ms (HTTP {first['status_code']})")
+    print(f"process start->health {first['total_seconds']:.3f}s (limit {args.limit}s)")
+    for name, c in (first.get('components') or {}).items():
+        print(f"  {name:<12}{c['state']}")
+
+    if len(events) > 1:
+        settled = events[1]
+        print(f"components settled: ready={settled['ready']} after {settled['seconds']}s")
+        for name, c in (settled.get('components') or {}).items():
+            detail = f" ({c['error']})" if c.get('error') else ''
+            print(f"  {name:<12}{c['state']:<10}{c['load_seconds']}s{detail}")
+
+    if first['status_code'] != 200 or first['total_seconds'] >= args.limit:
+        print("FAIL: /health was not answered within the limit")
+        return 1
+    print("PASS")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
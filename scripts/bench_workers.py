@@ -0,0 +1,167 @@
+"""
+Multi-Worker Memory and Throughput Benchmark for the Forensic API
+Starts gunicorn (gunicorn.conf.py) at 1, 2 and 4 workers, waits for the
+classifier to be ready, then reports per-worker RSS / PSS / private memory
+and /analyze-content throughput. Run once as is and once with --preload to
+see how much of each worker's RSS is shared copy-on-write with the master
+(gunicorn.conf.py ignores preload at 1 worker).
+
+    python scripts/bench_workers.py --user-id 1 [--workers 1 2 4] [--duration 20] [--preload]
+
+--user-id must be an active account in forensic.db; the JWT is minted with
+SECRET_KEY from the environment (.env). Rate limiting is disabled for the
+benchmarked server only. PSS splits shared pages between the processes that
+map them, so sum(PSS) is the real footprint; RSS double-counts shared weights.
+Linux only (reads /proc/<pid>/smaps_rollup).
+"""
+import os
+import sys
+import time
+import signal
+import argparse
+import subprocess
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+import jwt
+import requests
+from dotenv import load_dotenv
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+SAMPLE_TEXTS = [
+    "Huyu mwanasiasa ni mwizi na anafaa kufungwa jela kwa ufisadi wake wote",
+    "Great turnout at the county health forum this morning, thanks everyone",
+    "These people are cockroaches and should all be driven out of our land",
+    "Governor alisema barabara itakamilika mwezi ujao, tusubiri tuone",
+]
+
+
+def memory_kb(pid):
+    """Rss/Pss/Private_* totals for pid from smaps_rollup, in KB."""
+    totals = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[0].endswith(':') and parts[1].isdigit():
+                totals[parts[0][:-1]] = int(parts[1])
+    return {
+        'rss': totals.get('Rss', 0),
+        'pss': totals.get('Pss', 0),
+        'private': totals.get('Private_Clean', 0) + totals.get('Private_Dirty', 0),
+    }
+
+
+def child_pids(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(p) for p in f.read().split()]
+
+
+def wait_ready(base_url, timeout):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            body = requests.get(f'{base_url}/health', timeout=2).json()
+            if body.get('components', {}).get('classifier', {}).get('state') in ('ready', 'failed', 'disabled'):
+                return body
+        except requests.RequestException:
+            pass
+        time.sleep(1)
+    return None
+
+
+def drive_load(base_url, token, duration, concurrency):
+    """Hammer /analyze-content from `concurrency` clients for `duration` seconds."""
+    def client(index):
+        session = requests.Session()
+        session.headers['Authorization'] = f'Bearer {token}'
+        done = errors = 0
+        deadline = time.time() + duration
+        while time.time() < deadline:
+            # Distinct text per request so the inference cache doesn't short-circuit the model
+            text = f"{SAMPLE_TEXTS[(index + done) % len(SAMPLE_TEXTS)]} #{index}-{done}"
+            try:
+                resp = session.post(f'{base_url}/analyze-content', json={'tweet_text': text}, timeout=60)
+                if resp.status_code == 200:
+                    done += 1
+                else:
+                    errors += 1
+            except requests.RequestException:
+                errors += 1
+        return done, errors
+
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(client, range(concurrency)))
+    elapsed = time.time() - started
+    done = sum(r[0] for r in results)
+    return done / elapsed, sum(r[1] for r in results)
+
+
+def run(workers, args, token):
+    port = args.port
+    env = dict(os.environ, WEB_CONCURRENCY=str(workers), PORT=str(port),
+               GUNICORN_PRELOAD='true' if args.preload else 'false',
+               FORENSIC_PRELOAD_MODELS='true' if args.preload else 'false',
+               RATELIMIT_ENABLED='false')
+    proc = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'api:app'],
+                            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        # /health lands on an arbitrary worker; several consecutive ready answers
+        # make it likely every worker has its classifier before load starts
+        for _ in range(workers * 4):
+            if wait_ready(base_url, args.ready_timeout) is None:
+                return {'workers': workers, 'error': 'server not ready'}
+
+        rps, errors = drive_load(base_url, token, args.duration, args.concurrency or workers * 4)
+        master = memory_kb(proc.pid)
+        per_worker = [memory_kb(pid) for pid in child_pids(proc.pid)]
+        return {
+            'workers': workers,
+            'rps': round(rps, 1),
+            'errors': errors,
+            'master_rss_mb': round(master['rss'] / 1024, 1),
+            'worker_rss_mb': round(sum(w['rss'] for w in per_worker) / len(per_worker) / 1024, 1),
+            'worker_pss_mb': round(sum(w['pss'] for w in per_worker) / len(per_worker) / 1024, 1),
+            'worker_private_mb': round(sum(w['private'] for w in per_worker) / len(per_worker) / 1024, 1),
+            'total_pss_mb': round((master['pss'] + sum(w['pss'] for w in per_worker)) / 1024, 1),
+        }
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--user-id', type=int, required=True, help='active user the JWT is minted for')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--duration', type=float, default=20, help='seconds of load per worker count')
+    parser.add_argument('--concurrency', type=int, default=0, help='client threads (default 4 per worker)')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--ready-timeout', type=float, default=300)
+    parser.add_argument('--preload', action='store_true', help='GUNICORN_PRELOAD=true')
+    args = parser.parse_args()
+
+    load_dotenv(os.path.join(ROOT, '.env'))
+    secret = os.getenv('SECRET_KEY', 'your-secret-key-change-in-production')
+    token = jwt.encode({'user_id': args.user_id,
+                        'exp': datetime.now(timezone.utc) + timedelta(hours=2)}, secret)
+
+    print(f"preload={'on' if args.preload else 'off'}")
+    print(f"{'workers':>7}{'req/s':>8}{'errors':>8}{'master RSS':>12}{'worker RSS':>12}"
+          f"{'worker PSS':>12}{'private':>9}{'total PSS':>11}")
+    for workers in args.workers:
+        r = run(workers, args, token)
+        if 'error' in r:
+            print(f"{workers:>7}  {r['error']}")
+            continue
+        print(f"{r['workers']:>7}{r['rps']:>8}{r['errors']:>8}{r['master_rss_mb']:>12}{r['worker_rss_mb']:>12}"
+              f"{r['worker_pss_mb']:>12}{r['worker_private_mb']:>9}{r['total_pss_mb']:>11}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
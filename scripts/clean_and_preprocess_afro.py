@@ -2,13 +2,15 @@ import pandas as pd
 import re
 import emoji
 import random
+import os
+import sys
 
-# NCIC Lexicon (Prohibited terms as per NCIC Act 2008)
-NCIC_LEXICON = [
-    "Hatupangwingwi", "Mende", "Chunga Kura", "Kama noma noma", 
-    "Kwekwe", "Madoa doa", "Operation Linda Kura", "Watu wa kurusha mawe", 
-    "Watajua hawajui", "Wabara waende kwao", "Wakuja", "Fumigation"
-]
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from lexicon_store import load_default_lexicons
+
+# NCIC Lexicon (Prohibited terms as per NCIC Act 2008), shared with the API
+NCIC_LEXICON = load_default_lexicons()['ncic']
 
 # Strategic Emoji List for toxic context (to be injected during augmentation)
 TOXIC_EMOJIS = ["", "", "", "", "", "", "", "", ""] # Add more as needed
@@ -0,0 +1,247 @@
+"""
+ONNX / int8 Export and Backend Comparison for the Afro-XLMR Classifier
+
+    python scripts/export_onnx.py export              # writes onnx/model.onnx + onnx/model.int8.onnx
+    python scripts/export_onnx.py parity [--limit N]  # accuracy/agreement vs torch on the held-out split
+    python scripts/export_onnx.py bench               # load time, RSS and latency per backend
+
+Run from the repository root. Export needs torch, onnx and onnxruntime;
+parity/bench need whichever backends you want compared.
+Backends are selected in the API with INFERENCE_BACKEND (see classifier_backends.py).
+"""
+import os
+import sys
+import json
+import time
+import resource
+import argparse
+import subprocess
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from classifier_backends import TorchBackend, OnnxBackend
+
+MODEL_DIR = 'models/afro_xlmr_forensics'
+SPLIT_PATH = 'data/splits/test.csv'
+MAX_SEQ_LENGTH = 128
+BATCH_SIZE = 32
+
+# name -> factory(model_dir); ONNX variants are separate files under <model_dir>/onnx/
+BACKEND_FACTORIES = {
+    'torch': lambda d: TorchBackend(d),
+    'torch-int8': lambda d: TorchBackend(d, quantize=True),
+    'onnx-fp32': lambda d: OnnxBackend(d, 'onnx/model.onnx'),
+    'onnx-int8': lambda d: OnnxBackend(d, 'onnx/model.int8.onnx'),
+}
+
+# Same decision rule as api._build_verdict
+HATE_THRESHOLD = 0.45
+DEFAM_THRESHOLD = 0.25
+
+
+def verdict(probs):
+    if probs[2] > HATE_THRESHOLD:
+        return 2
+    if probs[1] > DEFAM_THRESHOLD:
+        return 1
+    return 0
+
+
+def rss_mb():
+    """Current RSS if psutil is installed, else peak RSS from getrusage (Linux reports KB)."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load_split(path, limit=None):
+    import pandas as pd
+    df = pd.read_csv(path)
+    label_col = 'label_id' if 'label_id' in df.columns else 'Class'
+    df = df.dropna(subset=['Tweet', label_col])
+    if limit:
+        df = df.head(limit)
+    return df['Tweet'].astype(str).tolist(), df[label_col].astype(int).tolist()
+
+
+def run_backend(backend, tokenizer, texts):
+    probs = []
+    for start in range(0, len(texts), BATCH_SIZE):
+        batch = tokenizer(texts[start:start + BATCH_SIZE], truncation=True, max_length=MAX_SEQ_LENGTH,
+                          padding=True, return_tensors='np')
+        probs.extend(backend.predict_proba(batch['input_ids'], batch['attention_mask']))
+    return np.asarray(probs)
+
+
+def export(model_dir, opset):
+    # Each step in a fresh process: the torch weights and the quantizer's copy of the
+    # graph don't fit in memory together on a 4-6 GB host
+    for step in (['export-fp32', '--opset', str(opset)], ['quantize']):
+        proc = subprocess.run([sys.executable, __file__, *step, '--model-dir', model_dir])
+        if proc.returncode != 0:
+            sys.exit(proc.returncode)
+
+
+def export_fp32(model_dir, opset):
+    import torch
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    out_dir = os.path.join(model_dir, 'onnx')
+    os.makedirs(out_dir, exist_ok=True)
+    fp32_path = os.path.join(out_dir, 'model.onnx')
+
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    model = AutoModelForSequenceClassification.from_pretrained(model_dir)
+    model.eval()
+    # The graph only needs logits; return_dict=False keeps the traced output a plain tuple
+    model.config.return_dict = False
+    sample = tokenizer(["Sample post for tracing"], return_tensors='pt')
+
+    print(f"Exporting {model_dir} -> {fp32_path} (opset {opset})")
+    with torch.inference_mode():
+        torch.onnx.export(
+            model,
+            (sample['input_ids'], sample['attention_mask']),
+            fp32_path,
+            input_names=['input_ids', 'attention_mask'],
+            output_names=['logits'],
+            dynamic_axes={
+                'input_ids': {0: 'batch', 1: 'sequence'},
+                'attention_mask': {0: 'batch', 1: 'sequence'},
+                'logits': {0: 'batch'}
+            },
+            opset_version=opset,
+            do_constant_folding=True,
+            # torch>=2.9 defaults to the dynamo exporter, which ignores opset_version and emits
+            # value_info shapes that onnxruntime's int8 quantizer rejects
+            dynamo=False
+        )
+
+
+def quantize(model_dir):
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    fp32_path = os.path.join(model_dir, 'onnx', 'model.onnx')
+    int8_path = os.path.join(model_dir, 'onnx', 'model.int8.onnx')
+    print(f"Quantizing weights to int8 -> {int8_path}")
+    quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+
+    for path in (fp32_path, int8_path):
+        print(f"  {path}: {os.path.getsize(path) / (1024 * 1024):.1f} MB")
+
+
+def parity(model_dir, split_path, limit, tolerance, max_accuracy_drop):
+    from transformers import AutoTokenizer
+
+    texts, labels = load_split(split_path, limit)
+    labels = np.asarray(labels)
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+    print(f"Parity check on {len(texts)} held-out rows from {split_path}")
+
+    reference = run_backend(BACKEND_FACTORIES['torch'](model_dir), tokenizer, texts)
+    ref_verdicts = np.asarray([verdict(p) for p in reference])
+    ref_accuracy = float((ref_verdicts == labels).mean())
+
+    failed = False
+    print(f"{'backend':<12}{'accuracy':>10}{'agree':>9}{'max|dp|':>10}{'mean|dp|':>10}")
+    print(f"{'torch':<12}{ref_accuracy:>10.4f}{1.0:>9.4f}{0.0:>10.4f}{0.0:>10.4f}")
+    for name in ('torch-int8', 'onnx-fp32', 'onnx-int8'):
+        try:
+            probs = run_backend(BACKEND_FACTORIES[name](model_dir), tokenizer, texts)
+        except Exception as e:
+            print(f"{name:<12} skipped: {e}")
+            continue
+        verdicts = np.asarray([verdict(p) for p in probs])
+        accuracy = float((verdicts == labels).mean())
+        agreement = float((verdicts == ref_verdicts).mean())
+        diff = np.abs(probs - reference)
+        print(f"{name:<12}{accuracy:>10.4f}{agreement:>9.4f}{diff.max():>10.4f}{diff.mean():>10.4f}")
+        # fp32 ONNX must match torch numerically; int8 variants are judged on accuracy
+        if name == 'onnx-fp32' and diff.max() > tolerance:
+            print(f"  FAIL: probabilities differ by more than {tolerance}")
+            failed = True
+        if name.endswith('int8') and ref_accuracy - accuracy > max_accuracy_drop:
+            print(f"  FAIL: accuracy dropped by more than {max_accuracy_drop:.2%}")
+            failed = True
+    return 1 if failed else 0
+
+
+def bench_one(model_dir, name, iterations):
+    """Measure a single backend in this (fresh) process and print a JSON line."""
+    from transformers import AutoTokenizer
+
+    baseline_rss = rss_mb()
+    started = time.perf_counter()
+    backend = BACKEND_FACTORIES[name](model_dir)
+    load_seconds = time.perf_counter() - started
+    tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+    texts = ["Huyu mwanasiasa ni mwizi na anafaa kufungwa jela kwa ufisadi wake wote"] * 16
+    result = {'backend': name, 'load_seconds': round(load_seconds, 2)}
+    for batch_size in (1, 16):
+        batch = tokenizer(texts[:batch_size], truncation=True, max_length=MAX_SEQ_LENGTH,
+                          padding=True, return_tensors='np')
+        backend.predict_proba(batch['input_ids'], batch['attention_mask'])  # warm-up
+        samples = []
+        for _ in range(iterations):
+            t0 = time.perf_counter()
+            backend.predict_proba(batch['input_ids'], batch['attention_mask'])
+            samples.append((time.perf_counter() - t0) * 1000)
+        samples.sort()
+        result[f'p50_ms_b{batch_size}'] = round(samples[len(samples) // 2], 1)
+        result[f'p95_ms_b{batch_size}'] = round(samples[int(len(samples) * 0.95) - 1], 1)
+    result['rss_mb'] = round(rss_mb(), 1)
+    result['model_rss_mb'] = round(result['rss_mb'] - baseline_rss, 1)
+    print(json.dumps(result))
+
+
+def bench(model_dir, iterations):
+    # One subprocess per backend so RSS figures don't include the others
+    rows = []
+    for name in BACKEND_FACTORIES:
+        proc = subprocess.run(
+            [sys.executable, __file__, 'bench-one', '--backend', name,
+             '--model-dir', model_dir, '--iterations', str(iterations)],
+            capture_output=True, text=True
+        )
+        lines = [line for line in proc.stdout.splitlines() if line.startswith('{')]
+        if proc.returncode != 0 or not lines:
+            print(f"{name}: failed ({proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'no output'})")
+            continue
+        rows.append(json.loads(lines[-1]))
+
+    print(f"{'backend':<12}{'load s':>8}{'RSS MB':>9}{'p50 b1':>9}{'p95 b1':>9}{'p50 b16':>9}{'p95 b16':>9}")
+    for r in rows:
+        print(f"{r['backend']:<12}{r['load_seconds']:>8}{r['rss_mb']:>9}{r['p50_ms_b1']:>9}"
+              f"{r['p95_ms_b1']:>9}{r['p50_ms_b16']:>9}{r['p95_ms_b16']:>9}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['export', 'export-fp32', 'quantize', 'parity', 'bench', 'bench-one'])
+    parser.add_argument('--model-dir', default=MODEL_DIR)
+    parser.add_argument('--opset', type=int, default=14)
+    parser.add_argument('--split', default=SPLIT_PATH)
+    parser.add_argument('--limit', type=int, default=None)
+    parser.add_argument('--tolerance', type=float, default=1e-3, help='max |prob diff| allowed for onnx-fp32')
+    parser.add_argument('--max-accuracy-drop', type=float, default=0.01, help='allowed accuracy loss for int8')
+    parser.add_argument('--backend', choices=list(BACKEND_FACTORIES), default='torch')
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    if args.command == 'export':
+        export(args.model_dir, args.opset)
+    elif args.command == 'export-fp32':
+        export_fp32(args.model_dir, args.opset)
+    elif args.command == 'quantize':
+        quantize(args.model_dir)
+    elif args.command == 'parity':
+        sys.exit(parity(args.model_dir, args.split, args.limit, args.tolerance, args.max_accuracy_drop))
+    elif args.command == 'bench':
+        bench(args.model_dir, args.iterations)
+    else:
+        bench_one(args.model_dir, args.backend, args.iterations)
@@ -1,34 +1,17 @@
+import os
 import re
+import sys
 
-# Mock Lexicons
-NCIC_LEXICON = [
-    "Hatupangwingwi", "Mende", "Chunga Kura", "Kama noma noma", 
-    "Kwekwe", "Madoa doa", "Operation Linda Kura", "Watu wa kurusha mawe", 
-    "Watajua hawajui", "Wabara waende kwao", "Wakuja", "Fumigation"
-]
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-DEFAMATORY_MARKERS = [
-    "thief", "corrupt", "cartel", "mafia", "scammer", "conman", "mwizi", 
-    "fake", "fraud", "liar", "muongo", "character assassination", "poison",
-    "jinxed", "betrayed", "failed", "stole", "corrupt"
-]
+from lexicon_matcher import LexiconMatcher
+from lexicon_store import LEXICON_CATEGORIES, load_default_lexicons
 
-SECURITY_THREATS = [
-    "kill", "planning", "bomb", "attack", "al-shabaab", "terror", "violence",
-    "mapinduzi", "revolution", "overthrow", "dead"
-]
-
-SAFE_SIGNIFIERS = [
-    "think", "opinion", "debate", "agree", "disagree", "policy", "news",
-    "discussion", "report", "fact", "together", "peace"
-]
+# Same lexicons as the API (lexicons/forensic_lexicon.json)
+lexicon_matcher = LexiconMatcher(load_default_lexicons(), categories=LEXICON_CATEGORIES)
 
 def extract_forensic_markers(text):
-    text_lower = text.lower()
-    found_ncic = [word for word in NCIC_LEXICON if word.lower() in text_lower]
-    found_defam = [word for word in DEFAMATORY_MARKERS if word.lower() in text_lower]
-    found_security = [word for word in SECURITY_THREATS if word.lower() in text_lower]
-    found_safe = [word for word in SAFE_SIGNIFIERS if word.lower() in text_lower]
+    lexicon_hits = lexicon_matcher.match(text)
     
     found_entities = re.findall(r'@\w+', text)
     names = re.findall(r'\b[A-Z][a-z]+\b(?:\s+[A-Z][a-z]+\b)*', text)
@@ -36,10 +19,10 @@ def extract_forensic_markers(text):
     hashtags = re.findall(r'#\w+', text)
     
     return {
-        "ncic": found_ncic,
-        "defamatory": found_defam,
-        "security": found_security,
-        "safe": found_safe,
+        "ncic": lexicon_hits["ncic"],
+        "defamatory": lexicon_hits["defamatory"],
+        "security": lexicon_hits["security"],
+        "safe": lexicon_hits["safe"],
         "entities": found_entities,
         "names": unique_names,
         "hashtags": hashtags
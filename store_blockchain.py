@@ -1,4 +1,3 @@
-from web3 import Web3
 import json
 from datetime import datetime
 from dotenv import load_dotenv
@@ -83,6 +82,9 @@ def init_blockchain():
             logger.error("Blockchain initialization failed: Missing environment variables")
             return False
 
+        # Imported here: web3 is slow to import and only needed once a connection is made
+        from web3 import Web3
+
         infura_url_final = infura_project_id if infura_project_id.startswith("http") else f"https://sepolia.infura.io/v3/{infura_project_id}"
         web3 = Web3(Web3.HTTPProvider(infura_url_final, session=session, request_kwargs={'timeout': 10}))
 
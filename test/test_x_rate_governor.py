@@ -0,0 +1,309 @@
+"""
+X API Rate Governor Tests for Forensic Tool
+Unit tests for the bucket rules in XRateGovernor (on a throwaway SQLite file,
+with a fake clock), plus an end-to-end run against a local stub of the X API
+that enforces a per-endpoint quota and sends x-rate-limit-* headers like X.
+
+    python -m pytest -q test
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import threading
+from types import SimpleNamespace
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import x_rate_governor
+from http_client import HttpClient
+from db import X_RATE_LIMIT_DDL
+from x_rate_governor import (XRateGovernor, XRateLimited, X_RATE_PROBE_SECONDS, X_RATE_WINDOW_SECONDS,
+                             X_RATE_429_COOLDOWN_SECONDS, endpoint_key)
+
+ENDPOINT = 'GET /2/tweets/:id'
+URL = 'https://api.x.com/2/tweets/123?tweet.fields=public_metrics'
+
+
+class FakeClock:
+    """Stands in for the time module inside x_rate_governor; sleeping advances it."""
+
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def connection_factory(tmp_path):
+    db_path = str(tmp_path / 'governor.db')
+    conn = sqlite3.connect(db_path)
+    for statement in X_RATE_LIMIT_DDL:
+        conn.execute(statement)
+    conn.commit()
+    conn.close()
+    return lambda: sqlite3.connect(db_path, timeout=5)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(x_rate_governor, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def governor(connection_factory, clock):
+    return XRateGovernor(connection_factory, max_wait=0)
+
+
+def bucket(connection_factory, endpoint=ENDPOINT):
+    conn = connection_factory()
+    row = conn.execute('SELECT quota_limit, remaining, reset_at FROM x_rate_limits WHERE endpoint = ?',
+                       (endpoint,)).fetchone()
+    conn.close()
+    return row
+
+
+def set_bucket(connection_factory, limit, remaining, reset_at, endpoint=ENDPOINT):
+    conn = connection_factory()
+    conn.execute('INSERT OR REPLACE INTO x_rate_limits (endpoint, quota_limit, remaining, reset_at, updated_at) '
+                 'VALUES (?, ?, ?, ?, 0)', (endpoint, limit, remaining, reset_at))
+    conn.commit()
+    conn.close()
+
+
+def response(status=200, limit=None, remaining=None, reset=None):
+    headers = {name: str(value) for name, value in (('x-rate-limit-limit', limit),
+                                                    ('x-rate-limit-remaining', remaining),
+                                                    ('x-rate-limit-reset', reset)) if value is not None}
+    return SimpleNamespace(status_code=status, headers=headers)
+
+
+# --- endpoint_key ---
+
+@pytest.mark.parametrize('method, url, expected', [
+    ('get', 'https://api.x.com/2/tweets/123?x=y', 'GET /2/tweets/:id'),
+    ('GET', 'https://api.x.com/2/tweets?ids=1,2,3', 'GET /2/tweets'),
+    ('GET', 'https://api.x.com/2/tweets/search/recent?query=conversation_id:5', 'GET /2/tweets/search/recent'),
+    ('GET', 'https://api.x.com/2/users/42/tweets', 'GET /2/users/:id/tweets'),
+    ('POST', 'http://127.0.0.1:8080/2/tweets/7', 'POST /2/tweets/:id'),
+])
+def test_endpoint_key(method, url, expected):
+    assert endpoint_key(method, url) == expected
+
+
+# --- _take ---
+
+def test_first_request_to_unknown_endpoint_is_a_probe(governor, connection_factory, clock):
+    assert governor._take(ENDPOINT) is None
+    assert bucket(connection_factory) == (None, 0, clock.now + X_RATE_PROBE_SECONDS)
+    # Others wait for the probe's headers
+    assert governor._take(ENDPOINT) == pytest.approx(X_RATE_PROBE_SECONDS)
+
+
+def test_take_spends_tokens_within_the_window(governor, connection_factory, clock):
+    set_bucket(connection_factory, 10, 2, clock.now + 60)
+    assert governor._take(ENDPOINT) is None
+    assert governor._take(ENDPOINT) is None
+    assert bucket(connection_factory) == (10, 0, clock.now + 60)
+    assert governor._take(ENDPOINT) == pytest.approx(60)
+
+
+def test_ended_window_refills_to_the_known_limit(governor, connection_factory, clock):
+    set_bucket(connection_factory, 10, 0, clock.now - 1)
+    assert governor._take(ENDPOINT) is None
+    assert bucket(connection_factory) == (10, 9, clock.now + X_RATE_WINDOW_SECONDS)
+
+
+def test_ended_window_without_a_limit_probes_again(governor, connection_factory, clock):
+    set_bucket(connection_factory, None, 0, clock.now)
+    assert governor._take(ENDPOINT) is None
+    assert bucket(connection_factory) == (None, 0, clock.now + X_RATE_PROBE_SECONDS)
+
+
+# --- observe ---
+
+def test_observe_records_a_new_endpoint(governor, connection_factory, clock):
+    governor.observe(ENDPOINT, response(limit=300, remaining=299, reset=int(clock.now) + 900))
+    assert bucket(connection_factory) == (300, 299, int(clock.now) + 900)
+
+
+def test_observe_keeps_the_lower_count_within_a_window(governor, connection_factory, clock):
+    reset = int(clock.now) + 600
+    set_bucket(connection_factory, 300, 100, reset)
+    governor.observe(ENDPOINT, response(limit=300, remaining=150, reset=reset))
+    assert bucket(connection_factory)[1] == 100
+    governor.observe(ENDPOINT, response(limit=300, remaining=40, reset=reset))
+    assert bucket(connection_factory)[1] == 40
+
+
+def test_observe_later_reset_starts_a_new_window(governor, connection_factory, clock):
+    set_bucket(connection_factory, 300, 3, clock.now + 10)
+    governor.observe(ENDPOINT, response(limit=300, remaining=299, reset=int(clock.now) + 900))
+    assert bucket(connection_factory) == (300, 299, int(clock.now) + 900)
+
+
+def test_observe_corrects_an_assumed_window(governor, connection_factory, clock):
+    # A refill assumes X_RATE_WINDOW_SECONDS until X reports the real reset
+    set_bucket(connection_factory, 10, 0, clock.now - 1)
+    governor._take(ENDPOINT)
+    governor.observe(ENDPOINT, response(limit=10, remaining=9, reset=int(clock.now) + 30))
+    assert bucket(connection_factory) == (10, 9, int(clock.now) + 30)
+
+
+def test_observe_ignores_a_window_that_has_ended(governor, connection_factory, clock):
+    set_bucket(connection_factory, 300, 5, clock.now + 600)
+    governor.observe(ENDPOINT, response(limit=300, remaining=0, reset=int(clock.now) - 1))
+    assert bucket(connection_factory) == (300, 5, clock.now + 600)
+
+
+def test_observe_429_without_headers_empties_the_bucket(governor, connection_factory, clock):
+    set_bucket(connection_factory, 300, 50, clock.now + 600)
+    governor.observe(ENDPOINT, response(status=429))
+    assert bucket(connection_factory) == (300, 0, clock.now + 600)
+    assert governor.quota()['endpoints'][ENDPOINT]['throttled'] == 1
+
+    governor.observe('GET /2/users/:id', response(status=429))
+    assert bucket(connection_factory, 'GET /2/users/:id') == (None, 0, clock.now + X_RATE_429_COOLDOWN_SECONDS)
+
+
+def test_observe_without_headers_changes_nothing(governor, connection_factory, clock):
+    governor.observe(ENDPOINT, response())
+    assert bucket(connection_factory) is None
+
+
+# --- acquire ---
+
+def test_acquire_fails_fast_when_the_bucket_is_empty(governor, connection_factory, clock):
+    set_bucket(connection_factory, 10, 0, clock.now + 30)
+    with pytest.raises(XRateLimited) as excinfo:
+        governor.acquire('GET', URL)
+    assert excinfo.value.endpoint == ENDPOINT
+    assert excinfo.value.retry_after == 30
+    assert governor.quota()['endpoints'][ENDPOINT]['rejected'] == 1
+
+
+def test_acquire_waits_for_a_reset_within_max_wait(connection_factory, clock):
+    governor = XRateGovernor(connection_factory, max_wait=5)
+    set_bucket(connection_factory, 10, 0, clock.now + 2)
+    started = clock.now
+    assert governor.acquire('GET', URL) == ENDPOINT
+    assert 2 <= clock.now - started <= 3
+    assert bucket(connection_factory)[1] == 9
+
+
+# --- against a stub X API ---
+
+class StubXServer:
+    """Fixed-window quota per endpoint path, like X's 15-minute windows but shorter."""
+
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self.lock = threading.Lock()
+        self.windows = {}
+        self.served = 0
+        self.rejected = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                status, headers = stub.admit(endpoint_key('GET', self.path))
+                body = json.dumps({'data': {'id': '1', 'text': 'stub'}} if status == 200 else
+                                  {'title': 'Too Many Requests', 'status': 429}).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def admit(self, endpoint):
+        now = time.time()
+        with self.lock:
+            reset_at, used = self.windows.get(endpoint, (0, 0))
+            if now >= reset_at:
+                reset_at, used = int(now) + self.window, 0
+            allowed = used < self.limit
+            used += allowed
+            self.windows[endpoint] = (reset_at, used)
+            self.served += allowed
+            self.rejected += not allowed
+        return (200 if allowed else 429), {
+            'x-rate-limit-limit': str(self.limit),
+            'x-rate-limit-remaining': str(self.limit - used),
+            'x-rate-limit-reset': str(reset_at),
+        }
+
+
+@pytest.fixture
+def stub():
+    stub = StubXServer(limit=10, window=2)
+    yield stub
+    stub.httpd.shutdown()
+    stub.httpd.server_close()
+
+
+def drive(stub, total, governor=None, threads=6):
+    client = HttpClient()
+    outcomes = {'ok': 0, 'x_429': 0, 'refused_locally': 0}
+    lock = threading.Lock()
+
+    def one(i):
+        url = f"{stub.url}/2/tweets/{1000 + i}?tweet.fields=public_metrics"
+        try:
+            endpoint = governor.acquire('GET', url) if governor else None
+        except XRateLimited:
+            outcome = 'refused_locally'
+        else:
+            result = client.get(url, retries=0)
+            if governor:
+                governor.observe(endpoint, result)
+            outcome = 'ok' if result.status_code == 200 else 'x_429'
+        with lock:
+            outcomes[outcome] += 1
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(one, range(total)))
+    return outcomes
+
+
+def test_stub_rejects_ungoverned_overflow(stub):
+    outcomes = drive(stub, 30)
+    assert outcomes['x_429'] > 0
+
+
+def test_governed_fail_fast_sends_nothing_x_would_reject(stub, connection_factory):
+    outcomes = drive(stub, 30, XRateGovernor(connection_factory, max_wait=0))
+    assert outcomes['x_429'] == 0
+    assert stub.rejected == 0
+    assert outcomes['refused_locally'] > 0
+    assert outcomes['ok'] + outcomes['refused_locally'] == 30
+    assert outcomes['ok'] <= stub.limit * 2  # at most this window and, if it rolled over, the next
+
+
+def test_governed_queue_waits_out_the_window(stub, connection_factory):
+    outcomes = drive(stub, 25, XRateGovernor(connection_factory, max_wait=stub.window * 4))
+    assert outcomes == {'ok': 25, 'x_429': 0, 'refused_locally': 0}
+    assert stub.rejected == 0
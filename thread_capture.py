@@ -0,0 +1,183 @@
+"""
+Conversation Thread Capture for Forensic Tool
+Collects the rest of a post's conversation so replies and quote chains can be
+stored as evidence linked to the post an investigator fetched.
+
+  replies  - every post in the conversation, paged from the recent-search
+             endpoint (query "conversation_id:<id>", 100 per page, next_token)
+  root     - the post that started the conversation, when search didn't
+             return it, via the multi-ID lookup
+  quotes   - posts quoted by thread members, followed hop by hop through the
+             multi-ID lookup (a quote starts a new conversation, so search
+             can't find them)
+
+Each captured post carries its relation ('root', 'reply', 'quoted'), the post
+it links to (the one it replies to, or the one that quoted it) and its depth:
+reply hops from the root, or quote hops from the thread. Replies whose parent
+is unavailable (deleted, protected, older than the search window) keep
+depth None.
+
+Limits, so a viral thread can't drain the X quota:
+  X_THREAD_MAX_DEPTH     - deepest reply level / longest quote chain kept
+  X_THREAD_MAX_REQUESTS  - X API calls per capture (search pages + lookups)
+  X_THREAD_MAX_POSTS     - posts kept per capture
+
+Recent search only covers the last 7 days of a conversation.
+"""
+import os
+import logging
+
+from x_rate_governor import XRateLimited
+
+logger = logging.getLogger(__name__)
+
+X_THREAD_CAPTURE_DEFAULT = os.getenv('X_THREAD_CAPTURE_DEFAULT', 'false').lower() == 'true'
+X_THREAD_MAX_DEPTH = int(os.getenv('X_THREAD_MAX_DEPTH', 5))
+X_THREAD_MAX_REQUESTS = int(os.getenv('X_THREAD_MAX_REQUESTS', 5))
+X_THREAD_MAX_POSTS = int(os.getenv('X_THREAD_MAX_POSTS', 200))
+
+
+def referenced_id(tweet, kind):
+    """ID of the first post the tweet references as kind ('replied_to', 'quoted'), or None."""
+    return next((ref['id'] for ref in tweet.get('referenced_tweets', []) if ref.get('type') == kind), None)
+
+
+class ThreadCapture:
+    def __init__(self, search_page, lookup, max_depth=X_THREAD_MAX_DEPTH, max_requests=X_THREAD_MAX_REQUESTS,
+                 max_posts=X_THREAD_MAX_POSTS):
+        """
+        search_page(conversation_id, next_token) -> (status_code, response body)
+        lookup(post_ids) -> ({post_id: lookup payload}, X API calls made)
+        """
+        self.search_page = search_page
+        self.lookup = lookup
+        self.max_depth = max_depth
+        self.max_requests = max_requests
+        self.max_posts = max_posts
+
+    def capture(self, conversation_id, anchor_id=None, anchor_parent_id=None):
+        """
+        Collect conversation_id's thread. Returns {'posts': [...], 'anchor_depth', 'x_api_calls', 'truncated'};
+        each post is {'payload', 'relation', 'parent_post_id', 'depth'} and the anchor post is left out.
+        anchor_depth is the anchor's reply depth (via anchor_parent_id if search didn't return it), or None
+        if unknown. truncated names the limit that stopped the capture early, if any.
+        """
+        tweets, users, media = {}, {}, {}
+        requests_made = 0
+        truncated = None
+
+        def merge(body):
+            includes = body.get('includes', {})
+            users.update((u['id'], u) for u in includes.get('users', []))
+            media.update((m['media_key'], m) for m in includes.get('media', []))
+
+        # Replies: page through the conversation
+        next_token = None
+        try:
+            while True:
+                if requests_made >= self.max_requests:
+                    truncated = 'max_requests'
+                    break
+                status, body = self.search_page(conversation_id, next_token)
+                requests_made += 1
+                if status != 200:
+                    truncated = f"x_api_error_{status}"
+                    break
+                merge(body)
+                for tweet in body.get('data', []):
+                    tweets[tweet['id']] = tweet
+                if len(tweets) >= self.max_posts:
+                    truncated = 'max_posts'
+                    break
+                next_token = body.get('meta', {}).get('next_token')
+                if not next_token:
+                    break
+        except XRateLimited:
+            truncated = 'rate_limited'
+
+        # Root and quote chains through the multi-ID lookup
+        relation = {tweet_id: ('reply', referenced_id(tweet, 'replied_to')) for tweet_id, tweet in tweets.items()}
+        depth = {conversation_id: 0}
+
+        def quoted_by(source_ids):
+            # A quoted post is one hop further out than the post quoting it
+            frontier = {}
+            for tweet_id in source_ids:
+                quoted = referenced_id(tweets[tweet_id], 'quoted')
+                hops = (depth.get(tweet_id, 0) if relation[tweet_id][0] == 'quoted' else 0) + 1
+                if quoted and quoted not in tweets and hops <= self.max_depth:
+                    frontier.setdefault(quoted, ('quoted', tweet_id, hops))
+            return frontier
+
+        frontier = quoted_by(list(tweets))
+        if conversation_id not in tweets:
+            frontier[conversation_id] = ('root', None, 0)
+        while frontier and not truncated:
+            if requests_made >= self.max_requests:
+                truncated = 'max_requests'
+                break
+            if len(tweets) >= self.max_posts:
+                truncated = 'max_posts'
+                break
+            try:
+                found, calls = self.lookup(list(frontier))
+            except XRateLimited:
+                truncated = 'rate_limited'
+                break
+            requests_made += calls
+            added = []
+            for tweet_id, payload in found.items():
+                if tweet_id not in frontier or tweet_id in tweets:
+                    continue
+                kind, parent, hops = frontier[tweet_id]
+                tweets[tweet_id] = payload['data']
+                merge(payload)
+                relation[tweet_id] = (kind, parent)
+                depth[tweet_id] = hops
+                added.append(tweet_id)
+            frontier = quoted_by(added)
+        if conversation_id in tweets:
+            relation[conversation_id] = ('root', None)
+
+        def reply_depth(tweet_id, seen=()):
+            if tweet_id in depth:
+                return depth[tweet_id]
+            kind, parent = relation.get(tweet_id, (None, None))
+            if kind != 'reply' or (parent not in depth and parent not in tweets) or tweet_id in seen:
+                return None
+            parent_depth = reply_depth(parent, seen + (tweet_id,))
+            depth[tweet_id] = None if parent_depth is None else parent_depth + 1
+            return depth[tweet_id]
+
+        if anchor_id in tweets or anchor_id == conversation_id:
+            anchor_depth = reply_depth(anchor_id)
+        elif anchor_parent_id in tweets or anchor_parent_id == conversation_id:
+            parent_depth = reply_depth(anchor_parent_id)
+            anchor_depth = None if parent_depth is None else parent_depth + 1
+        else:
+            anchor_depth = None
+
+        posts = []
+        for tweet_id, tweet in tweets.items():
+            if tweet_id == anchor_id:
+                continue
+            kind, parent = relation[tweet_id]
+            post_depth = reply_depth(tweet_id)
+            if post_depth is not None and post_depth > self.max_depth:
+                continue
+            media_keys = set(tweet.get('attachments', {}).get('media_keys', []))
+            payload = {'data': tweet, 'includes': {
+                'users': [users[tweet['author_id']]] if tweet.get('author_id') in users else [],
+                'media': [media[key] for key in media_keys if key in media],
+            }}
+            posts.append({'payload': payload, 'relation': kind, 'parent_post_id': parent, 'depth': post_depth})
+
+        # Keep the root, then shallowest and oldest first
+        posts.sort(key=lambda p: (p['relation'] != 'root', p['depth'] if p['depth'] is not None else self.max_depth + 1,
+                                  p['payload']['data'].get('created_at', '')))
+        if len(posts) > self.max_posts:
+            posts = posts[:self.max_posts]
+            truncated = truncated or 'max_posts'
+        logger.info(f"Thread capture for conversation {conversation_id}: {len(posts)} posts, "
+                    f"{requests_made} X API calls, truncated={truncated}")
+        return {'posts': posts, 'anchor_depth': anchor_depth, 'x_api_calls': requests_made, 'truncated': truncated}
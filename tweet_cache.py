@@ -0,0 +1,133 @@
+"""
+X API Tweet Cache for Forensic Tool
+When several investigators fetch the same viral post, fetch_x_post would call
+GET /2/tweets/{id} every time. The x_tweet_cache table keeps the raw lookup
+payload (tweet + author/media expansions) per post_id, encrypted at rest with
+crypto_utils, and shared by all workers.
+
+Two TTLs:
+  X_TWEET_CACHE_TTL_SECONDS  - the payload (text, entities, media, author)
+  X_METRICS_TTL_SECONDS      - public_metrics; when only these are stale the
+                               caller refreshes them with a metrics-only
+                               lookup and keeps the cached payload
+
+force_refresh bypasses the cache (e.g. when legal needs a current snapshot)
+and replaces the entry. X API v2 has no conditional (ETag) requests, so
+freshness is TTL-based.
+"""
+import os
+import json
+import time
+import threading
+import logging
+
+from crypto_utils import encrypt_field, decrypt_field
+
+logger = logging.getLogger(__name__)
+
+X_TWEET_CACHE_TTL_SECONDS = float(os.getenv('X_TWEET_CACHE_TTL_SECONDS', 6 * 3600))
+X_METRICS_TTL_SECONDS = float(os.getenv('X_METRICS_TTL_SECONDS', 300))
+
+FRESH, METRICS_STALE = 'fresh', 'metrics_stale'
+
+
+class TweetCache:
+    def __init__(self, connection_factory, ttl=X_TWEET_CACHE_TTL_SECONDS, metrics_ttl=X_METRICS_TTL_SECONDS):
+        self._connection_factory = connection_factory
+        self.ttl = ttl
+        self.metrics_ttl = metrics_ttl
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'metrics_refreshes': 0, 'misses': 0, 'forced_refreshes': 0, 'errors': 0}
+
+    def count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def get(self, post_id):
+        """Return (payload, FRESH | METRICS_STALE) or (None, None) when absent/expired."""
+        now = time.time()
+        try:
+            conn = self._connection_factory()
+            row = conn.execute(
+                'SELECT payload, fetched_at, public_metrics, metrics_fetched_at FROM x_tweet_cache WHERE post_id = ?',
+                (post_id,)
+            ).fetchone()
+            conn.close()
+            if row is None or row[1] + self.ttl <= now:
+                return None, None
+            payload = json.loads(decrypt_field(row[0]))
+            if row[2] is not None:
+                payload.setdefault('data', {})['public_metrics'] = json.loads(decrypt_field(row[2]))
+        except Exception as e:
+            logger.warning(f"Tweet cache read failed for {post_id}: {e}")
+            self.count('errors')
+            return None, None
+        return payload, (FRESH if row[3] + self.metrics_ttl > now else METRICS_STALE)
+
+    def record_hit(self, post_id):
+        self.count('hits')
+        try:
+            conn = self._connection_factory()
+            conn.execute('UPDATE x_tweet_cache SET hits = hits + 1 WHERE post_id = ?', (post_id,))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.warning(f"Tweet cache hit update failed for {post_id}: {e}")
+
+    def put(self, post_id, payload):
+        """Store a full lookup response; public_metrics are kept separately with their own TTL."""
+        payload = json.loads(json.dumps(payload))
+        metrics = payload.get('data', {}).pop('public_metrics', None)
+        now = time.time()
+        try:
+            conn = self._connection_factory()
+            conn.execute(
+                'INSERT OR REPLACE INTO x_tweet_cache (post_id, payload, fetched_at, public_metrics, metrics_fetched_at, hits) '
+                'VALUES (?, ?, ?, ?, ?, COALESCE((SELECT hits FROM x_tweet_cache WHERE post_id = ?), 0))',
+                (post_id, encrypt_field(json.dumps(payload)), now,
+                 encrypt_field(json.dumps(metrics)) if metrics is not None else None, now, post_id)
+            )
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.warning(f"Tweet cache write failed for {post_id}: {e}")
+            self.count('errors')
+
+    def update_metrics(self, post_id, public_metrics):
+        try:
+            conn = self._connection_factory()
+            conn.execute(
+                'UPDATE x_tweet_cache SET public_metrics = ?, metrics_fetched_at = ? WHERE post_id = ?',
+                (encrypt_field(json.dumps(public_metrics)), time.time(), post_id)
+            )
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.warning(f"Tweet cache metrics update failed for {post_id}: {e}")
+            self.count('errors')
+
+    def purge_expired(self):
+        conn = self._connection_factory()
+        cur = conn.execute('DELETE FROM x_tweet_cache WHERE fetched_at < ?', (time.time() - self.ttl,))
+        conn.commit()
+        conn.close()
+        return cur.rowcount
+
+    def metrics(self):
+        with self._lock:
+            counters = dict(self._counters)
+        # Full hits skip the API call entirely; metrics refreshes still cost one (smaller) call
+        lookups = counters['hits'] + counters['metrics_refreshes'] + counters['misses'] + counters['forced_refreshes']
+        stats = dict(counters,
+                     hit_rate=round((counters['hits'] + counters['metrics_refreshes']) / lookups, 4) if lookups else 0.0,
+                     api_calls_saved=counters['hits'],
+                     ttl_seconds=self.ttl, metrics_ttl_seconds=self.metrics_ttl)
+        try:
+            conn = self._connection_factory()
+            row = conn.execute('SELECT COUNT(*), COALESCE(SUM(hits), 0) FROM x_tweet_cache').fetchone()
+            conn.close()
+            # Persisted across restarts and summed over every worker
+            stats['entries'], stats['api_calls_saved_total'] = row
+        except Exception as e:
+            logger.warning(f"Tweet cache stats failed: {e}")
+        return stats
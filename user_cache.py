@@ -0,0 +1,103 @@
+"""
+In-Process User Status Cache for Forensic Tool
+Keeps is_active / account_status / is_admin per user id for a short TTL so
+token_required doesn't hit SQLite on every authenticated request.
+
+Admin actions that change a user's status call invalidate_user(); other
+gunicorn workers pick the change up when their entry expires, so a
+suspension takes effect everywhere within USER_STATUS_TTL_SECONDS.
+"""
+import os
+import time
+import threading
+import logging
+
+from db import get_connection
+
+logger = logging.getLogger(__name__)
+
+USER_STATUS_TTL_SECONDS = float(os.getenv('USER_STATUS_TTL_SECONDS', 60))
+USER_STATUS_CACHE_MAX = int(os.getenv('USER_STATUS_CACHE_MAX', 10000))
+
+_MISSING = object()
+
+
+def _load_user_status(user_id):
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute('SELECT is_active, account_status, is_admin FROM users WHERE id = ?', (user_id,))
+    row = c.fetchone()
+    conn.close()
+    if not row:
+        return None
+    return {
+        'is_active': row[0] or 0,
+        'account_status': row[1] or 'active',
+        'is_admin': row[2] or 0
+    }
+
+
+class UserStatusCache:
+    """Thread-safe TTL cache of user status rows keyed by user id."""
+
+    def __init__(self, ttl=USER_STATUS_TTL_SECONDS, max_entries=USER_STATUS_CACHE_MAX, loader=_load_user_status):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._loader = loader
+        self._entries = {}
+        self._lock = threading.Lock()
+        # Bumped on every invalidation so a load racing with it isn't cached
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        """Return the user's status dict (or None if the user doesn't exist)."""
+        key = int(user_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            version = self._version
+
+        status = self._loader(key)
+        with self._lock:
+            if version != self._version:
+                return status
+            if len(self._entries) >= self.max_entries:
+                # Drop expired entries first; fall back to a full reset if all are live
+                self._entries = {k: v for k, v in self._entries.items() if v[0] > now}
+                if len(self._entries) >= self.max_entries:
+                    self._entries.clear()
+            self._entries[key] = (now + self.ttl, status)
+        return status
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._version += 1
+            self._entries.pop(int(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses, 'ttl_seconds': self.ttl}
+
+
+user_status_cache = UserStatusCache()
+
+
+def get_user_status(user_id):
+    return user_status_cache.get(user_id)
+
+
+def invalidate_user(user_id):
+    """Drop a cached status after approve/suspend/activate/delete or a password change."""
+    user_status_cache.invalidate(user_id)
+    logger.info(f"User status cache invalidated for user {user_id}")
@@ -0,0 +1,199 @@
+"""
+X API Rate Governor for Forensic Tool
+X enforces a request quota per endpoint and 15-minute window, and reports it
+on every response:
+
+  x-rate-limit-limit      - requests allowed in the window
+  x-rate-limit-remaining  - requests left in the window
+  x-rate-limit-reset      - epoch second at which the window resets
+
+Previously the API only found out when X answered 429. The governor records
+those headers per endpoint (path with IDs replaced by ":id", e.g.
+"GET /2/tweets/:id") in the x_rate_limits table, shared by all workers, and
+treats `remaining` as a token bucket that refills at `reset`:
+
+  acquire()  - takes a token before a request is sent. When the bucket is
+               empty and the window resets within X_RATE_MAX_WAIT_SECONDS the
+               caller waits for it; otherwise XRateLimited is raised at once,
+               without spending a request X would reject.
+  observe()  - reconciles the bucket with the headers of the response. Within
+               a window the lower count wins, so in-flight reservations and
+               other clients of the same token are both accounted for; a
+               later reset starts a new window; responses from a window that
+               has already ended are ignored. The cooldown assumed for a 429
+               without headers never shortens a known window.
+
+The first request to an endpoint the governor hasn't seen is a probe: it is
+sent alone and the others wait (up to X_RATE_PROBE_SECONDS) for its headers.
+Reset times are compared with the local clock, so hosts need NTP. Current
+quota is exposed at /admin/x-api-quota.
+"""
+import os
+import re
+import time
+import threading
+import logging
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+X_RATE_MAX_WAIT_SECONDS = float(os.getenv('X_RATE_MAX_WAIT_SECONDS', 5))
+X_RATE_WINDOW_SECONDS = 15 * 60  # X quota window, assumed until a response reports the real reset
+X_RATE_429_COOLDOWN_SECONDS = 60  # used when a 429 arrives without rate-limit headers
+X_RATE_PROBE_SECONDS = 2  # how long a first request to a new endpoint holds back the others
+
+
+_ID_SEGMENT = re.compile(r'(?<=\w)/\d+(?=/|$)')  # not the leading /2 API version
+
+
+class XRateLimited(Exception):
+    def __init__(self, endpoint, retry_after):
+        self.endpoint = endpoint
+        self.retry_after = max(0, int(retry_after + 0.999))
+        super().__init__(f"X API quota for {endpoint} exhausted; resets in {self.retry_after}s")
+
+
+def endpoint_key(method, url):
+    """'GET https://api.x.com/2/tweets/123?x=y' -> 'GET /2/tweets/:id'."""
+    return f"{method.upper()} {_ID_SEGMENT.sub('/:id', urlsplit(url).path)}"
+
+
+def _int_header(response, name):
+    try:
+        return int(response.headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+class XRateGovernor:
+    def __init__(self, connection_factory, max_wait=X_RATE_MAX_WAIT_SECONDS):
+        self._connection_factory = connection_factory
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._counters = {}
+
+    def _count(self, endpoint, name):
+        with self._lock:
+            counters = self._counters.setdefault(endpoint, {'sent': 0, 'queued': 0, 'rejected': 0, 'throttled': 0})
+            counters[name] += 1
+
+    def _take(self, endpoint):
+        """Take one token; returns None on success, else seconds until the window resets."""
+        now = time.time()
+        conn = self._connection_factory()
+        try:
+            # Single statements, so concurrent workers can't both take the last token.
+            # A window that has ended refills to the known limit; with no limit known
+            # yet, this request becomes the probe.
+            cur = conn.execute(
+                'UPDATE x_rate_limits SET '
+                'remaining = CASE WHEN reset_at <= ? THEN COALESCE(quota_limit, 1) - 1 ELSE remaining - 1 END, '
+                'reset_at = CASE WHEN reset_at > ? THEN reset_at '
+                'WHEN quota_limit IS NULL THEN ? ELSE ? END '
+                'WHERE endpoint = ? AND (remaining > 0 OR reset_at <= ?)',
+                (now, now, now + X_RATE_PROBE_SECONDS, now + X_RATE_WINDOW_SECONDS, endpoint, now)
+            )
+            if not cur.rowcount:
+                cur = conn.execute(
+                    'INSERT OR IGNORE INTO x_rate_limits (endpoint, quota_limit, remaining, reset_at, updated_at) '
+                    'VALUES (?, NULL, 0, ?, ?)',
+                    (endpoint, now + X_RATE_PROBE_SECONDS, now)
+                )
+            conn.commit()
+            if cur.rowcount:
+                return None
+            row = conn.execute('SELECT reset_at FROM x_rate_limits WHERE endpoint = ?', (endpoint,)).fetchone()
+        finally:
+            conn.close()
+        return max(0.0, row[0] - now) if row else 0.0
+
+    def acquire(self, method, url, max_wait=None):
+        """Reserve a request to url's endpoint; waits up to max_wait for a reset, else raises XRateLimited."""
+        endpoint = endpoint_key(method, url)
+        max_wait = self.max_wait if max_wait is None else max_wait
+        deadline = time.monotonic() + max_wait
+        queued = False
+        while True:
+            try:
+                wait = self._take(endpoint)
+            except Exception as e:
+                # Never block X calls on a bookkeeping failure
+                logger.warning(f"X rate governor unavailable for {endpoint}: {e}")
+                wait = None
+            if wait is None:
+                self._count(endpoint, 'sent')
+                return endpoint
+            if time.monotonic() + wait > deadline:
+                self._count(endpoint, 'rejected')
+                logger.warning(f"X API quota for {endpoint} exhausted; failing fast (resets in {wait:.0f}s)")
+                raise XRateLimited(endpoint, wait)
+            if not queued:
+                queued = True
+                self._count(endpoint, 'queued')
+            time.sleep(min(wait, 0.25) + 0.01)
+
+    def observe(self, endpoint, response):
+        """Reconcile the endpoint's bucket with an X response's rate-limit headers."""
+        limit = _int_header(response, 'x-rate-limit-limit')
+        remaining = _int_header(response, 'x-rate-limit-remaining')
+        reset_at = _int_header(response, 'x-rate-limit-reset')
+        assumed_reset = False
+        if response.status_code == 429:
+            self._count(endpoint, 'throttled')
+            remaining = 0
+            if reset_at is None:
+                reset_at = time.time() + X_RATE_429_COOLDOWN_SECONDS
+                assumed_reset = True
+        if remaining is None or reset_at is None:
+            return
+        now = time.time()
+        try:
+            conn = self._connection_factory()
+            conn.execute(
+                'INSERT INTO x_rate_limits (endpoint, quota_limit, remaining, reset_at, updated_at) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT(endpoint) DO UPDATE SET '
+                'remaining = CASE '
+                '  WHEN x_rate_limits.quota_limit IS NULL OR excluded.reset_at > x_rate_limits.reset_at THEN excluded.remaining '
+                '  WHEN excluded.reset_at <= ? THEN x_rate_limits.remaining '
+                '  ELSE MIN(x_rate_limits.remaining, excluded.remaining) END, '
+                'reset_at = CASE '
+                '  WHEN ? AND excluded.reset_at <= x_rate_limits.reset_at THEN x_rate_limits.reset_at '
+                '  WHEN x_rate_limits.quota_limit IS NOT NULL AND excluded.reset_at <= ? '
+                '   AND excluded.reset_at <= x_rate_limits.reset_at THEN x_rate_limits.reset_at '
+                '  ELSE excluded.reset_at END, '
+                'quota_limit = COALESCE(excluded.quota_limit, x_rate_limits.quota_limit), '
+                'updated_at = excluded.updated_at',
+                (endpoint, limit, remaining, float(reset_at), now, now, assumed_reset, now)
+            )
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            logger.warning(f"X rate governor update failed for {endpoint}: {e}")
+
+    def quota(self):
+        """Per-endpoint quota as last reported by X, plus this process's sent/queued/rejected counters."""
+        now = time.time()
+        with self._lock:
+            counters = {endpoint: dict(values) for endpoint, values in self._counters.items()}
+        endpoints = {}
+        try:
+            conn = self._connection_factory()
+            rows = conn.execute(
+                'SELECT endpoint, quota_limit, remaining, reset_at, updated_at FROM x_rate_limits ORDER BY endpoint'
+            ).fetchall()
+            conn.close()
+        except Exception as e:
+            logger.warning(f"X rate governor stats failed: {e}")
+            rows = []
+        for endpoint, limit, remaining, reset_at, updated_at in rows:
+            window_over = reset_at <= now
+            endpoints[endpoint] = {
+                'limit': limit,
+                'remaining': limit if window_over and limit is not None else remaining,
+                'reset_at': int(reset_at),
+                'reset_in_seconds': 0 if window_over else int(reset_at - now),
+                'updated_at': int(updated_at),
+            }
+        for endpoint, values in counters.items():
+            endpoints.setdefault(endpoint, {}).update(values)
+        return {'max_wait_seconds': self.max_wait, 'endpoints': endpoints}